@@ -0,0 +1,48 @@
+import django
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def apply_sqlite_pragmas(connection):
+    """
+    Runs the `PRAGMAS` of the database settings of `connection` on it.
+    """
+    pragmas = connection.settings_dict.get("PRAGMAS") or {}
+    if connection.vendor != "sqlite" or not pragmas:
+        return
+    # Straight on the DB-API connection: these statements are not queries of the application.
+    cursor = connection.connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def apply_transaction_mode(connection):
+    """
+    Starts the transactions of `connection` with `BEGIN <TRANSACTION_MODE>` when its database settings
+    set one. Only used with Django 5.0: the settings move the `transaction_mode` option, supported
+    by Django 5.1, to `TRANSACTION_MODE`, and this replaces a private method of the connection.
+
+    With the default deferred mode, a transaction reading before it writes must upgrade its lock,
+    and SQLite fails at once with "database is locked" instead of waiting `busy_timeout` when another
+    connection wrote in the meantime. `IMMEDIATE` takes the write lock first, waiting for it.
+    """
+    mode = connection.settings_dict.get("TRANSACTION_MODE")
+    if django.VERSION >= (5, 1) or connection.vendor != "sqlite" or not mode:
+        return
+
+    def start_transaction_under_autocommit():
+        connection.cursor().execute(f"BEGIN {mode}")
+    connection._start_transaction_under_autocommit = start_transaction_under_autocommit
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    """
+    Pragmas only last as long as the connection (except the journal mode), so they are applied
+    each time one is opened. Django 5.0 has no `init_command` nor `transaction_mode` option for SQLite.
+    """
+    apply_sqlite_pragmas(connection)
+    apply_transaction_mode(connection)
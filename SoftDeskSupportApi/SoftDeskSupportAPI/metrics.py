@@ -0,0 +1,335 @@
+"""
+Per-endpoint request metrics, exposed in the Prometheus text format at `/metrics`.
+
+`MetricsMiddleware` records, for each resolved URL name and viewset action, the latency, the number
+and total duration of the SQL queries, the response size and the status codes (403 responses are
+the permission denials). Recording a request only updates a few integers of its series under a lock:
+the text is built when `/metrics` is scraped. The queries run while a streaming response is sent
+happen after the request is recorded and are not counted.
+
+The middleware runs synchronously under WSGI and asynchronously under ASGI, so that it does not
+move the async views to a thread. The queries are counted by an execute wrapper installed on every
+connection, which adds them to the timers of the current context (see `timing_queries`): the context
+follows the request into the threads running its ORM calls.
+
+The metrics are kept per process: with several workers, each one exposes its own. They are only
+served to the addresses of `METRICS_ALLOWED_IPS`, with the `METRICS_TOKEN` when one is set.
+"""
+import bisect
+import hmac
+import ipaddress
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.http import HttpResponseForbidden
+
+from project_management_app.membership import membership_cache
+from project_management_app.response_cache import response_cache
+from user_contrib_app.authentication import user_cache
+from user_contrib_app.hashing import hashing_pool
+
+# Upper bounds of the histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+class Histogram:
+    """
+    Histogram state: the number of values of each bucket (the last one is +Inf) and their sum.
+    """
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        """
+        Yields the (le, cumulative count) pairs of the buckets, ending with +Inf.
+        """
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield format_value(bound), total
+        total += self.counts[-1]
+        yield "+Inf", total
+
+
+class EndpointSeries:
+    """
+    Metrics of one (route, action) pair.
+    """
+    __slots__ = ("latency", "queries", "sql_seconds", "size", "statuses", "denied")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.sql_seconds = 0.0
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statuses = {}
+        self.denied = 0
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def record(self, route, action, status, duration, queries, sql_seconds, size):
+        with self._lock:
+            series = self._series.get((route, action))
+            if series is None:
+                series = self._series[(route, action)] = EndpointSeries()
+            series.latency.observe(duration)
+            series.queries.observe(queries)
+            series.sql_seconds += sql_seconds
+            if size is not None:
+                series.size.observe(size)
+            series.statuses[status] = series.statuses.get(status, 0) + 1
+            if status == 403:
+                series.denied += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """
+        Returns all the metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            series = sorted(self._series.items())
+            lines = []
+            self._render_histogram(lines, series, "softdesk_request_duration_seconds",
+                                   "Time spent handling the requests.", "latency")
+            self._render_histogram(lines, series, "softdesk_request_queries",
+                                   "SQL queries run per request.", "queries")
+            self._render_histogram(lines, series, "softdesk_response_size_bytes",
+                                   "Size of the response bodies (streaming responses excluded).", "size")
+
+            lines.append("# HELP softdesk_request_sql_seconds_total Time spent running SQL queries.")
+            lines.append("# TYPE softdesk_request_sql_seconds_total counter")
+            for (route, action), endpoint in series:
+                lines.append(f"softdesk_request_sql_seconds_total{labels(route=route, action=action)} "
+                             f"{format_value(endpoint.sql_seconds)}")
+
+            lines.append("# HELP softdesk_requests_total Requests handled, by status code.")
+            lines.append("# TYPE softdesk_requests_total counter")
+            for (route, action), endpoint in series:
+                for status, count in sorted(endpoint.statuses.items()):
+                    lines.append(f"softdesk_requests_total{labels(route=route, action=action, status=status)} "
+                                 f"{count}")
+
+            lines.append("# HELP softdesk_permission_denied_total Requests denied with a 403 response.")
+            lines.append("# TYPE softdesk_permission_denied_total counter")
+            for (route, action), endpoint in series:
+                lines.append(f"softdesk_permission_denied_total{labels(route=route, action=action)} "
+                             f"{endpoint.denied}")
+
+        self._render_caches(lines)
+        return "\n".join(lines) + "\n"
+
+    def _render_histogram(self, lines, series, name, description, attribute):
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} histogram")
+        for (route, action), endpoint in series:
+            histogram = getattr(endpoint, attribute)
+            count = 0
+            for bound, count in histogram.samples():
+                lines.append(f"{name}_bucket{labels(route=route, action=action, le=bound)} {count}")
+            lines.append(f"{name}_sum{labels(route=route, action=action)} {format_value(histogram.sum)}")
+            lines.append(f"{name}_count{labels(route=route, action=action)} {count}")
+
+    def _render_caches(self, lines):
+        membership = membership_cache.stats()
+        users = user_cache.stats()
+        responses = response_cache.stats()
+        counters = [
+            ("softdesk_membership_cache_hits_total", "Membership cache hits.", membership["hits"]),
+            ("softdesk_membership_cache_misses_total", "Membership cache misses.", membership["misses"]),
+            ("softdesk_user_cache_hits_total", "User cache hits.", users["hits"]),
+            ("softdesk_user_cache_misses_total", "User cache misses.", users["misses"]),
+            ("softdesk_response_cache_hits_total", "Response cache hits.", responses["hits"]),
+            ("softdesk_response_cache_misses_total", "Response cache misses.", responses["misses"]),
+            ("softdesk_password_hashing_rejected_total", "Sign-ups rejected because the hashing pool was full.",
+             hashing_pool.rejected),
+        ]
+        for name, description, value in counters:
+            lines.extend([f"# HELP {name} {description}", f"# TYPE {name} counter", f"{name} {value}"])
+        lines.extend(["# HELP softdesk_user_cache_entries Users in the user cache.",
+                      "# TYPE softdesk_user_cache_entries gauge",
+                      f"softdesk_user_cache_entries {users['size']}"])
+        lookups = responses["hits"] + responses["misses"]
+        ratio = responses["hits"] / lookups if lookups else 0.0
+        lines.extend(["# HELP softdesk_response_cache_hit_ratio Share of the cacheable responses read from the cache.",
+                      "# TYPE softdesk_response_cache_hit_ratio gauge",
+                      f"softdesk_response_cache_hit_ratio {format_value(ratio)}"])
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def labels(**values):
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for value in values.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(values, escaped)) + "}"
+
+
+registry = MetricsRegistry()
+
+
+class QueryTimer:
+    """
+    Number and total duration of the queries of a request.
+    """
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Timers of the current context, e.g. of the request being handled.
+_query_timers = ContextVar("query_timers", default=())
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding the query to the timers of the current context.
+    """
+    timers = _query_timers.get()
+    if not timers:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - start
+        for timer in timers:
+            timer.seconds += seconds
+            timer.queries += 1
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    """
+    Installs `time_query` on a connection, once. Connections are per thread: the ones opened by the
+    threads of the async ORM are timed as well.
+    """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def install_query_timers():
+    """
+    Installs `time_query` on the connections of the current thread, including the ones opened
+    before this module was loaded.
+    """
+    for connection in connections.all():
+        install_query_timer(None, connection)
+
+
+@contextmanager
+def timing_queries():
+    """
+    Yields a `QueryTimer` counting the queries run in the block, in this thread or in the threads
+    it awaits. Blocks can be nested.
+    """
+    timer = QueryTimer()
+    token = _query_timers.set((*_query_timers.get(), timer))
+    try:
+        yield timer
+    finally:
+        _query_timers.reset(token)
+
+
+def get_labels(request):
+    """
+    Returns the route and action labels of the request, from the view it was resolved to.
+    """
+    match = request.resolver_match
+    method = request.method.lower()
+    if match is None:
+        return "unmatched", method
+    # Viewsets map each method to an action, other views are labelled with the method.
+    actions = getattr(match.func, "actions", None) or {}
+    return match.url_name or match.route, actions.get(method, method)
+
+
+class MetricsMiddleware:
+    """
+    Records the metrics of each request in `registry`. It should be the first middleware,
+    so that the latency covers the whole request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        install_query_timers()
+        with timing_queries() as timer:
+            start = time.perf_counter()
+            response = self.get_response(request)
+            duration = time.perf_counter() - start
+        self.record(request, response, duration, timer)
+        return response
+
+    async def __acall__(self, request):
+        with timing_queries() as timer:
+            start = time.perf_counter()
+            response = await self.get_response(request)
+            duration = time.perf_counter() - start
+        self.record(request, response, duration, timer)
+        return response
+
+    def record(self, request, response, duration, timer):
+        route, action = get_labels(request)
+        size = None if response.streaming else len(response.content)
+        registry.record(route, action, response.status_code, duration, timer.queries, timer.seconds, size)
+
+
+def is_allowed_scraper(request):
+    """
+    Returns whether the client of `request` is allowed to read the metrics.
+    """
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    if not any(address in ipaddress.ip_network(network) for network in settings.METRICS_ALLOWED_IPS):
+        return False
+    if not settings.METRICS_TOKEN:
+        return True
+    return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}")
+
+
+def metrics(request):
+    """
+    Returns the metrics of this process in the Prometheus text format.
+    """
+    if not is_allowed_scraper(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,155 @@
+import base64
+import binascii
+import datetime
+import json
+import uuid
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination that switches to keyset (cursor) pagination when the `cursor`
+    query parameter is present (`?cursor=` starts at the first page).
+
+    In keyset mode the page is selected with a `WHERE` on the ordering columns of the last row seen
+    instead of an `OFFSET`, and no `COUNT(*)` is run, so fetching page N costs the same as page 1
+    as long as an index matches the ordering. The ordering is the one of the queryset, e.g. requested
+    with `?ordering=`, when it ends with the primary key, otherwise the `keyset_ordering` attribute of
+    the view, which must end with a unique column.
+    """
+    cursor_query_param = "cursor"
+    keyset_ordering = ("created_time", "id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = self.get_keyset_ordering(queryset, view)
+        # Names of the ordering columns, without their direction.
+        self.fields = [field.lstrip("-") for field in self.ordering]
+        reverse, position = self.decode_cursor(request)
+
+        if reverse:
+            queryset = queryset.order_by(*[field[1:] if field.startswith("-") else f"-{field}"
+                                           for field in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        try:
+            if position is not None:
+                queryset = queryset.filter(self.get_position_filter(position, reverse))
+            # Fetch one extra row to know if there is another page in this direction.
+            rows = list(queryset[:self.limit + 1])
+        except (DjangoValidationError, ValueError, TypeError):
+            # The cursor holds values that do not match the ordering columns.
+            raise NotFound(self.invalid_cursor_message)
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+
+        if reverse:
+            rows.reverse()
+            self.has_previous = has_more
+            self.has_next = position is not None
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = rows
+        return rows
+
+    def get_keyset_ordering(self, queryset, view):
+        """
+        Returns the ordering of the pages, e.g. `("-created_time", "-id")`: the ordering of `queryset`
+        when it ends with the primary key, otherwise the `keyset_ordering` of the view.
+        """
+        ordering = queryset.query.order_by
+        if (ordering and all(isinstance(field, str) for field in ordering)
+                and ordering[-1].lstrip("-") in ("id", "pk")):
+            return tuple(ordering)
+        return getattr(view, "keyset_ordering", self.keyset_ordering)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_position_filter(self, position, reverse):
+        """
+        Returns the filter selecting the rows after (or before, when `reverse`) `position`
+        in the keyset ordering. The first column is also bounded on its own so that the
+        database can seek in the composite index instead of scanning it.
+        """
+        # Rows after a position have greater values in the ascending columns, lower ones in the
+        # descending columns, and the other way around before it.
+        operators = ["lt" if ordering.startswith("-") != reverse else "gt" for ordering in self.ordering]
+        after = Q()
+        for index, (field, operator) in enumerate(zip(self.fields, operators)):
+            equal = {previous: position[previous] for previous in self.fields[:index]}
+            after |= Q(**equal, **{f"{field}__{operator}": position[field]})
+        if len(self.fields) == 1:
+            return after
+        return Q(**{f"{self.fields[0]}__{operators[0]}e": position[self.fields[0]]}) & after
+
+    def encode_cursor(self, item, reverse):
+        """
+        Returns the URL of the page following `item` in the given direction.
+        """
+        values = []
+        for field in self.fields:
+            value = item[field] if isinstance(item, dict) else getattr(item, field)
+            if isinstance(value, datetime.datetime):
+                value = value.isoformat()
+            elif isinstance(value, uuid.UUID):
+                value = str(value)
+            values.append(value)
+        payload = json.dumps({"r": reverse, "v": values}, separators=(",", ":"))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+
+        url = remove_query_param(self.request.build_absolute_uri(), self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """
+        Returns the direction and the position (a dictionary of ordering values) of the cursor,
+        or `(False, None)` for the first page.
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return False, None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            reverse = bool(payload["r"])
+            values = payload["v"]
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, dict(zip(self.fields, values))
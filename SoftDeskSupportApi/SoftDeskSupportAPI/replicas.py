@@ -0,0 +1,169 @@
+"""
+Routing of the read-only requests to the read replicas listed by the `DATABASE_REPLICAS` setting.
+
+`ReplicaRoutingMiddleware` selects a replica for GET and HEAD requests handled by a view whose class
+sets `read_from_replica`, and `ReplicaRouter` sends the reads of these requests to it. Everything
+else, writes included, uses the primary (`default`) database.
+
+Replicas lag behind the primary. After a successful write, the client is pinned to the primary for
+`REPLICA_PIN_SECONDS`, so that it reads its own writes: through a cookie, and through the cache
+for the token of the request (API clients usually ignore cookies).
+
+The middleware runs synchronously under WSGI and asynchronously under ASGI, so that it does not
+move the async views to a thread. The replica is kept in a context variable, which the threads
+running the sync views and the async ORM inherit.
+"""
+import hashlib
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+# Alias of the replica used for the reads of the current request, None for the primary.
+_read_alias = ContextVar("read_alias", default=None)
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def get_pin_seconds():
+    return getattr(settings, "REPLICA_PIN_SECONDS", 5)
+
+
+def get_pin_cookie():
+    return getattr(settings, "REPLICA_PIN_COOKIE", "softdesk_primary")
+
+
+def reading_from_replica():
+    return _read_alias.get() is not None
+
+
+def replica_cache_timeout(timeout):
+    """
+    Caps `timeout` to the pin window when the data to cache was read from a replica, so that
+    the replication lag cannot outlive the pin in the caches.
+    """
+    if reading_from_replica():
+        return min(timeout, get_pin_seconds())
+    return timeout
+
+
+class ReplicaRouter:
+    """
+    Reads go to the replica selected for the request, if any. Writes always go to the primary,
+    even for objects read from a replica, and the replicas are never migrated: they are copies
+    of the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in get_replicas():
+            return False
+        return None
+
+
+def _pin_key(request):
+    authorization = request.META.get("HTTP_AUTHORIZATION")
+    if not authorization:
+        return None
+    return f"softdesk:replica-pin:{hashlib.sha256(authorization.encode()).hexdigest()}"
+
+
+def is_pinned(request):
+    """
+    Checks whether the client of `request` wrote recently and must read from the primary.
+    """
+    if get_pin_cookie() in request.COOKIES:
+        return True
+    key = _pin_key(request)
+    return key is not None and cache.get(key) is not None
+
+
+def pin(request, response):
+    """
+    Pins the client of `request` to the primary for `REPLICA_PIN_SECONDS`.
+    """
+    seconds = get_pin_seconds()
+    response.set_cookie(get_pin_cookie(), "1", max_age=seconds, httponly=True, samesite="Lax")
+    key = _pin_key(request)
+    if key is not None:
+        cache.set(key, True, timeout=seconds)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Selects a replica for the safe requests of the views reading from replicas, unless the client
+    is pinned to the primary, and pins the clients making successful writes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+            # The view middleware is called in the mode of the handler: select without a thread.
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not get_replicas():
+            return self.get_response(request)
+
+        # The replica selected in `process_view` only lasts for this request.
+        token = _read_alias.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        self.pin_writer(request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not get_replicas():
+            return await self.get_response(request)
+
+        token = _read_alias.set(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        self.pin_writer(request, response)
+        return response
+
+    def pin_writer(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin(request, response)
+
+    def select_replica(self, request, view_func):
+        replicas = get_replicas()
+        view_class = getattr(view_func, "cls", None)
+        if (replicas and request.method in SAFE_METHODS and getattr(view_class, "read_from_replica", False)
+                and not is_pinned(request)):
+            _read_alias.set(random.choice(replicas))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.select_replica(request, view_func)
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        # Awaited in the context of `__acall__`, which resets the replica at the end of the request.
+        self.select_replica(request, view_func)
+        return None
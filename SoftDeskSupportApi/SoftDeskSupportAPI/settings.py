@@ -10,9 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
+import django
+from django.core.exceptions import ImproperlyConfigured
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,11 +50,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "SoftDeskSupportAPI.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "SoftDeskSupportAPI.replicas.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -79,13 +85,98 @@ WSGI_APPLICATION = "SoftDeskSupportAPI.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
+# The database profile is selected with the SOFTDESK_DB_PROFILE environment variable:
+# - "sqlite" (default): plain SQLite file, one connection per request, for development.
+# - "sqlite-wal": SQLite tuned for concurrent requests. WAL lets readers run during a write, and
+#   writers wait for the lock for up to `busy_timeout` milliseconds instead of failing with
+#   "database is locked". Connections are kept open between requests.
+# - "postgres": PostgreSQL with persistent connections, configured by the SOFTDESK_DB_* variables
+#   (requires the psycopg package).
+# `PRAGMAS` are applied to each new SQLite connection by `SoftDeskSupportAPI.database`.
+
+SOFTDESK_DB_PROFILE = os.environ.get("SOFTDESK_DB_PROFILE", "sqlite")
+
+SQLITE_PATH = os.environ.get("SOFTDESK_SQLITE_PATH", BASE_DIR / "db.sqlite3")
+
+DATABASE_PROFILES = {
+    "sqlite": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "NAME": SQLITE_PATH,
+    },
+    "sqlite-wal": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": SQLITE_PATH,
+        "OPTIONS": {
+            # Seconds Python's sqlite3 waits for a lock, kept in line with busy_timeout.
+            "timeout": 20,
+            # The write requests run in a transaction: take the write lock when it starts, see
+            # `SoftDeskSupportAPI.database.apply_transaction_mode`.
+            "transaction_mode": "IMMEDIATE",
+        },
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        "PRAGMAS": {
+            "journal_mode": "WAL",
+            # Safe with WAL: a power loss can only lose the last transactions, never corrupt the file.
+            "synchronous": "NORMAL",
+            "busy_timeout": 20000,
+            "mmap_size": 256 * 1024 * 1024,
+            # Negative values are in KiB: 64 MiB of page cache per connection.
+            "cache_size": -64 * 1024,
+            "temp_store": "MEMORY",
+        },
+    },
+    "postgres": {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ.get("SOFTDESK_DB_NAME", "softdesk"),
+        "USER": os.environ.get("SOFTDESK_DB_USER", "softdesk"),
+        "PASSWORD": os.environ.get("SOFTDESK_DB_PASSWORD", ""),
+        "HOST": os.environ.get("SOFTDESK_DB_HOST", "localhost"),
+        "PORT": os.environ.get("SOFTDESK_DB_PORT", "5432"),
+        "OPTIONS": {"connect_timeout": 5},
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+    },
 }
 
+if django.VERSION < (5, 1):
+    # Django 5.0 has no `transaction_mode` option, which sqlite3 would reject: the mode is applied
+    # by `SoftDeskSupportAPI.database.apply_transaction_mode` instead.
+    for profile in DATABASE_PROFILES.values():
+        transaction_mode = profile.get("OPTIONS", {}).pop("transaction_mode", None)
+        if transaction_mode:
+            profile["TRANSACTION_MODE"] = transaction_mode
+
+if SOFTDESK_DB_PROFILE not in DATABASE_PROFILES:
+    raise ImproperlyConfigured(
+        f"Unknown SOFTDESK_DB_PROFILE {SOFTDESK_DB_PROFILE!r}, expected one of {', '.join(DATABASE_PROFILES)}.")
+
+DATABASES = {
+    "default": DATABASE_PROFILES[SOFTDESK_DB_PROFILE],
+}
+
+# Read replicas, listed in SOFTDESK_DB_REPLICAS separated by commas: paths of SQLite files with the
+# SQLite profiles, hosts with the PostgreSQL profile. The replicas must be kept in sync with the
+# primary by replication, they are never migrated. Safe requests of the views setting
+# `read_from_replica` read from a random replica, see `SoftDeskSupportAPI.replicas`.
+DATABASE_REPLICAS = []
+for index, location in enumerate(filter(None, os.environ.get("SOFTDESK_DB_REPLICAS", "").split(","))):
+    alias = f"replica{index + 1}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST" if SOFTDESK_DB_PROFILE == "postgres" else "NAME": location.strip(),
+        # The test databases of the replicas are the test database of the primary.
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["SoftDeskSupportAPI.replicas.ReplicaRouter"]
+
+# Seconds a client reads from the primary after a write, longer than the replication lag. The pin is
+# kept in a cookie and in the cache for the token of the client: use a cache shared by the workers.
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_COOKIE = "softdesk_primary"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -138,7 +229,7 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 5,
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user_contrib_app.authentication.CachedJWTAuthentication",
     ),
 }
 
@@ -146,3 +237,63 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=5),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# The local memory cache is per process: use a shared backend (Redis, Memcached) in production
+# so that invalidations made by one worker are seen by the others.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Seconds a (user, project) membership stays in the cache. Contributor and project changes
+# invalidate the entries immediately, this only bounds how long unused entries are kept.
+MEMBERSHIP_CACHE_TIMEOUT = 300
+
+# Seconds the data of the issue, comment, contributor and project detail responses stays in the cache,
+# 0 to disable it. Writes invalidate the responses of their project immediately, see
+# `project_management_app.response_cache`.
+RESPONSE_CACHE_TIMEOUT = 60
+
+# Client addresses or networks allowed to read `/metrics`, listed in SOFTDESK_METRICS_ALLOWED_IPS separated
+# by commas. Behind a proxy on the same host every client is 127.0.0.1: also set SOFTDESK_METRICS_TOKEN,
+# then `/metrics` requires the `Authorization: Bearer <token>` header too.
+METRICS_ALLOWED_IPS = list(filter(None, os.environ.get("SOFTDESK_METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")))
+METRICS_TOKEN = os.environ.get("SOFTDESK_METRICS_TOKEN", "")
+
+# Serve `list` and `retrieve` of projects, issues and comments with the fast serializers,
+# which build the same JSON from `.values()` rows without instantiating models.
+FAST_SERIALIZATION = False
+
+# Bounded per-process cache of the users resolved from JWT tokens: maximum number of users and
+# seconds an entry is kept. User changes invalidate the entries of the process handling them,
+# the timeout bounds how long other processes can use an outdated user.
+USER_CACHE_MAX_SIZE = 10000
+USER_CACHE_TIMEOUT = 60
+
+# Password hashes are computed by a pool of PASSWORD_HASHING_WORKERS threads, with at most
+# PASSWORD_HASHING_QUEUE_SIZE more waiting: further sign-ups get a 503 response.
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_QUEUE_SIZE = 16
+
+# Backend of the issue and comment search. The FTS5 index is only created by the migrations on SQLite:
+# the other databases search without an index.
+if SOFTDESK_DB_PROFILE in ("sqlite", "sqlite-wal"):
+    SEARCH_BACKEND = "project_management_app.search.SQLiteFTS5SearchBackend"
+else:
+    SEARCH_BACKEND = "project_management_app.search.SimpleSearchBackend"
+
+# Seconds an entry of the change log waits before the sync endpoint returns it, longer than the write
+# transactions: on PostgreSQL, an entry can commit after the entries with higher IDs, see
+# `project_management_app.changelog`. SQLite commits the entries in the order of their IDs.
+if SOFTDESK_DB_PROFILE in ("sqlite", "sqlite-wal"):
+    CHANGE_LOG_SAFETY_LAG = 0
+else:
+    CHANGE_LOG_SAFETY_LAG = 5
+
+# Finished issues not updated for ISSUE_ARCHIVE_AFTER_DAYS days are moved to the archive tables,
+# with their comments, by the `archive_issues` command.
+ISSUE_ARCHIVE_AFTER_DAYS = 90
@@ -0,0 +1,117 @@
+"""
+Sparse fieldsets: `?fields=id,title` returns only the listed fields of each object, `?omit=description`
+all the fields but the listed ones.
+
+`SparseFieldsMixin` removes the other fields from the serializer of `list` and `retrieve`, and tells
+the viewset which model attributes are no longer read, so that their columns are left out of the
+query: a list of issue titles does not read the descriptions anymore. The other actions validate
+their input with all the fields and ignore the parameters.
+"""
+import functools
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import ListSerializer
+
+
+def parse_field_selection(query_params, available):
+    """
+    Returns the names of `available` selected by the `fields` or `omit` query parameter, in the
+    order of `available`, or None when neither is given.
+    """
+    fields = query_params.get("fields")
+    omit = query_params.get("omit")
+    if fields is None and omit is None:
+        return None
+    if fields is not None and omit is not None:
+        raise ValidationError({"fields": ["Cannot be used with omit."]})
+
+    param = "fields" if fields is not None else "omit"
+    names = {name.strip() for name in query_params[param].split(",") if name.strip()}
+    unknown = sorted(names.difference(available))
+    if unknown:
+        raise ValidationError({param: [f"Unknown fields: {', '.join(unknown)}. "
+                                       f"Choose among: {', '.join(available)}."]})
+    if param == "fields":
+        if not names:
+            raise ValidationError({"fields": ["List at least one field."]})
+        return tuple(name for name in available if name in names)
+    return tuple(name for name in available if name not in names)
+
+
+@functools.cache
+def get_field_sources(serializer_class):
+    """
+    Returns the readable fields of `serializer_class` mapped to the model attribute they read,
+    None for the fields reading the whole object (`source="*"`).
+    """
+    return {name: None if field.source == "*" else field.source.split(".")[0]
+            for name, field in serializer_class().fields.items() if not field.write_only}
+
+
+class SparseFieldsMixin:
+    """
+    Viewset mixin applying `?fields=` and `?omit=` to the responses of `list` and `retrieve`.
+    """
+    sparse_actions = ("list", "retrieve")
+    # Model attributes read by the fields whose source is the whole object, e.g. counters.
+    field_attributes = {}
+
+    def get_field_names(self):
+        """
+        Returns the names of the fields the current action can return.
+        """
+        return tuple(get_field_sources(self.get_serializer_class()))
+
+    def get_requested_fields(self):
+        """
+        Returns the names of the fields to return, or None for all of them.
+        """
+        if self.action not in self.sparse_actions:
+            return None
+        if not hasattr(self, "_requested_fields"):
+            self._requested_fields = parse_field_selection(self.request.query_params, self.get_field_names())
+        return self._requested_fields
+
+    def get_unread_attributes(self):
+        """
+        Returns the model attributes only read by the fields left out of the response, e.g.
+        `description` and `assignee` for a list of issue titles.
+        """
+        requested = self.get_requested_fields()
+        if requested is None:
+            return set()
+        read = set()
+        unread = set()
+        for name, source in get_field_sources(self.get_serializer_class()).items():
+            attributes = self.field_attributes.get(name, [source] if source else [])
+            (read if name in requested else unread).update(attributes)
+        return unread - read
+
+    def defer_unread(self, queryset):
+        """
+        Defers the columns of `queryset` only read by the fields left out of the response.
+        """
+        deferred = []
+        for attribute in self.get_unread_attributes():
+            field = queryset.model._meta.get_field(attribute)
+            if field.concrete and not field.primary_key and not field.is_relation:
+                deferred.append(attribute)
+        return queryset.defer(*deferred) if deferred else queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_requested_fields()
+        return context
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Returns the serializer without the fields left out of the response.
+        """
+        serializer = super().get_serializer(*args, **kwargs)
+        requested = self.get_requested_fields()
+        if requested is not None:
+            fields = serializer.child.fields if isinstance(serializer, ListSerializer) else serializer.fields
+            for name in list(fields):
+                if name not in requested:
+                    del fields[name]
+        return serializer
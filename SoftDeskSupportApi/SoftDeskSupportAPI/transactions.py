@@ -0,0 +1,26 @@
+"""
+Write requests in a single transaction.
+
+The signals of a save (counters, change log) write their own rows: `AtomicWritesMixin` runs each
+unsafe request of a view in one transaction, so that these rows are committed with the change
+they describe, or not at all.
+"""
+from django.db import transaction
+from rest_framework.permissions import SAFE_METHODS
+
+
+class AtomicWritesMixin:
+    """
+    View mixin running the unsafe requests in a transaction, rolled back when the response is an error.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        # Within a transaction (`ATOMIC_REQUESTS`, tests), the writes are already committed together.
+        if request.method in SAFE_METHODS or transaction.get_connection().in_atomic_block:
+            return super().dispatch(request, *args, **kwargs)
+        with transaction.atomic():
+            response = super().dispatch(request, *args, **kwargs)
+            # The exceptions are turned into error responses by the view: roll back their writes too.
+            if response.status_code >= 400:
+                transaction.set_rollback(True)
+        return response
@@ -27,6 +27,10 @@ from user_contrib_app.views import ContributorViewset
 from project_management_app.views import ProjectViewSet
 from project_management_app.views import IssueViewSet
 from project_management_app.views import CommentViewSet
+from project_management_app.views import SearchView
+from project_management_app.views import DeletionJobView
+from project_management_app import async_views
+from SoftDeskSupportAPI.metrics import metrics
 
 router = routers.SimpleRouter()
 
@@ -39,16 +43,25 @@ urlpatterns = [
     path("api/token/", TokenObtainPairView.as_view()),
     path("api/token/refresh/", TokenRefreshView.as_view()),
     path("api/", include(router.urls)),
+    path("api/search/", SearchView.as_view(), name="search"),
+    path("api/deletions/<uuid:pk>/", DeletionJobView.as_view(), name="deletion-detail"),
+    path("metrics", metrics, name="metrics"),
 
     path("api/projects/<int:project_pk>/issues/",
          IssueViewSet.as_view({"get": "list", "post": "create"}),
          name="issue-list"),
+    path("api/projects/<int:project_pk>/issues/bulk/",
+         IssueViewSet.as_view({"post": "bulk_create", "patch": "bulk_update"}),
+         name="issue-bulk"),
     path("api/projects/<int:project_pk>/issues/<int:pk>/",
          IssueViewSet.as_view({"get": "retrieve", "put": "update", "delete": "destroy", "patch": "partial_update"}),
          name="issue-detail"),
 
     path("api/projects/<int:project_pk>/contributors/",
          ContributorViewset.as_view({"get": "list", "post": "create", "delete": "destroy"})),
+    path("api/projects/<int:project_pk>/contributors/bulk/",
+         ContributorViewset.as_view({"post": "bulk_create", "delete": "bulk_destroy"}),
+         name="contributor-bulk"),
 
     path("api/projects/<int:project_pk>/issues/<int:issue_pk>/comments/",
          CommentViewSet.as_view({"get": "list", "post": "create"}),
@@ -56,5 +69,16 @@ urlpatterns = [
 
     path("api/projects/<int:project_pk>/issues/<int:issue_pk>/comments/<uuid:pk>/",
          CommentViewSet.as_view({"get": "retrieve", "put": "update", "delete": "destroy", "patch": "partial_update"}),
-         name="comment-detail")
+         name="comment-detail"),
+
+    # Async implementations of the read endpoints, for the ASGI entry point.
+    path("api/async/projects/", async_views.project_list, name="async-project-list"),
+    path("api/async/projects/<int:pk>/", async_views.project_detail, name="async-project-detail"),
+    path("api/async/projects/<int:project_pk>/issues/", async_views.issue_list, name="async-issue-list"),
+    path("api/async/projects/<int:project_pk>/issues/<int:pk>/", async_views.issue_detail,
+         name="async-issue-detail"),
+    path("api/async/projects/<int:project_pk>/issues/<int:issue_pk>/comments/", async_views.comment_list,
+         name="async-comment-list"),
+    path("api/async/projects/<int:project_pk>/issues/<int:issue_pk>/comments/<uuid:pk>/",
+         async_views.comment_detail, name="async-comment-detail"),
 ]
@@ -8,6 +8,7 @@ from project_management_app.models import Comment
 class ProjectAdmin(admin.ModelAdmin):
     # Columns to be displayed in the project listing.
     list_display = ('id', 'name', 'type', 'author', 'created_time')
+    list_select_related = ('author',)
 
 
 @admin.register(Issue)
@@ -20,3 +21,5 @@ class IssueAdmin(admin.ModelAdmin):
 class CommentAdmin(admin.ModelAdmin):
     # Columns to be displayed in the project listing.
     list_display = ('id', 'description', 'author', 'issue', 'created_time')
+    # Load the author and the issue with the comments (used by `Comment.__str__`).
+    list_select_related = ('author', 'issue')
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ProjectManagementAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "project_management_app"
+
+    def ready(self):
+        # Connect the signal receivers keeping the caches in sync with the database.
+        from project_management_app import signals  # noqa: F401
+        # Connect the receiver applying the SQLite pragmas of the database profile.
+        from SoftDeskSupportAPI import database  # noqa: F401
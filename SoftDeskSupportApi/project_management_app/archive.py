@@ -0,0 +1,87 @@
+"""
+Cold archive of the finished issues.
+
+Finished issues are rarely read and never changed again. `archive_issues` moves those not updated
+for `ISSUE_ARCHIVE_AFTER_DAYS` days, with their comments, to the `ArchivedIssue` and `ArchivedComment`
+tables, keeping their IDs, so that the `Issue` and `Comment` tables and their indexes only hold
+the working set. The issue and comment endpoints read the archive instead with `?archived=true`.
+
+Archived issues still count in the issue counters of their project, but they are no longer
+in the search index. The change log records them as "archived".
+"""
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from project_management_app.models import Issue
+from project_management_app.models import Comment
+from project_management_app.models import ArchivedIssue
+from project_management_app.models import ArchivedComment
+from project_management_app.models import issue_status_counter
+from project_management_app.models import issue_priority_counter
+from project_management_app.signals import deferred_project_touches
+
+ISSUE_COLUMNS = [field.attname for field in Issue._meta.concrete_fields]
+COMMENT_COLUMNS = [field.attname for field in Comment._meta.concrete_fields]
+
+
+def get_archive_after_days():
+    return getattr(settings, "ISSUE_ARCHIVE_AFTER_DAYS", 90)
+
+
+def wants_archive(query_params):
+    """
+    Reads the `archived` query parameter: true to read the archived issues and comments.
+    """
+    value = query_params.get("archived", "false").lower()
+    if value not in ("true", "false"):
+        raise ValidationError({"archived": ["Must be true or false."]})
+    return value == "true"
+
+
+def archive_batch(cutoff, batch_size):
+    """
+    Moves up to `batch_size` finished issues last updated before `cutoff`, with their comments,
+    to the archive tables in one transaction. Returns the number of issues and of comments moved.
+    """
+    with transaction.atomic():
+        issues = list(Issue.objects.filter(status="finished", updated_time__lt=cutoff)
+                      .order_by("pk").values(*ISSUE_COLUMNS)[:batch_size])
+        if not issues:
+            return 0, 0
+        issue_pks = [issue["id"] for issue in issues]
+        comments = Comment.objects.filter(issue_id__in=issue_pks).values(*COMMENT_COLUMNS)
+        ArchivedIssue.objects.bulk_create([ArchivedIssue(**issue) for issue in issues])
+        archived_comments = ArchivedComment.objects.bulk_create(
+            [ArchivedComment(**comment) for comment in comments.iterator()], batch_size=batch_size)
+
+        # The search index and the projects are updated once for the whole batch.
+        with deferred_project_touches() as changes:
+            changes.deleted_action = "archived"
+            Comment.objects.filter(issue_id__in=issue_pks).delete()
+            Issue.objects.filter(pk__in=issue_pks).delete()
+            # The archived issues still count in the counters of their project.
+            for issue in issues:
+                changes.change_project(issue["project_id"], Counter([issue_status_counter(issue["status"]),
+                                                                     issue_priority_counter(issue["priority"])]))
+    return len(issues), len(archived_comments)
+
+
+def archive_issues(days=None, batch_size=500):
+    """
+    Archives all the finished issues not updated for `days` days, by batches.
+    Returns the number of issues and of comments archived.
+    """
+    days = get_archive_after_days() if days is None else days
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    issues = comments = 0
+    while True:
+        batch_issues, batch_comments = archive_batch(cutoff, batch_size)
+        if not batch_issues:
+            return issues, comments
+        issues += batch_issues
+        comments += batch_comments
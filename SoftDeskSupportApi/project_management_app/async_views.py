@@ -0,0 +1,215 @@
+"""
+Async implementations of the read endpoints of projects, issues and comments, served under `api/async/`.
+
+Under ASGI the DRF viewsets are synchronous and each request runs in a thread through `sync_to_async`.
+These views run on the event loop: the token is checked without a thread, the database is queried
+with the async ORM and the responses are built by the fast serializers, byte-identical to the
+responses of the viewsets.
+"""
+import functools
+
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.exceptions import NotAuthenticated
+from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from SoftDeskSupportAPI.sparse_fields import parse_field_selection
+from project_management_app.archive import wants_archive
+from project_management_app.filters import IssueFilterBackend
+from project_management_app.filters import IssueOrderingFilter
+from project_management_app.membership import aget_project_membership
+from project_management_app.membership import aget_issue_membership
+from project_management_app.models import Project
+from project_management_app.models import Issue
+from project_management_app.models import Comment
+from project_management_app.models import ArchivedIssue
+from project_management_app.models import ArchivedComment
+from project_management_app.fast_serializers import ProjectListFastSerializer
+from project_management_app.fast_serializers import ProjectDetailFastSerializer
+from project_management_app.fast_serializers import IssueListFastSerializer
+from project_management_app.fast_serializers import IssueDetailFastSerializer
+from project_management_app.fast_serializers import CommentListFastSerializer
+from project_management_app.fast_serializers import CommentDetailFastSerializer
+from user_contrib_app.authentication import check_user
+from user_contrib_app.authentication import user_cache
+from user_contrib_app.models import CustomUser
+
+
+async def authenticate(request):
+    """
+    Returns the user of the JWT access token of the request, like `CachedJWTAuthentication`,
+    loading the user with the async ORM on a cache miss.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        raise NotAuthenticated()
+    token = authentication.get_validated_token(raw_token)
+    try:
+        user_id = token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken("Token contained no recognizable user identification")
+
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await CustomUser.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).afirst()
+        if user is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        check_user(token, user)
+        user_cache.set(user_id, user)
+    else:
+        check_user(token, user)
+    return user
+
+
+def render(data, status=200, headers=None):
+    return HttpResponse(JSONRenderer().render(data), status=status, headers=headers,
+                        content_type="application/json")
+
+
+def async_api_view(view):
+    """
+    Turns an async function returning data into a read-only authenticated API view.
+    Errors are rendered like DRF renders them.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            if request.method != "GET":
+                raise MethodNotAllowed(request.method)
+            request.user = await authenticate(request)
+            return render(await view(request, *args, **kwargs))
+        except APIException as exc:
+            if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                exc.auth_header = JWTAuthentication().authenticate_header(request)
+            response = exception_handler(exc, {})
+            headers = {name: response[name] for name in ("WWW-Authenticate", "Allow", "Retry-After")
+                       if response.has_header(name)}
+            return render(response.data, status=response.status_code, headers=headers)
+    return wrapper
+
+
+async def paginate(request, rows, serializer):
+    """
+    Returns the limit/offset page of `rows` serialized, in the format of `LimitOffsetPagination`.
+    """
+    paginator = LimitOffsetPagination()
+    paginator.request = Request(request)
+    paginator.limit = paginator.get_limit(paginator.request)
+    if paginator.limit is None:
+        return await serializer.aserialize([row async for row in rows])
+
+    paginator.offset = paginator.get_offset(paginator.request)
+    paginator.count = await rows.acount()
+    page = [row async for row in rows[paginator.offset:paginator.offset + paginator.limit]]
+    return {
+        "count": paginator.count,
+        "next": paginator.get_next_link(),
+        "previous": paginator.get_previous_link(),
+        "results": await serializer.aserialize(page),
+    }
+
+
+async def get_project_access(request, project_pk):
+    """
+    Checks that the user is the author or a contributor of the project, like `HasProjectAccessPermission`.
+    """
+    membership = await aget_project_membership(request.user, project_pk)
+    if not membership.exists:
+        raise NotFound("Project not found")
+    if not membership.has_access:
+        raise PermissionDenied("Only contributors of the project can access its resources.")
+
+
+async def get_issue_access(request, issue_pk, archived=False):
+    """
+    Checks that the user contributes to the project of the issue, like `IsContributorToProjectOfIssue`.
+    """
+    issue, membership = await aget_issue_membership(request.user, issue_pk, archived)
+    if issue is None:
+        raise NotFound("The requested resource is not available or does not exist")
+    if not membership.is_contributor:
+        raise PermissionDenied("Only the contributors of the project can access its resources.")
+
+
+def get_serializer(serializer_class, request):
+    """
+    Returns a `serializer_class` returning the fields selected by `?fields=` or `?omit=`, like the viewsets.
+    """
+    fields = parse_field_selection(request.GET, serializer_class.field_names)
+    return serializer_class(context={"request": request, "fields": fields})
+
+
+async def get_row(serializer, queryset):
+    row = await serializer.get_rows(queryset).afirst()
+    if row is None:
+        raise NotFound(f"No {queryset.model._meta.object_name} matches the given query.")
+    return (await serializer.aserialize([row]))[0]
+
+
+@async_api_view
+async def project_list(request):
+    serializer = get_serializer(ProjectListFastSerializer, request)
+    queryset = Project.objects.visible_to(request.user).order_by("id")
+    return await paginate(request, serializer.get_rows(queryset), serializer)
+
+
+@async_api_view
+async def project_detail(request, pk):
+    membership = await aget_project_membership(request.user, pk)
+    if not membership.exists:
+        raise NotFound("No Project matches the given query.")
+    if not membership.has_access:
+        raise PermissionDenied("You need to be a contributor or the author to access this project.")
+    return await get_row(get_serializer(ProjectDetailFastSerializer, request), Project.objects.filter(pk=pk))
+
+
+@async_api_view
+async def issue_list(request, project_pk):
+    await get_project_access(request, project_pk)
+    model = ArchivedIssue if wants_archive(request.GET) else Issue
+    queryset = model.objects.filter(project_id=project_pk).order_by("created_time", "id")
+    # The filters only build the queryset, they run no query.
+    drf_request = Request(request)
+    queryset = IssueFilterBackend().filter_queryset(drf_request, queryset, None)
+    queryset = IssueOrderingFilter().filter_queryset(drf_request, queryset, None)
+    serializer = get_serializer(IssueListFastSerializer, request)
+    return await paginate(request, serializer.get_rows(queryset), serializer)
+
+
+@async_api_view
+async def issue_detail(request, project_pk, pk):
+    await get_project_access(request, project_pk)
+    model = ArchivedIssue if wants_archive(request.GET) else Issue
+    serializer = get_serializer(IssueDetailFastSerializer, request)
+    return await get_row(serializer, model.objects.filter(project_id=project_pk, pk=pk))
+
+
+@async_api_view
+async def comment_list(request, project_pk, issue_pk):
+    archived = wants_archive(request.GET)
+    await get_issue_access(request, issue_pk, archived)
+    serializer = get_serializer(CommentListFastSerializer, request)
+    model = ArchivedComment if archived else Comment
+    queryset = model.objects.filter(issue=issue_pk).order_by("created_time", "id")
+    return await paginate(request, serializer.get_rows(queryset), serializer)
+
+
+@async_api_view
+async def comment_detail(request, project_pk, issue_pk, pk):
+    archived = wants_archive(request.GET)
+    await get_issue_access(request, issue_pk, archived)
+    model = ArchivedComment if archived else Comment
+    serializer = get_serializer(CommentDetailFastSerializer, request)
+    return await get_row(serializer, model.objects.filter(issue=issue_pk, pk=pk))
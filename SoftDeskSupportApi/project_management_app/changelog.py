@@ -0,0 +1,115 @@
+"""
+Incremental sync of a project through its change log.
+
+Every creation, update and deletion of a project, its issues, comments and contributors adds a
+`ChangeLogEntry` in the same transaction: the signals of `project_management_app.signals` log the
+changes made through the ORM, and the bulk endpoints log theirs with `log_changes`.
+
+`GET /api/projects/<id>/changes/?since=<cursor>` returns the objects changed after the cursor,
+with their current representation, and a tombstone for each deleted (or archived) one, in the order
+of their last change. A poll then costs as much as the number of changes, not the size of the
+project. Without `since`, it only returns the current cursor, to poll from after a full load.
+
+The cursor is the auto-incremented ID of the entries. SQLite runs one write transaction at a time, so
+the IDs are committed in order. PostgreSQL hands out the IDs at insert time: an entry can commit after
+one with a higher ID, which a poller may already have passed. The entries younger than
+`CHANGE_LOG_SAFETY_LAG` seconds, longer than any write transaction, are left for a later poll.
+"""
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.utils.urls import replace_query_param
+
+from project_management_app.models import Project
+from project_management_app.models import Issue
+from project_management_app.models import Comment
+from project_management_app.models import ChangeLogEntry
+from project_management_app.serializers import ProjectListSerializer
+from project_management_app.serializers import IssueListSerializer
+from project_management_app.serializers import CommentChangeSerializer
+from user_contrib_app.models import Contributor
+from user_contrib_app.serializers import ContributorSerializer
+
+# Representation of the objects of each model of the change log.
+CHANGE_SERIALIZERS = {
+    "project": ProjectListSerializer,
+    "issue": IssueListSerializer,
+    "comment": CommentChangeSerializer,
+    "contributor": ContributorSerializer,
+}
+
+
+def log_changes(project_pk, model, object_ids, action):
+    """
+    Adds an entry per object to the change log of the project, for the changes that send no signals
+    (`bulk_create`, `bulk_update`).
+    """
+    ChangeLogEntry.objects.bulk_create(
+        [ChangeLogEntry(project_id=project_pk, model=model, object_id=str(object_id), action=action)
+         for object_id in object_ids])
+
+
+def get_current_objects(project, ids):
+    """
+    Returns, for each model, the objects of the project among `ids` (object IDs per model) that
+    still exist, by their change log ID. Each model is loaded with at most one query.
+    """
+    querysets = {
+        "project": lambda pks: Project.objects.filter(pk=project.pk),
+        "issue": lambda pks: Issue.objects.filter(project=project, pk__in=pks).select_related("assignee"),
+        "comment": lambda pks: Comment.objects.filter(issue__project=project, pk__in=pks),
+        "contributor": lambda pks: (Contributor.objects.filter(project=project, user_id__in=pks)
+                                    .select_related("user")),
+    }
+    objects = {}
+    for model, object_ids in ids.items():
+        key = "user_id" if model == "contributor" else "pk"
+        objects[model] = {str(getattr(instance, key)): instance for instance in querysets[model](object_ids)}
+    return objects
+
+
+def get_changes(project, since, limit, request, context):
+    """
+    Returns the changes of the project after the `since` cursor, at most `limit` entries of the log
+    at a time, with the cursor to poll from next and the link to the next page if there are more.
+    """
+    changes = ChangeLogEntry.objects.filter(project=project)
+    if settings.CHANGE_LOG_SAFETY_LAG:
+        changes = changes.filter(
+            created_time__lte=timezone.now() - datetime.timedelta(seconds=settings.CHANGE_LOG_SAFETY_LAG))
+    if since is None:
+        cursor = changes.order_by("-id").values_list("id", flat=True).first()
+        return {"cursor": cursor or 0, "next": None, "changes": []}
+
+    entries = list(changes.filter(id__gt=since).order_by("id")
+                   .values_list("id", "model", "object_id", "action")[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    cursor = entries[-1][0] if entries else since
+
+    # Only the last change of each object counts, in the order of the last changes.
+    latest = {}
+    for entry_id, model, object_id, action in entries:
+        latest.pop((model, object_id), None)
+        latest[(model, object_id)] = action
+    ids = defaultdict(list)
+    for (model, object_id), action in latest.items():
+        if action in ("created", "updated"):
+            ids[model].append(object_id)
+    objects = get_current_objects(project, ids)
+
+    items = []
+    for (model, object_id), action in latest.items():
+        item = {"model": model, "id": object_id if model == "comment" else int(object_id), "action": action}
+        instance = objects.get(model, {}).get(object_id)
+        if instance is not None:
+            item["data"] = CHANGE_SERIALIZERS[model](instance, context=context).data
+        elif action in ("created", "updated"):
+            # Deleted after this page of the log.
+            item["action"] = "deleted"
+        items.append(item)
+
+    next_link = replace_query_param(request.build_absolute_uri(), "since", cursor) if has_more else None
+    return {"cursor": cursor, "next": next_link, "changes": items}
@@ -0,0 +1,165 @@
+"""
+Deletion of users and projects in batches.
+
+`delete()` loads every project, issue, comment and contributor depending on a user or a project,
+and deletes them in one transaction, which locks the database for as long. Instead, a deletion
+request hides the entity at once (the user becomes inactive, the project `deletion_pending`) and
+records a `DeletionJob`. The `process_deletions` command then deletes the dependent rows in
+batches, each in its own transaction with the progress of the job: an interrupted job resumes
+where it stopped.
+
+Each worker claims a job before processing it, by writing its own token in the job with a conditional
+`UPDATE`, and only saves the progress of a batch while the token is still there. A job whose worker
+saved nothing for `lease` seconds is considered abandoned and can be claimed by another worker: the
+batches of the previous one are then rolled back.
+"""
+import datetime
+import uuid
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from project_management_app.membership import membership_cache
+from project_management_app.models import Project
+from project_management_app.models import Issue
+from project_management_app.models import Comment
+from project_management_app.models import ArchivedIssue
+from project_management_app.models import ArchivedComment
+from project_management_app.models import DeletionJob
+from project_management_app.models import ChangeLogEntry
+from project_management_app.response_cache import response_cache
+from project_management_app.signals import deferred_project_touches
+from user_contrib_app.authentication import user_cache
+from user_contrib_app.models import Contributor
+from user_contrib_app.models import CustomUser
+
+
+def request_project_deletion(project, requested_by):
+    """
+    Hides the project and returns the job deleting it, requested by the user `requested_by`.
+    """
+    with transaction.atomic():
+        Project.objects.filter(pk=project.pk).update(deletion_pending=True, updated_time=timezone.now())
+        job = DeletionJob.objects.create(kind="project", object_id=project.pk, requested_by=requested_by)
+    membership_cache.invalidate(project.pk)
+    response_cache.invalidate(project.pk)
+    return job
+
+
+def request_user_deletion(user):
+    """
+    Deactivates the user, hides their projects, and returns the job deleting them.
+    """
+    with transaction.atomic():
+        CustomUser.objects.filter(pk=user.pk).update(is_active=False)
+        project_pks = list(Project.objects.filter(author_id=user.pk).values_list("pk", flat=True))
+        Project.objects.filter(pk__in=project_pks).update(deletion_pending=True, updated_time=timezone.now())
+        job = DeletionJob.objects.create(kind="user", object_id=user.pk, requested_by=user)
+    # `update` sends no signals: remove the user and the memberships of their projects from the caches.
+    user_cache.invalidate(user.pk)
+    for project_pk in project_pks:
+        membership_cache.invalidate(project_pk)
+    return job
+
+
+class JobClaimLost(Exception):
+    """
+    Raised when another worker claimed the job being processed.
+    """
+
+
+def claim_next_job(lease):
+    """
+    Claims and returns the oldest pending job, or a running job abandoned for `lease` seconds, or None.
+    """
+    while True:
+        claimable = Q(status="pending") | Q(status="running",
+                                            updated_time__lt=timezone.now() - datetime.timedelta(seconds=lease))
+        job = DeletionJob.objects.filter(claimable).order_by("created_time").first()
+        if job is None:
+            return None
+        # The job stops being claimable once a worker claimed it: only one of the workers updates it.
+        if DeletionJob.objects.filter(claimable, pk=job.pk).update(
+                status="running", claim=uuid.uuid4(), updated_time=timezone.now()):
+            job.refresh_from_db()
+            return job
+
+
+def save_progress(job, **fields):
+    """
+    Saves `fields` and the progress of `job`, unless another worker claimed it meanwhile.
+    """
+    if not DeletionJob.objects.filter(pk=job.pk, claim=job.claim).update(
+            deleted=job.deleted, updated_time=timezone.now(), **fields):
+        raise JobClaimLost(f"{job} was claimed by another worker.")
+
+
+def deletion_steps(job):
+    """
+    Returns the querysets of the rows to delete for `job`, in order. Each one selects rows through
+    an index, and the rows depending on them belong to the previous steps, so that deleting a batch
+    cascades to (almost) nothing.
+    """
+    pk = job.object_id
+    if job.kind == "project":
+        return [
+            Comment.objects.filter(issue__project_id=pk),
+            Issue.objects.filter(project_id=pk),
+            ArchivedComment.objects.filter(issue__project_id=pk),
+            ArchivedIssue.objects.filter(project_id=pk),
+            Contributor.objects.filter(project_id=pk),
+            ChangeLogEntry.objects.filter(project_id=pk),
+            Project.objects.filter(pk=pk),
+        ]
+    return [
+        # The projects of the user, then their issues and comments in the other projects.
+        Comment.objects.filter(issue__project__author_id=pk),
+        Issue.objects.filter(project__author_id=pk),
+        ArchivedComment.objects.filter(issue__project__author_id=pk),
+        ArchivedIssue.objects.filter(project__author_id=pk),
+        Contributor.objects.filter(project__author_id=pk),
+        ChangeLogEntry.objects.filter(project__author_id=pk),
+        Project.objects.filter(author_id=pk),
+        Comment.objects.filter(issue__author_id=pk),
+        Comment.objects.filter(author_id=pk),
+        Issue.objects.filter(author_id=pk),
+        ArchivedComment.objects.filter(issue__author_id=pk),
+        ArchivedComment.objects.filter(author_id=pk),
+        ArchivedIssue.objects.filter(author_id=pk),
+        Contributor.objects.filter(user_id=pk),
+        CustomUser.objects.filter(pk=pk),
+    ]
+
+
+def delete_batch(job, queryset, batch_size):
+    """
+    Deletes up to `batch_size` rows of `queryset` and adds them to the progress of `job`, in one
+    transaction. Returns the number of rows selected, 0 when there are none left.
+    """
+    with transaction.atomic():
+        pks = list(queryset.order_by().values_list("pk", flat=True)[:batch_size])
+        if pks:
+            # The counters, the projects and the search index are updated once per batch.
+            with deferred_project_touches() as changes:
+                # The change log of a deleted project is deleted too: do not add tombstones to it.
+                if job.kind == "project":
+                    changes.deleted_action = None
+                deleted, counts = queryset.model.objects.filter(pk__in=pks).delete()
+            for label, count in counts.items():
+                job.deleted[label] = job.deleted.get(label, 0) + count
+            # Rolls the batch back when the job was claimed by another worker.
+            save_progress(job)
+    return len(pks)
+
+
+def process_job(job, batch_size=500):
+    """
+    Deletes all the rows of `job` and marks it as done.
+    """
+    for queryset in deletion_steps(job):
+        while delete_batch(job, queryset, batch_size):
+            pass
+    job.status = "done"
+    job.finished_time = timezone.now()
+    save_progress(job, status=job.status, finished_time=job.finished_time)
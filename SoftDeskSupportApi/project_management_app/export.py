@@ -0,0 +1,96 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from project_management_app.models import Issue
+from project_management_app.models import Comment
+
+CSV_HEADER = [
+    "issue_id", "issue_title", "issue_description", "issue_status", "issue_priority", "issue_tag",
+    "issue_assignee", "issue_author", "issue_created_time",
+    "comment_id", "comment_description", "comment_author", "comment_created_time",
+]
+
+
+class Echo:
+    """
+    File-like object returning what is written to it, so `csv.writer` can produce rows one at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_issues(project, chunk_size):
+    """
+    Yields the issues of `project` as dictionaries, each with the list of its comments.
+    Issues are read `chunk_size` at a time, and the comments of each chunk with one extra query,
+    so memory stays bounded whatever the size of the project.
+    """
+    comments = Comment.objects.select_related("author").only(
+        "id", "description", "created_time", "issue_id", "author__username").order_by("created_time", "id")
+    issues = (Issue.objects
+              .filter(project=project)
+              .select_related("assignee", "author")
+              .only("id", "title", "description", "status", "priority", "tag", "created_time",
+                    "assignee__username", "author__username")
+              .prefetch_related(Prefetch("issue_comments", queryset=comments))
+              .order_by("created_time", "id"))
+
+    for issue in issues.iterator(chunk_size=chunk_size):
+        yield {
+            "id": issue.id,
+            "title": issue.title,
+            "description": issue.description,
+            "status": issue.status,
+            "priority": issue.priority,
+            "tag": issue.tag,
+            "assignee": issue.assignee.username if issue.assignee else None,
+            "author": issue.author.username,
+            "created_time": issue.created_time,
+            "comments": [
+                {
+                    "id": comment.id,
+                    "description": comment.description,
+                    "author": comment.author.username,
+                    "created_time": comment.created_time,
+                }
+                for comment in issue.issue_comments.all()
+            ],
+        }
+
+
+def export_ndjson(issues):
+    """
+    Yields one JSON document per issue, each on its own line.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for issue in issues:
+        yield encoder.encode(issue) + "\n"
+
+
+def export_csv(issues):
+    """
+    Yields CSV lines with one row per comment, preceded by the columns of its issue.
+    Issues without comments have a single row with empty comment columns.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for issue in issues:
+        issue_columns = [
+            issue["id"], issue["title"], issue["description"], issue["status"], issue["priority"],
+            issue["tag"], issue["assignee"] or "", issue["author"], issue["created_time"].isoformat(),
+        ]
+        if not issue["comments"]:
+            yield writer.writerow(issue_columns + ["", "", "", ""])
+        for comment in issue["comments"]:
+            yield writer.writerow(issue_columns + [
+                comment["id"], comment["description"], comment["author"], comment["created_time"].isoformat(),
+            ])
+
+
+EXPORT_FORMATS = {
+    "ndjson": (export_ndjson, "application/x-ndjson"),
+    "csv": (export_csv, "text/csv"),
+}
@@ -0,0 +1,243 @@
+from collections import defaultdict
+from operator import itemgetter
+
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+
+from project_management_app.models import Project
+from project_management_app.models import Issue
+from project_management_app.models import Comment
+from project_management_app.serializers import ISSUE_COUNT_FIELDS
+from project_management_app.serializers import issue_counts_representation
+from user_contrib_app.models import CustomUser
+
+
+class RelatedValues:
+    """
+    A to-many field of a fast serializer, loaded for a whole page of rows with one query.
+    `queryset` is filtered on `<fk>__in` with the primary keys of the rows and `value` is read from each match.
+    """
+
+    def __init__(self, queryset, fk, value):
+        self.queryset = queryset
+        self.fk = fk
+        self.value = value
+
+    def load(self, pks):
+        """
+        Returns a dictionary mapping each primary key in `pks` to its list of related values.
+        """
+        grouped = defaultdict(list)
+        rows = self.queryset.filter(**{f"{self.fk}__in": pks}).values_list(self.fk, self.value)
+        for pk, value in rows:
+            grouped[pk].append(value)
+        return grouped
+
+    async def aload(self, pks):
+        grouped = defaultdict(list)
+        rows = self.queryset.filter(**{f"{self.fk}__in": pks}).values_list(self.fk, self.value)
+        async for pk, value in rows:
+            grouped[pk].append(value)
+        return grouped
+
+
+class FastSerializer:
+    """
+    Read-only serializer building responses from `.values()` rows instead of model instances.
+
+    `fields` is a sequence of `(name, lookup)` pairs in output order. A lookup can be a tuple of
+    lookups, the raw value is then the tuple of their values. `converters` maps an output name
+    to a function applied to its raw value, `related` maps an output name to a `RelatedValues`.
+    The plan is compiled once per class, or per instance for the fields listed in `context["fields"]`,
+    and the output must stay byte-identical to the DRF serializer it replaces.
+    """
+    model = None
+    fields = ()
+    converters = {}
+    related = {}
+    # Columns needed to build a model instance for object permission checks.
+    permission_fields = ("id", "author_id")
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        requested = self.context.get("fields")
+        if requested is not None:
+            # The fields selected by `?fields=` or `?omit=`: compile a plan reading only their columns.
+            self.__dict__.update(self.compile_plan([field for field in self.fields if field[0] in requested]))
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.compile()
+
+    @classmethod
+    def compile(cls):
+        """
+        Precomputes the selected columns and the row getter of the field plan.
+        """
+        if not cls.fields:
+            return
+        cls.field_names = tuple(name for name, lookup in cls.fields)
+        for attribute, value in cls.compile_plan(cls.fields).items():
+            setattr(cls, attribute, value)
+
+    @classmethod
+    def compile_plan(cls, fields):
+        """
+        Returns the selected columns, the row getter and the related fields of the plan of `fields`.
+        """
+        names = []
+        lookups = []
+        composites = {}
+        for name, lookup in fields:
+            if name in cls.related:
+                continue
+            if isinstance(lookup, tuple):
+                # Read the columns under their own names, they are grouped after the getter.
+                composites[name] = lookup
+                names.extend(lookup)
+                lookups.extend(lookup)
+            else:
+                names.append(name)
+                lookups.append(lookup)
+        order = tuple(name for name, lookup in fields)
+        return {
+            "_names": tuple(names),
+            "_composites": composites,
+            "_lookups": tuple(dict.fromkeys(lookups + list(cls.permission_fields))),
+            "_getter": itemgetter(*lookups) if lookups else None,
+            "_order": order,
+            "_related": {name: related for name, related in cls.related.items() if name in order},
+        }
+
+    def get_converters(self):
+        """
+        Returns the converters applied to the raw values; override to add request dependent ones.
+        """
+        return self.converters
+
+    def get_rows(self, queryset, *extra_lookups):
+        """
+        Turns a model queryset into a queryset of the `.values()` rows needed by this serializer,
+        plus `extra_lookups` (e.g. the columns a paginator needs).
+        """
+        lookups = dict.fromkeys(self._lookups + extra_lookups)
+        return queryset.prefetch_related(None).values(*lookups)
+
+    def get_permission_object(self, row):
+        """
+        Returns an unsaved model instance carrying the columns used by object permissions.
+        """
+        return self.model(**{field: row[field] for field in self.permission_fields})
+
+    def serialize(self, rows):
+        """
+        Returns the representation of each row, in the same order as `rows`.
+        """
+        pks = [row["id"] for row in rows] if self._related else []
+        related_values = {name: related.load(pks) for name, related in self._related.items()}
+        return self.build(rows, related_values)
+
+    async def aserialize(self, rows):
+        """
+        Async version of `serialize`, loading the related fields with the async ORM.
+        """
+        pks = [row["id"] for row in rows] if self._related else []
+        related_values = {name: await related.aload(pks) for name, related in self._related.items()}
+        return self.build(rows, related_values)
+
+    def build(self, rows, related_values):
+        """
+        Returns the representation of each row, given the loaded values of the related fields.
+        """
+        names = self._names
+        getter = self._getter
+        converters = {name: converter for name, converter in self.get_converters().items() if name in self._order}
+        if not names:
+            data = [{} for row in rows]
+        elif len(names) == 1:
+            data = [{names[0]: getter(row)} for row in rows]
+        else:
+            data = [dict(zip(names, getter(row))) for row in rows]
+
+        for name, columns in self._composites.items():
+            for item in data:
+                item[name] = tuple(item.pop(column) for column in columns)
+
+        if converters:
+            for item in data:
+                for name, converter in converters.items():
+                    item[name] = converter(item[name])
+
+        for name, values in related_values.items():
+            for row, item in zip(rows, data):
+                item[name] = values.get(row["id"], [])
+
+        if self._related or self._composites:
+            # Related and composite fields are added last: restore the declared order.
+            data = [{name: item[name] for name in self._order} for item in data]
+        return data
+
+
+def _datetime(output_format=None):
+    """
+    Returns a converter formatting datetimes exactly like DRF's `DateTimeField`.
+    """
+    if output_format is None:
+        return serializers.DateTimeField().to_representation
+    return serializers.DateTimeField(format=output_format).to_representation
+
+
+class ProjectListFastSerializer(FastSerializer):
+    model = Project
+    fields = (("url", "id"), ("name", "name"), ("description", "description"), ("type", "type"),
+              ("issue_counts", tuple(ISSUE_COUNT_FIELDS)))
+
+    def get_converters(self):
+        # Reverse the detail URL once with a marker, then substitute each primary key in it.
+        template = reverse("projects-detail", kwargs={"pk": "__pk__"},
+                           request=self.context.get("request"), format=self.context.get("format"))
+        prefix, suffix = template.split("__pk__")
+
+        def url(pk):
+            return f"{prefix}{pk}{suffix}"
+        return {"url": url, "issue_counts": issue_counts_representation}
+
+
+class ProjectDetailFastSerializer(FastSerializer):
+    model = Project
+    fields = (("id", "id"), ("name", "name"), ("description", "description"), ("type", "type"),
+              ("created_time", "created_time"), ("author_username", "author__username"),
+              ("issues", None), ("contributors", None))
+    converters = {"created_time": _datetime()}
+    related = {
+        "issues": RelatedValues(Issue.objects.all(), "project_id", "title"),
+        "contributors": RelatedValues(CustomUser.objects.all(), "projects", "username"),
+    }
+
+
+class IssueListFastSerializer(FastSerializer):
+    model = Issue
+    fields = (("id", "id"), ("title", "title"), ("description", "description"), ("status", "status"),
+              ("priority", "priority"), ("tag", "tag"), ("assignee", "assignee__username"),
+              ("comment_count", "comment_count"))
+
+
+class IssueDetailFastSerializer(FastSerializer):
+    model = Issue
+    fields = (("id", "id"), ("title", "title"), ("description", "description"), ("status", "status"),
+              ("priority", "priority"), ("tag", "tag"), ("project", "project__name"),
+              ("assignee", "assignee__username"), ("author", "author__username"),
+              ("comment_count", "comment_count"))
+
+
+class CommentListFastSerializer(FastSerializer):
+    model = Comment
+    fields = (("id", "id"), ("description", "description"))
+    converters = {"id": str}
+
+
+class CommentDetailFastSerializer(FastSerializer):
+    model = Comment
+    fields = (("id", "id"), ("description", "description"), ("author_username", "author__username"),
+              ("created_time", "created_time"))
+    converters = {"id": str, "created_time": _datetime("%Y-%m-%d %H:%M:%S")}
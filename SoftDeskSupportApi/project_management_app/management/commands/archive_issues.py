@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from project_management_app.archive import archive_issues
+from project_management_app.archive import get_archive_after_days
+
+
+class Command(BaseCommand):
+    help = ("Moves the finished issues not updated for --days days, with their comments, to the archive "
+            "tables, by batches each moved in its own transaction. The archived issues and comments are "
+            "read with ?archived=true.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=get_archive_after_days(),
+                            help="Age of the last update of the issues to archive, in days "
+                                 "(default: the ISSUE_ARCHIVE_AFTER_DAYS setting).")
+        parser.add_argument("--batch-size", type=int, default=500, help="Issues moved per transaction.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        issues, comments = archive_issues(options["days"], options["batch_size"])
+        self.stdout.write(f"Archived {issues} issues and {comments} comments "
+                          f"in {time.perf_counter() - start:.1f} s.")
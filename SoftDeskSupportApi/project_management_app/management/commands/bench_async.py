@@ -0,0 +1,130 @@
+import asyncio
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from project_management_app.models import Project
+from project_management_app.models import Issue
+from user_contrib_app.models import Contributor
+from user_contrib_app.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = ("Compares the throughput of the issue list served by the sync viewset under WSGI and ASGI "
+            "and by the async view under ASGI, at several concurrency levels. Requests are sent to the "
+            "Django handlers in-process. The benchmark data is deleted at the end.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64, 256],
+                            help="Number of requests in flight.")
+        parser.add_argument("--requests", type=int, default=2000, help="Number of requests per run.")
+        parser.add_argument("--issues", type=int, default=200, help="Number of issues of the project.")
+
+    def handle(self, *args, **options):
+        user = CustomUser.objects.create(username="bench-async", age=30)
+        try:
+            project = Project.objects.create(name="bench async", description="Description", type="backend",
+                                             author=user)
+            Contributor.objects.create(user=user, project=project)
+            Issue.objects.bulk_create(
+                [Issue(title=f"Issue {index}", description="Description " * 20, tag="bug", project=project,
+                       author=user, assignee=user if index % 2 else None)
+                 for index in range(options["issues"])])
+            token = str(AccessToken.for_user(user))
+
+            path = f"/api/projects/{project.pk}/issues/"
+            runs = [
+                ("wsgi sync", self.run_wsgi, path),
+                ("asgi sync", self.run_asgi, path),
+                ("asgi async", self.run_asgi, f"/api/async/projects/{project.pk}/issues/"),
+            ]
+            for concurrency in options["concurrency"]:
+                self.stdout.write(f"concurrency {concurrency}")
+                for name, run, url in runs:
+                    latencies, duration = run(url, token, concurrency, options["requests"])
+                    latencies.sort()
+                    self.stdout.write(
+                        f"  {name:<11} {len(latencies) / duration:8.0f} req/s   "
+                        f"p50 {statistics.median(latencies) * 1000:7.1f} ms   "
+                        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:7.1f} ms")
+        finally:
+            user.delete()
+
+    def run_wsgi(self, path, token, concurrency, requests):
+        """
+        Sends `requests` requests to the WSGI handler from `concurrency` threads,
+        like a threaded WSGI server. Returns the latencies and the total duration.
+        """
+        handler = WSGIHandler()
+
+        def request(index):
+            environ = {
+                "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": "limit=20",
+                "SERVER_NAME": "localhost", "SERVER_PORT": "80", "HTTP_HOST": "localhost",
+                "HTTP_AUTHORIZATION": f"Bearer {token}", "wsgi.input": io.BytesIO(), "wsgi.url_scheme": "http",
+                "wsgi.errors": io.StringIO(),
+            }
+            statuses = []
+            start = time.perf_counter()
+            response = handler(environ, lambda status, headers: statuses.append(status))
+            b"".join(response)
+            response.close()
+            if not statuses[0].startswith("200"):
+                raise CommandError(f"{path} returned {statuses[0]}")
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(request, range(requests)))
+        return latencies, time.perf_counter() - start
+
+    def run_asgi(self, path, token, concurrency, requests):
+        """
+        Sends `requests` requests to the ASGI handler with `concurrency` of them in flight on the
+        event loop. Returns the latencies and the total duration.
+        """
+        handler = ASGIHandler()
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"limit=20",
+            "root_path": "", "server": ("localhost", 80), "client": ("127.0.0.1", 50000),
+            "headers": [(b"host", b"localhost"), (b"authorization", f"Bearer {token}".encode())],
+        }
+
+        async def request():
+            messages = []
+            body = [{"type": "http.request", "body": b"", "more_body": False}]
+
+            async def receive():
+                if body:
+                    return body.pop()
+                # The client never disconnects: Django cancels this wait once the response is sent.
+                await asyncio.Future()
+
+            async def send(message):
+                messages.append(message)
+
+            start = time.perf_counter()
+            await handler(dict(scope), receive, send)
+            if messages[0]["status"] != 200:
+                raise CommandError(f"{path} returned {messages[0]['status']}")
+            return time.perf_counter() - start
+
+        async def run():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def limited():
+                async with semaphore:
+                    return await request()
+            return await asyncio.gather(*[limited() for _ in range(requests)])
+
+        start = time.perf_counter()
+        latencies = asyncio.run(run())
+        return list(latencies), time.perf_counter() - start
@@ -0,0 +1,308 @@
+import datetime
+import json
+import statistics
+import subprocess
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+import uuid
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.urls import URLResolver
+from django.urls import get_resolver
+from django.urls import resolve
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from SoftDeskSupportAPI.metrics import install_query_timers
+from SoftDeskSupportAPI.metrics import timing_queries
+from project_management_app.models import Project
+from project_management_app.models import Comment
+from project_management_app.models import DeletionJob
+from user_contrib_app.models import Contributor
+from user_contrib_app.models import CustomUser
+
+# Routes that are not part of the API.
+EXCLUDED_ROUTES = ("admin/", "api-auth/")
+
+
+class Command(BaseCommand):
+    help = ("Benchmarks every route of the API on the existing data (see seed_data): sends each request "
+            "--requests times, in-process with the test client or to a running server with --url, and "
+            "reports the p50/p95/p99 latencies, the queries and the memory allocated per request. "
+            "Writes are only sent in-process, each one in a transaction that is rolled back. "
+            "--output saves the results as JSON, --compare shows the changes since a saved run.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="Measured requests per case.")
+        parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests sent first per case.")
+        parser.add_argument("--memory-requests", type=int, default=5,
+                            help="Requests per case traced with tracemalloc, after the timed ones.")
+        parser.add_argument("--cases", nargs="+", help="Only run the cases with these names.")
+        parser.add_argument("--skip-writes", action="store_true", help="Only run the GET requests.")
+        parser.add_argument("--url", help="Base URL of a running server, e.g. http://localhost:8000. "
+                                          "Only GET requests are sent, queries and memory are not measured.")
+        parser.add_argument("--host", default="localhost", help="Host header of the in-process requests.")
+        parser.add_argument("--password", default="softdesk-seed", help="Password of the users (seed_data).")
+        parser.add_argument("--output", help="Path of the JSON file to write the results to.")
+        parser.add_argument("--compare", help="Path of the JSON results of a previous run.")
+
+    def handle(self, *args, **options):
+        cases = self.get_cases(options["password"])
+        if options["cases"]:
+            unknown = set(options["cases"]) - {case[0] for case in cases}
+            if unknown:
+                raise CommandError(f"Unknown cases: {', '.join(sorted(unknown))}.")
+            cases = [case for case in cases if case[0] in options["cases"]]
+        else:
+            self.report_missing_routes(cases)
+        if options["skip_writes"] or options["url"]:
+            cases = [case for case in cases if case[1] == "GET"]
+
+        results = {}
+        for case in cases:
+            if options["url"]:
+                result = self.run_remote(options["url"], case, options["requests"], options["warmup"])
+            else:
+                result = self.run_in_process(options["host"], case, options["requests"], options["warmup"],
+                                             options["memory_requests"])
+            results[case[0]] = result
+            self.write_result(case[0], result)
+
+        report = {
+            "commit": self.get_commit(),
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "database": settings.DATABASES["default"]["ENGINE"],
+            "fast_serialization": getattr(settings, "FAST_SERIALIZATION", False),
+            "requests": options["requests"],
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                self.compare(json.load(file), report)
+
+    def get_cases(self, password):
+        """
+        Returns the (name, method, path, data, expected status) of each case, for the project with
+        the most issues and its author, who can update the chosen issue and comment.
+        """
+        project = Project.objects.annotate(issue_count=Count("issues")).order_by("-issue_count").first()
+        user = project.author if project else None
+        comment = (Comment.objects.filter(issue__project=project, issue__author=user, author=user)
+                   .select_related("issue").order_by("created_time").first())
+        if comment is None:
+            raise CommandError("There are no projects with issues and comments of their author: run seed_data first.")
+        issue = comment.issue
+        member = Contributor.objects.filter(project=project).exclude(user=user).select_related("user").first()
+        outsider = CustomUser.objects.exclude(contributions__project=project).first()
+        if member is None or outsider is None:
+            raise CommandError("The project needs a contributor besides its author, and a user outside of it.")
+        self.token = str(AccessToken.for_user(user))
+        job = DeletionJob.objects.filter(requested_by=user).order_by("created_time").first()
+
+        # Paths under /api/, also served under /api/async/ for the reads.
+        project_path = f"projects/{project.pk}/"
+        issue_path = f"{project_path}issues/"
+        comment_path = f"{issue_path}{issue.pk}/comments/"
+        projects = f"/api/{project_path}"
+        issues = f"/api/{issue_path}"
+        comments = f"/api/{comment_path}"
+        item = {"title": "Benchmark issue", "description": "Description", "tag": "bug"}
+        return [
+            ("token", "POST", "/api/token/", {"username": user.username, "password": password}, 200),
+            ("token-refresh", "POST", "/api/token/refresh/", {"refresh": str(RefreshToken.for_user(user))}, 200),
+            ("users-list", "GET", "/api/users/", None, 200),
+            ("users-detail", "GET", f"/api/users/{user.pk}/", None, 200),
+            ("users-create", "POST", "/api/users/", {"username": "bench-signup", "password": password, "age": 30}, 201),
+            ("users-update", "PATCH", f"/api/users/{user.pk}/", {"can_be_contacted": True}, 200),
+            ("users-delete", "DELETE", f"/api/users/{user.pk}/", None, 202),
+            ("projects-list", "GET", "/api/projects/", None, 200),
+            ("projects-list-sparse", "GET", "/api/projects/?omit=description", None, 200),
+            ("projects-detail", "GET", projects, None, 200),
+            ("projects-export", "GET", f"{projects}export/", None, 200),
+            ("projects-changes", "GET", f"{projects}changes/?since=0", None, 200),
+            ("projects-create", "POST", "/api/projects/", {"name": "Benchmark", "description": "Description",
+                                                          "type": "backend"}, 201),
+            ("projects-update", "PATCH", projects, {"description": "Updated"}, 200),
+            ("projects-delete", "DELETE", projects, None, 202),
+            ("contributors-list", "GET", f"{projects}contributors/", None, 200),
+            ("contributors-create", "POST", f"{projects}contributors/", {"user": outsider.username}, 201),
+            ("contributors-delete", "DELETE", f"{projects}contributors/", {"username": member.user.username}, 204),
+            ("contributors-bulk-create", "POST", f"{projects}contributors/bulk/",
+             {"usernames": [outsider.username]}, 201),
+            ("contributors-bulk-delete", "DELETE", f"{projects}contributors/bulk/",
+             {"usernames": [member.user.username]}, 204),
+            ("issue-list", "GET", issues, None, 200),
+            ("issue-list-filtered", "GET", f"{issues}?status=to_do,in_progress&ordering=-created_time", None, 200),
+            ("issue-list-keyset", "GET", f"{issues}?cursor=", None, 200),
+            ("issue-list-sparse", "GET", f"{issues}?fields=id,title&limit=100", None, 200),
+            ("issue-detail", "GET", f"{issues}{issue.pk}/", None, 200),
+            ("issue-create", "POST", issues, item, 201),
+            ("issue-update", "PATCH", f"{issues}{issue.pk}/", {"priority": "high"}, 200),
+            ("issue-delete", "DELETE", f"{issues}{issue.pk}/", None, 204),
+            ("issue-bulk-create", "POST", f"{issues}bulk/", [item] * 20, 201),
+            ("issue-bulk-update", "PATCH", f"{issues}bulk/", [{"id": issue.pk, "priority": "high"}], 200),
+            ("comment-list", "GET", comments, None, 200),
+            ("comment-detail", "GET", f"{comments}{comment.pk}/", None, 200),
+            ("comment-create", "POST", comments, {"description": "Benchmark comment"}, 201),
+            ("comment-update", "PATCH", f"{comments}{comment.pk}/", {"description": "Updated"}, 200),
+            ("comment-delete", "DELETE", f"{comments}{comment.pk}/", None, 204),
+            ("search", "GET", "/api/search/?q=login%20error", None, 200),
+            ("deletion-detail", "GET", f"/api/deletions/{job.pk if job else uuid.uuid4()}/", None,
+             200 if job else 404),
+            ("async-project-list", "GET", "/api/async/projects/", None, 200),
+            ("async-project-detail", "GET", f"/api/async/{project_path}", None, 200),
+            ("async-issue-list", "GET", f"/api/async/{issue_path}", None, 200),
+            ("async-issue-detail", "GET", f"/api/async/{issue_path}{issue.pk}/", None, 200),
+            ("async-comment-list", "GET", f"/api/async/{comment_path}", None, 200),
+            ("async-comment-detail", "GET", f"/api/async/{comment_path}{comment.pk}/", None, 200),
+            ("metrics", "GET", "/metrics", None, 200),
+        ]
+
+    def report_missing_routes(self, cases):
+        """
+        Warns about the routes of the URL configuration that no case requests.
+        """
+        def routes(patterns, prefix=""):
+            for pattern in patterns:
+                # Joined like `ResolverMatch.route`, which drops the ^ of the nested regular expressions.
+                route = prefix + str(pattern.pattern).removeprefix("^") if prefix else str(pattern.pattern)
+                if isinstance(pattern, URLResolver):
+                    yield from routes(pattern.url_patterns, route)
+                else:
+                    yield route
+
+        covered = {resolve(urlsplit(case[2]).path).route for case in cases}
+        missing = [route for route in routes(get_resolver().url_patterns)
+                   # The routers also add each route with a format suffix, e.g. `projects.json`.
+                   if not route.startswith(EXCLUDED_ROUTES) and "(?P<format>" not in route and route not in covered]
+        for route in missing:
+            self.stderr.write(f"No benchmark case for the route {route}")
+
+    def send(self, client, method, path, data):
+        """
+        Sends a request with the test client and returns its status code, once the body is read.
+        """
+        if method == "GET":
+            response = client.get(path)
+        else:
+            response = getattr(client, method.lower())(path, data, format="json")
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response.status_code
+
+    def run_in_process(self, host, case, requests, warmup, memory_requests):
+        name, method, path, data, expected = case
+        client = APIClient(HTTP_HOST=host)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+        def request():
+            # Writes are rolled back, so that each request finds the same data. The transaction is
+            # started before the queries are counted, so that its BEGIN is not.
+            with transaction.atomic():
+                install_query_timers()
+                with timing_queries() as timer:
+                    start = time.perf_counter()
+                    status = self.send(client, method, path, data)
+                    elapsed = time.perf_counter() - start
+                transaction.set_rollback(True)
+            if status != expected:
+                raise CommandError(f"{name}: {method} {path} returned {status} instead of {expected}.")
+            return elapsed, timer.queries, timer.seconds
+
+        for _ in range(warmup):
+            request()
+        measures = [request() for _ in range(requests)]
+
+        memory = []
+        tracemalloc.start()
+        try:
+            for _ in range(memory_requests):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                request()
+                memory.append(tracemalloc.get_traced_memory()[1] - before)
+        finally:
+            tracemalloc.stop()
+
+        result = self.summarize(method, path, [measure[0] for measure in measures])
+        result["queries"] = statistics.median(measure[1] for measure in measures)
+        result["sql_ms"] = round(statistics.median(measure[2] for measure in measures) * 1000, 3)
+        result["memory_kib"] = round(statistics.median(memory) / 1024, 1) if memory else None
+        return result
+
+    def run_remote(self, base_url, case, requests, warmup):
+        name, method, path, data, expected = case
+        request = urllib.request.Request(base_url.rstrip("/") + path,
+                                         headers={"Authorization": f"Bearer {self.token}"})
+
+        def send():
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as error:
+                status = error.code
+            if status != expected:
+                raise CommandError(f"{name}: {method} {path} returned {status} instead of {expected}.")
+            return time.perf_counter() - start
+
+        for _ in range(warmup):
+            send()
+        result = self.summarize(method, path, [send() for _ in range(requests)])
+        result.update({"queries": None, "sql_ms": None, "memory_kib": None})
+        return result
+
+    def summarize(self, method, path, latencies):
+        # `quantiles` needs two values at least.
+        cuts = statistics.quantiles(latencies * 2 if len(latencies) == 1 else latencies, n=100, method="inclusive")
+        return {
+            "method": method,
+            "path": path,
+            "p50_ms": round(cuts[49] * 1000, 3),
+            "p95_ms": round(cuts[94] * 1000, 3),
+            "p99_ms": round(cuts[98] * 1000, 3),
+        }
+
+    def write_result(self, name, result):
+        line = (f"{name:<26} p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+                f"p99 {result['p99_ms']:8.2f} ms")
+        if result["queries"] is not None:
+            line += f"  {result['queries']:5g} queries"
+        if result["memory_kib"] is not None:
+            line += f"  {result['memory_kib']:9.1f} KiB"
+        self.stdout.write(line)
+
+    def compare(self, previous, current):
+        """
+        Shows the changes of the median latency and of the queries of each case since `previous`.
+        """
+        self.stdout.write(f"Changes since {previous.get('commit') or 'the previous run'}:")
+        for name, result in current["results"].items():
+            before = previous["results"].get(name)
+            if before is None:
+                continue
+            change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100 if before["p50_ms"] else 0
+            line = f"{name:<26} p50 {before['p50_ms']:8.2f} -> {result['p50_ms']:8.2f} ms ({change:+6.1f}%)"
+            if result["queries"] is not None and before.get("queries") is not None:
+                line += f"  queries {before['queries']:g} -> {result['queries']:g}"
+            self.stdout.write(line)
+
+    def get_commit(self):
+        try:
+            return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
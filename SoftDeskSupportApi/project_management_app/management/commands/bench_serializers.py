@@ -0,0 +1,102 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from project_management_app.models import Project
+from project_management_app.models import Issue
+from project_management_app.models import Comment
+from project_management_app.serializers import ProjectListSerializer
+from project_management_app.serializers import IssueListSerializer
+from project_management_app.serializers import IssueDetailSerializer
+from project_management_app.serializers import CommentDetailSerializer
+from project_management_app.fast_serializers import ProjectListFastSerializer
+from project_management_app.fast_serializers import IssueListFastSerializer
+from project_management_app.fast_serializers import IssueDetailFastSerializer
+from project_management_app.fast_serializers import CommentDetailFastSerializer
+from user_contrib_app.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = ("Compares the DRF serializers with the fast serializers on generated rows. "
+            "The rows are created in a transaction that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000],
+                            help="Number of rows serialized by each run.")
+        parser.add_argument("--repeat", type=int, default=3,
+                            help="Number of runs per measure, the best one is kept.")
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        request = Request(APIRequestFactory().get("/api/projects/", HTTP_HOST="localhost"))
+        context = {"request": request}
+
+        for rows in options["rows"]:
+            with transaction.atomic():
+                project = self.create_rows(rows)
+                cases = [
+                    ("project list", ProjectListSerializer, ProjectListFastSerializer,
+                     Project.objects.filter(name__startswith="bench")),
+                    ("issue list", IssueListSerializer, IssueListFastSerializer,
+                     Issue.objects.filter(project=project).select_related("assignee")),
+                    ("issue detail", IssueDetailSerializer, IssueDetailFastSerializer,
+                     Issue.objects.filter(project=project).select_related("project", "assignee", "author")),
+                    ("comment detail", CommentDetailSerializer, CommentDetailFastSerializer,
+                     Comment.objects.filter(issue__project=project).select_related("author")),
+                ]
+                self.stdout.write(f"{rows} rows")
+                for name, serializer_class, fast_serializer_class, queryset in cases:
+                    def drf():
+                        return renderer.render(serializer_class(queryset.all(), many=True,
+                                                                context=context).data)
+
+                    def fast():
+                        fast_serializer = fast_serializer_class(context=context)
+                        return renderer.render(fast_serializer.serialize(list(fast_serializer.get_rows(queryset))))
+
+                    drf_time, drf_output = self.measure(drf, options["repeat"])
+                    fast_time, fast_output = self.measure(fast, options["repeat"])
+                    if drf_output != fast_output:
+                        raise CommandError(f"The fast serializer output differs for {name}.")
+                    self.stdout.write(f"  {name:<15} drf {drf_time * 1000:9.1f} ms   "
+                                      f"fast {fast_time * 1000:9.1f} ms   x{drf_time / fast_time:.1f}")
+                transaction.set_rollback(True)
+
+    def measure(self, function, repeat):
+        """
+        Returns the best duration of `repeat` calls of `function` and its output.
+        """
+        best = None
+        output = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = function()
+            duration = time.perf_counter() - start
+            best = duration if best is None else min(best, duration)
+        return best, output
+
+    def create_rows(self, rows):
+        """
+        Creates `rows` projects, issues and comments, and returns the project holding the issues.
+        """
+        author = CustomUser.objects.create(username="bench-author", age=30, can_data_be_shared=True)
+        assignee = CustomUser.objects.create(username="bench-assignee", age=30)
+        projects = Project.objects.bulk_create(
+            [Project(name=f"bench {index}", description="Description " * 20, type="backend", author=author)
+             for index in range(rows)])
+        project = projects[0]
+        issues = Issue.objects.bulk_create(
+            [Issue(title=f"Issue {index}", description="Description " * 20, tag="bug", project=project,
+                   author=author, assignee=assignee if index % 2 else None)
+             for index in range(rows)])
+        Comment.objects.bulk_create(
+            [Comment(description="Comment " * 20, author=author, issue=issue) for issue in issues])
+        # `bulk_create` sends no signals: count the issues and comments.
+        Project.objects.filter(pk=project.pk).recount_issues()
+        Issue.objects.filter(project=project).recount_comments()
+        return project
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from project_management_app.deletion import JobClaimLost
+from project_management_app.deletion import claim_next_job
+from project_management_app.deletion import process_job
+
+
+class Command(BaseCommand):
+    help = ("Deletes the users and projects whose deletion was requested, in batches of rows each "
+            "deleted in its own transaction. Interrupted jobs resume where they stopped. "
+            "Several workers can run at once: each job is claimed by one of them.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows deleted per transaction.")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep waiting for new jobs instead of stopping when there are none.")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds between two checks with --loop.")
+        parser.add_argument("--lease", type=float, default=300,
+                            help="Seconds without progress after which a running job is taken over.")
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job(options["lease"])
+            if job is not None:
+                self.process(job, options["batch_size"])
+            elif options["loop"]:
+                time.sleep(options["interval"])
+            else:
+                break
+
+    def process(self, job, batch_size):
+        start = time.perf_counter()
+        try:
+            process_job(job, batch_size)
+        except JobClaimLost as error:
+            # Taken over after `lease` seconds without progress: the other worker finishes it.
+            self.stderr.write(str(error))
+            return
+        deleted = ", ".join(f"{count} {label}" for label, count in sorted(job.deleted.items()))
+        self.stdout.write(f"{job}: deleted {deleted or 'nothing'} in {time.perf_counter() - start:.1f} s.")
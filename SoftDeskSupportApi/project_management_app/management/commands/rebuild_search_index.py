@@ -0,0 +1,14 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from project_management_app.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the search index of the issues and comments from the database."
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        documents = get_search_backend().rebuild()
+        self.stdout.write(f"Indexed {documents} issues and comments in {time.perf_counter() - start:.1f} s.")
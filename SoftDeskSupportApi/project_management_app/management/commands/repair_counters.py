@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from project_management_app.models import Project
+from project_management_app.models import Issue
+from project_management_app.response_cache import response_cache
+
+
+class Command(BaseCommand):
+    help = ("Recomputes the issue counters of the projects and the comment counters of the issues "
+            "that are wrong, e.g. after rows were changed without the ORM. Each counter is repaired "
+            "with a single UPDATE statement.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            projects = Project.objects.recount_issues()
+            issues = Issue.objects.recount_comments()
+        if projects or issues:
+            # The cached responses hold the wrong counters.
+            response_cache.invalidate_all()
+        self.stdout.write(f"Repaired the counters of {projects} projects and {issues} issues "
+                          f"in {time.perf_counter() - start:.1f} s.")
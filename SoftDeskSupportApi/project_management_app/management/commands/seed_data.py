@@ -0,0 +1,149 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+
+from project_management_app.models import Project
+from project_management_app.models import Issue
+from project_management_app.models import Comment
+from project_management_app.search import get_search_backend
+from user_contrib_app.models import Contributor
+from user_contrib_app.models import CustomUser
+
+WORDS = (
+    "api", "login", "token", "crash", "timeout", "database", "migration", "page", "button", "form", "search",
+    "export", "import", "cache", "slow", "error", "user", "project", "issue", "comment", "android", "ios",
+    "backend", "frontend", "release", "deploy", "build", "test", "layout", "permission", "notification",
+    "email", "password", "upload", "download", "report", "dashboard", "filter", "sort", "pagination",
+    "the", "when", "after", "before", "with", "without", "does", "not", "fails", "returns", "shows", "wrong",
+    "value", "empty", "list", "detail", "update", "delete", "create", "should", "fix", "add", "remove",
+)
+
+
+class Command(BaseCommand):
+    help = ("Generates a realistic dataset with bulk_create: users, projects with their contributors, "
+            "issues assigned to contributors and comments. All the users share the same password. "
+            "The generated users are named '<prefix>-<number>', --clear deletes them with their data.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200, help="Number of users.")
+        parser.add_argument("--projects", type=int, default=50, help="Number of projects.")
+        parser.add_argument("--contributors", type=int, default=8,
+                            help="Number of contributors per project, its author included.")
+        parser.add_argument("--issues", type=int, default=100, help="Number of issues per project.")
+        parser.add_argument("--comments", type=int, default=5, help="Average number of comments per issue.")
+        parser.add_argument("--prefix", default="seed", help="Prefix of the usernames.")
+        parser.add_argument("--password", default="softdesk-seed", help="Password of the users.")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows inserted per query.")
+        parser.add_argument("--clear", action="store_true", help="Delete the previously generated data first.")
+
+    def handle(self, *args, **options):
+        if options["contributors"] > options["users"]:
+            raise CommandError("--contributors cannot be greater than --users.")
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        prefix = options["prefix"]
+
+        if options["clear"]:
+            deleted, _ = CustomUser.objects.filter(username__startswith=f"{prefix}-").delete()
+            self.stdout.write(f"Deleted {deleted} rows.")
+        elif CustomUser.objects.filter(username__startswith=f"{prefix}-").exists():
+            raise CommandError(f"Users named '{prefix}-*' already exist: use --clear or another --prefix.")
+
+        start = time.perf_counter()
+        with transaction.atomic():
+            users = self.create_users(prefix, options["users"], options["password"])
+            projects, members = self.create_projects(users, options["projects"], options["contributors"])
+            issues = self.create_issues(projects, members, options["issues"])
+            comments = self.create_comments(issues, members, options["comments"])
+            # `bulk_create` sends no signals: count the new issues and comments at once.
+            Project.objects.filter(pk__in=[project.pk for project in projects]).recount_issues()
+            Issue.objects.filter(project__in=projects).recount_comments()
+        # Then index them with a single rebuild.
+        documents = get_search_backend().rebuild()
+
+        self.stdout.write(
+            f"Created {len(users)} users, {len(projects)} projects, "
+            f"{sum(len(project_members) for project_members in members.values())} contributors, "
+            f"{len(issues)} issues and {comments} comments in {time.perf_counter() - start:.1f} s "
+            f"({documents} documents indexed).")
+
+    def text(self, minimum, maximum):
+        return " ".join(self.random.choices(WORDS, k=self.random.randint(minimum, maximum)))
+
+    def create_users(self, prefix, count, password):
+        # One hash for all the users: hashing each password would take most of the time.
+        password = make_password(password)
+        return CustomUser.objects.bulk_create(
+            [CustomUser(username=f"{prefix}-{index}", password=password, age=self.random.randint(15, 70),
+                        can_be_contacted=self.random.random() < 0.5, can_data_be_shared=self.random.random() < 0.5)
+             for index in range(count)],
+            batch_size=self.batch_size)
+
+    def create_projects(self, users, count, contributors):
+        """
+        Creates the projects and their contributors, and returns the projects and the members
+        of each project (its author first).
+        """
+        types = [value for value, label in Project.TYPE_CHOICES]
+        projects = Project.objects.bulk_create(
+            [Project(name=self.text(2, 5).capitalize(), description=self.text(10, 60),
+                     type=self.random.choice(types), author=self.random.choice(users))
+             for _ in range(count)],
+            batch_size=self.batch_size)
+
+        members = {}
+        rows = []
+        for project in projects:
+            others = [user for user in self.random.sample(users, contributors) if user != project.author]
+            members[project.pk] = [project.author] + others[:contributors - 1]
+            rows.extend(Contributor(user=user, project=project) for user in members[project.pk])
+        Contributor.objects.bulk_create(rows, batch_size=self.batch_size)
+        return projects, members
+
+    def create_issues(self, projects, members, count):
+        statuses = [value for value, label in Issue.STATUS_CHOICES]
+        priorities = [value for value, label in Issue.PRIORITY_CHOICES]
+        tags = [value for value, label in Issue.TAG_CHOICES]
+        issues = []
+        for project in projects:
+            project_members = members[project.pk]
+            for index in range(count):
+                issues.append(Issue(
+                    title=self.text(3, 8).capitalize(), description=self.text(10, 80),
+                    # Most issues are open, few are urgent.
+                    status=self.random.choices(statuses, weights=(5, 3, 2))[0],
+                    priority=self.random.choices(priorities, weights=(5, 3, 1))[0],
+                    tag=self.random.choice(tags), project=project,
+                    # The project author writes the first issue (see `create_comments`).
+                    author=project.author if index == 0 else self.random.choice(project_members),
+                    assignee=self.random.choice(project_members) if self.random.random() < 0.7 else None))
+        return Issue.objects.bulk_create(issues, batch_size=self.batch_size)
+
+    def create_comments(self, issues, members, average):
+        """
+        Creates between 0 and twice `average` comments per issue, in batches to bound the memory used.
+        The first issue of each project starts with a comment of the project author, so that
+        bench_endpoints finds an issue and a comment its user can update. Returns the number of comments.
+        """
+        created = 0
+        batch = []
+        seen_projects = set()
+        for issue in issues:
+            project_members = members[issue.project_id]
+            if issue.project_id not in seen_projects:
+                seen_projects.add(issue.project_id)
+                batch.append(Comment(description=self.text(5, 40), author=project_members[0], issue=issue))
+            for _ in range(self.random.randint(0, 2 * average)):
+                batch.append(Comment(description=self.text(5, 40), author=self.random.choice(project_members),
+                                     issue=issue))
+            if len(batch) >= self.batch_size:
+                Comment.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        Comment.objects.bulk_create(batch)
+        return created + len(batch)
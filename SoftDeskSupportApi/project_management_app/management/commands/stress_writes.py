@@ -0,0 +1,137 @@
+import io
+import json
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.core.signals import got_request_exception
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework_simplejwt.tokens import AccessToken
+
+from project_management_app.models import Project
+from project_management_app.models import Issue
+from user_contrib_app.models import Contributor
+from user_contrib_app.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = ("Creates issues and comments through the API from concurrent threads, while listing issues, "
+            "and reports the failed requests (such as \"database is locked\" errors) and the number of "
+            "database connections opened. Run it with each SOFTDESK_DB_PROFILE to compare them. "
+            "Requests are sent to the WSGI handler in-process. The test data is deleted at the end.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8, help="Number of concurrent clients.")
+        parser.add_argument("--requests", type=int, default=150, help="Number of requests per client.")
+
+    def handle(self, *args, **options):
+        user = CustomUser.objects.create(username="stress-writes", age=30)
+        try:
+            project = Project.objects.create(name="stress writes", description="Description", type="backend",
+                                             author=user)
+            Contributor.objects.create(user=user, project=project)
+            issue = Issue.objects.create(title="Issue", description="Description", tag="bug", project=project,
+                                         author=user)
+            self.token = str(AccessToken.for_user(user))
+            self.handler = WSGIHandler()
+            self.issues_path = f"/api/projects/{project.pk}/issues/"
+            self.comments_path = f"{self.issues_path}{issue.pk}/comments/"
+            result = self.run(options["threads"], options["requests"])
+        finally:
+            user.delete()
+
+        self.stdout.write(f"profile     {settings.SOFTDESK_DB_PROFILE}")
+        self.stdout.write(f"requests    {result['requests']} in {result['duration']:.1f} s "
+                          f"({result['requests'] / result['duration']:.0f} req/s)")
+        self.stdout.write(f"latency     p50 {result['p50'] * 1000:.1f} ms   p99 {result['p99'] * 1000:.1f} ms")
+        self.stdout.write(f"connections {result['connections']} opened")
+        self.stdout.write(f"failures    {sum(result['errors'].values())}")
+        for error, count in result["errors"].most_common():
+            self.stdout.write(f"  {count:6d}  {error}")
+        if result["errors"]:
+            self.stderr.write("Some requests failed.")
+
+    def request(self, method, path, body=None):
+        """
+        Sends a request to the WSGI handler and returns its status code.
+        """
+        body = json.dumps(body).encode() if body is not None else b""
+        environ = {
+            "REQUEST_METHOD": method, "PATH_INFO": path, "QUERY_STRING": "",
+            "SERVER_NAME": "localhost", "SERVER_PORT": "80", "HTTP_HOST": "localhost",
+            "HTTP_AUTHORIZATION": f"Bearer {self.token}", "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)), "wsgi.input": io.BytesIO(body), "wsgi.url_scheme": "http",
+            "wsgi.errors": io.StringIO(),
+        }
+        statuses = []
+        response = self.handler(environ, lambda status, headers: statuses.append(status))
+        b"".join(response)
+        response.close()
+        return int(statuses[0].split()[0])
+
+    def run(self, threads, requests):
+        errors = Counter()
+        latencies = []
+        opened = []
+        lock = threading.Lock()
+
+        def record_exception(sender, request=None, **kwargs):
+            # Called in the thread handling the failed request, which gets a 500 response.
+            exc = sys.exc_info()[1]
+            with lock:
+                errors[f"{type(exc).__name__}: {exc}"] += 1
+
+        def record_connection(sender, connection, **kwargs):
+            with lock:
+                opened.append(connection.alias)
+
+        def client(index):
+            operations = [
+                ("POST", self.issues_path, {"title": f"Issue {index}", "description": "Description",
+                                            "tag": "bug"}),
+                ("POST", self.comments_path, {"description": f"Comment from client {index}"}),
+                ("GET", self.issues_path, None),
+            ]
+            try:
+                for number in range(requests):
+                    method, path, body = operations[number % len(operations)]
+                    start = time.perf_counter()
+                    status = self.request(method, path, body)
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        latencies.append(elapsed)
+                        if status >= 400 and status != 500:
+                            errors[f"HTTP {status} on {method}"] += 1
+            finally:
+                # Persistent connections outlive the requests: close them with the thread.
+                connections.close_all()
+
+        got_request_exception.connect(record_exception)
+        connection_created.connect(record_connection)
+        try:
+            workers = [threading.Thread(target=client, args=(index,)) for index in range(threads)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            duration = time.perf_counter() - start
+        finally:
+            got_request_exception.disconnect(record_exception)
+            connection_created.disconnect(record_connection)
+
+        latencies.sort()
+        return {
+            "requests": len(latencies),
+            "duration": duration,
+            "p50": statistics.median(latencies),
+            "p99": latencies[int(len(latencies) * 0.99) - 1],
+            "connections": len(opened),
+            "errors": errors,
+        }
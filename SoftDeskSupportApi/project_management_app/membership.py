@@ -0,0 +1,303 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists
+from django.db.models import OuterRef
+
+from SoftDeskSupportAPI.replicas import replica_cache_timeout
+from project_management_app.models import Project
+from project_management_app.models import Issue
+from project_management_app.models import ArchivedIssue
+from user_contrib_app.models import Contributor
+
+
+class MembershipCache:
+    """
+    Versioned cache of (user, project) -> (is_author, is_contributor) backed by Django's cache framework.
+    Each project has a version number that is part of every entry key. Bumping the version
+    invalidates all the entries of the project at once, without having to know which users are cached.
+
+    A reader gets the version before querying the database and stores its flags under that version:
+    flags read before a change commits are stored under a version that the commit bumps again.
+    """
+    key_prefix = "softdesk:membership"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def timeout(self):
+        return getattr(settings, "MEMBERSHIP_CACHE_TIMEOUT", 300)
+
+    def _version_key(self, project_pk):
+        return f"{self.key_prefix}:version:{project_pk}"
+
+    def get_version(self, project_pk):
+        """
+        Returns the current version of the project, initializing it if it is missing or was evicted.
+        A time based initial value makes sure an evicted version never points back to stale entries.
+        """
+        key = self._version_key(project_pk)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+        return version
+
+    async def aget_version(self, project_pk):
+        key = self._version_key(project_pk)
+        version = await cache.aget(key)
+        if version is None:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            version = await cache.aget(key)
+        return version
+
+    def _entry_key(self, user_pk, project_pk, version):
+        return f"{self.key_prefix}:{project_pk}:{version}:{user_pk}"
+
+    def _count(self, flags):
+        with self._lock:
+            if flags is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return flags
+
+    def get(self, user_pk, project_pk, version):
+        """
+        Returns the (is_author, is_contributor) flags cached under `version`, or None on a miss.
+        """
+        return self._count(cache.get(self._entry_key(user_pk, project_pk, version)))
+
+    async def aget(self, user_pk, project_pk, version):
+        return self._count(await cache.aget(self._entry_key(user_pk, project_pk, version)))
+
+    def set(self, user_pk, project_pk, version, is_author, is_contributor):
+        """
+        Caches the flags under `version`, the version of the project read before the flags.
+        """
+        # Flags read from a replica may be behind: they are kept no longer than the replica pin.
+        cache.set(self._entry_key(user_pk, project_pk, version), (is_author, is_contributor),
+                  timeout=replica_cache_timeout(self.timeout))
+
+    async def aset(self, user_pk, project_pk, version, is_author, is_contributor):
+        await cache.aset(self._entry_key(user_pk, project_pk, version), (is_author, is_contributor),
+                         timeout=replica_cache_timeout(self.timeout))
+
+    def invalidate(self, project_pk):
+        """
+        Bumps the version of the project so that all its cached memberships are ignored, now and
+        again when the current transaction commits.
+        """
+        self._bump(project_pk)
+        # Flags read before the transaction commits are the previous ones: bump again after it.
+        transaction.on_commit(lambda: self._bump(project_pk))
+
+    def _bump(self, project_pk):
+        key = self._version_key(project_pk)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The version does not exist (never used or evicted): start a new one.
+            cache.set(key, time.time_ns(), timeout=None)
+
+    def stats(self):
+        """
+        Returns the hit and miss counters of this process.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+membership_cache = MembershipCache()
+
+
+class ProjectMembership:
+    """
+    Answers "which project, is the user its author, is the user a contributor" for one request.
+    The flags come from the membership cache when possible. On a miss, the project and both flags
+    are loaded together with a single query using an indexed EXISTS subquery on the contributor table.
+    The project itself is only loaded when a view or serializer needs it.
+    """
+
+    def __init__(self, user, project_pk, project=None, flags=None):
+        self.user = user
+        self.project_pk = project_pk
+        self._project = project
+        self._flags = flags
+        self._loaded = project is not None
+
+    @classmethod
+    def missing(cls, user):
+        """
+        Returns a membership for a project that does not exist.
+        """
+        membership = cls(user, None)
+        membership._loaded = True
+        return membership
+
+    def _load(self, version=None):
+        if version is None:
+            version = membership_cache.get_version(self.project_pk)
+        project = (Project.objects.active()
+                   .annotate(is_contributor=_contributor_exists(self.user, "pk"))
+                   .filter(pk=self.project_pk)
+                   .first())
+        self._project = project
+        self._loaded = True
+        if project is not None:
+            self._flags = (project.author_id == self.user.pk, project.is_contributor)
+            membership_cache.set(self.user.pk, project.pk, version, *self._flags)
+
+    @property
+    def project(self):
+        if not self._loaded:
+            self._load()
+        return self._project
+
+    @property
+    def flags(self):
+        if self._flags is None and not self._loaded:
+            version = membership_cache.get_version(self.project_pk)
+            self._flags = membership_cache.get(self.user.pk, self.project_pk, version)
+            if self._flags is None:
+                self._load(version)
+        return self._flags
+
+    @property
+    def exists(self):
+        return self.flags is not None
+
+    @property
+    def is_author(self):
+        return self.exists and self.flags[0]
+
+    @property
+    def is_contributor(self):
+        return self.exists and self.flags[1]
+
+    @property
+    def has_access(self):
+        return self.is_author or self.is_contributor
+
+
+def _contributor_exists(user, project_ref):
+    """
+    Returns an EXISTS subquery checking if `user` is a contributor of the referenced project.
+    """
+    return Exists(Contributor.objects.filter(project_id=OuterRef(project_ref), user_id=user.pk))
+
+
+def _get_memo(request, name):
+    """
+    Returns the per-request memo dictionary called `name`, creating it if needed.
+    """
+    memo = getattr(request, name, None)
+    if memo is None:
+        memo = {}
+        setattr(request, name, memo)
+    return memo
+
+
+def get_project_membership(request, project_pk):
+    """
+    Returns the `ProjectMembership` of the requesting user for the project `project_pk`.
+    The result is memoized on the request, so permissions, views and serializers share it.
+    """
+    memo = _get_memo(request, "_project_memberships")
+    key = str(project_pk)
+    if key not in memo:
+        memo[key] = ProjectMembership(request.user, project_pk)
+    return memo[key]
+
+
+def get_issue_membership(request, issue_pk, archived=False):
+    """
+    Returns the issue `issue_pk` (or None) and the `ProjectMembership` for its project.
+    The issue, its project and the membership flag are loaded with a single query.
+    With `archived`, the issue is an `ArchivedIssue`. The flags are not cached: the project, and so
+    the version to cache them under, is only known after the query.
+    """
+    memo = _get_memo(request, "_issue_memberships")
+    key = f"{issue_pk}:archived" if archived else str(issue_pk)
+    if key not in memo:
+        model = ArchivedIssue if archived else Issue
+        issue = (model.objects
+                 .select_related("project")
+                 .annotate(is_contributor=_contributor_exists(request.user, "project_id"))
+                 .filter(pk=issue_pk, project__deletion_pending=False)
+                 .first())
+        if issue is None:
+            memo[key] = (None, ProjectMembership.missing(request.user))
+        else:
+            project = issue.project
+            flags = (project.author_id == request.user.pk, issue.is_contributor)
+            membership = ProjectMembership(request.user, project.pk, project=project, flags=flags)
+            # Share the membership with lookups made through the project ID.
+            _get_memo(request, "_project_memberships").setdefault(str(project.pk), membership)
+            memo[key] = (issue, membership)
+    return memo[key]
+
+
+async def aget_project_membership(user, project_pk):
+    """
+    Async version of `get_project_membership`, for the async views (no request memo: each
+    async view resolves its membership once).
+    """
+    version = await membership_cache.aget_version(project_pk)
+    flags = await membership_cache.aget(user.pk, project_pk, version)
+    if flags is not None:
+        return ProjectMembership(user, project_pk, flags=flags)
+    project = await (Project.objects.active()
+                     .annotate(is_contributor=_contributor_exists(user, "pk"))
+                     .filter(pk=project_pk)
+                     .afirst())
+    if project is None:
+        return ProjectMembership.missing(user)
+    flags = (project.author_id == user.pk, project.is_contributor)
+    await membership_cache.aset(user.pk, project.pk, version, *flags)
+    return ProjectMembership(user, project.pk, project=project, flags=flags)
+
+
+async def aget_issue_membership(user, issue_pk, archived=False):
+    """
+    Async version of `get_issue_membership`: returns the issue (or None) and the membership
+    of its project, loaded with a single query.
+    """
+    model = ArchivedIssue if archived else Issue
+    issue = await (model.objects
+                   .select_related("project")
+                   .annotate(is_contributor=_contributor_exists(user, "project_id"))
+                   .filter(pk=issue_pk, project__deletion_pending=False)
+                   .afirst())
+    if issue is None:
+        return None, ProjectMembership.missing(user)
+    project = issue.project
+    flags = (project.author_id == user.pk, issue.is_contributor)
+    return issue, ProjectMembership(user, project.pk, project=project, flags=flags)
+
+
+def is_project_contributor(project, user):
+    """
+    Checks whether `user` is a contributor of `project`, using the membership cache
+    and falling back to a single EXISTS query.
+    """
+    if user is None:
+        return False
+    version = membership_cache.get_version(project.pk)
+    flags = membership_cache.get(user.pk, project.pk, version)
+    if flags is None:
+        is_contributor = Contributor.objects.filter(project_id=project.pk, user_id=user.pk).exists()
+        flags = (project.author_id == user.pk, is_contributor)
+        membership_cache.set(user.pk, project.pk, version, *flags)
+    return flags[1]
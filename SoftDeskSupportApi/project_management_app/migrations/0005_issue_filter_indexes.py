@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project_management_app", "0004_issue_comment_keyset_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="issue",
+            index=models.Index(fields=["project", "status", "created_time"], name="issue_project_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="issue",
+            index=models.Index(fields=["project", "assignee", "status"], name="issue_project_assignee_idx"),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_created_time(apps, schema_editor):
+    """
+    Existing rows were last modified, as far as we know, when they were created.
+    """
+    for model_name in ["Project", "Issue", "Comment"]:
+        model = apps.get_model("project_management_app", model_name)
+        model.objects.update(updated_time=models.F("created_time"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project_management_app", "0005_issue_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="updated_time",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="issue",
+            name="updated_time",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="updated_time",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_created_time, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="issue",
+            index=models.Index(fields=["project", "updated_time"], name="issue_project_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["issue", "updated_time"], name="comment_issue_updated_idx"),
+        ),
+    ]
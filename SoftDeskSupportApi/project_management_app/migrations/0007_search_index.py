@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:00
+
+from django.db import migrations
+
+CREATE_TABLES = [
+    "CREATE TABLE project_management_app_search_document ("
+    "rowid INTEGER PRIMARY KEY, kind TEXT NOT NULL, object_id TEXT NOT NULL, "
+    "issue_id INTEGER NOT NULL, project_id INTEGER NOT NULL, UNIQUE (kind, object_id))",
+    "CREATE INDEX search_document_issue_idx ON project_management_app_search_document (issue_id)",
+    "CREATE VIRTUAL TABLE project_management_app_search_fts USING fts5("
+    "title, body, tokenize = 'unicode61 remove_diacritics 2')",
+]
+
+DROP_TABLES = [
+    "DROP TABLE IF EXISTS project_management_app_search_fts",
+    "DROP TABLE IF EXISTS project_management_app_search_document",
+]
+
+
+def run_on_sqlite(statements):
+    """
+    The FTS5 index only exists on SQLite, other databases use another search backend.
+    """
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+def build_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    statements = [
+        "INSERT INTO project_management_app_search_document (kind, object_id, issue_id, project_id) "
+        "SELECT 'issue', CAST(id AS TEXT), id, project_id FROM project_management_app_issue",
+        "INSERT INTO project_management_app_search_document (kind, object_id, issue_id, project_id) "
+        "SELECT 'comment', c.id, c.issue_id, i.project_id FROM project_management_app_comment c "
+        "JOIN project_management_app_issue i ON i.id = c.issue_id",
+        "INSERT INTO project_management_app_search_fts (rowid, title, body) "
+        "SELECT d.rowid, i.title, i.description FROM project_management_app_search_document d "
+        "JOIN project_management_app_issue i ON i.id = d.issue_id WHERE d.kind = 'issue'",
+        "INSERT INTO project_management_app_search_fts (rowid, title, body) "
+        "SELECT d.rowid, '', c.description FROM project_management_app_search_document d "
+        "JOIN project_management_app_comment c ON c.id = d.object_id WHERE d.kind = 'comment'",
+    ]
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project_management_app", "0006_updated_time"),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_TABLES), run_on_sqlite(DROP_TABLES)),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+def count(queryset):
+    return models.Subquery(queryset.order_by().annotate(
+        count=models.Func(models.F("pk"), function="COUNT", output_field=models.IntegerField())).values("count"))
+
+
+def fill_counters(apps, schema_editor):
+    """
+    Counts the existing issues of each project and comments of each issue.
+    """
+    Project = apps.get_model("project_management_app", "Project")
+    Issue = apps.get_model("project_management_app", "Issue")
+    Comment = apps.get_model("project_management_app", "Comment")
+
+    counts = {}
+    for status in ["to_do", "in_progress", "finished"]:
+        counts[f"{status}_issues"] = count(Issue.objects.filter(project=models.OuterRef("pk"), status=status))
+    for priority in ["low", "medium", "high"]:
+        counts[f"{priority}_priority_issues"] = count(Issue.objects.filter(project=models.OuterRef("pk"),
+                                                                           priority=priority))
+    Project.objects.update(**counts)
+    Issue.objects.update(comment_count=count(Comment.objects.filter(issue=models.OuterRef("pk"))))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project_management_app", "0007_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="to_do_issues",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="in_progress_issues",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="finished_issues",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="low_priority_issues",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="medium_priority_issues",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="high_priority_issues",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="issue",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project_management_app', '0010_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('project', 'Project'), ('issue', 'Issue'), ('comment', 'Comment'), ('contributor', 'Contributor')], max_length=50)),
+                ('object_id', models.CharField(max_length=36)),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted'), ('archived', 'Archived')], max_length=50)),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+                ('project', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='changes', to='project_management_app.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'id'], name='changelog_project_id_idx')],
+            },
+        ),
+    ]
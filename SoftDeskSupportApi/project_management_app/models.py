@@ -1,10 +1,118 @@
 import uuid
 
 from django.db import models
+from django.db import router
+from django.db import transaction
+from django.utils import timezone
 from user_contrib_app.models import CustomUser
+from user_contrib_app.models import Contributor
 
 
-class Project(models.Model):
+def issue_status_counter(status):
+    return f"{status}_issues"
+
+
+def issue_priority_counter(priority):
+    return f"{priority}_priority_issues"
+
+
+def issue_counter_lookups():
+    """
+    Yields each issue counter field of `Project` with the issue lookup it counts.
+    """
+    for status, label in Issue.STATUS_CHOICES:
+        yield issue_status_counter(status), {"status": status}
+    for priority, label in Issue.PRIORITY_CHOICES:
+        yield issue_priority_counter(priority), {"priority": priority}
+
+
+def _count(queryset):
+    """
+    Returns the number of rows of `queryset` (filtered on an `OuterRef`) as a subquery expression.
+    """
+    count = models.Func(models.F("pk"), function="COUNT", output_field=models.IntegerField())
+    return models.Subquery(queryset.order_by().annotate(count=count).values("count"))
+
+
+class AtomicSaveMixin:
+    """
+    Model mixin saving the instance and running its `post_save` receivers, which update the counters
+    of other rows, in one transaction. `delete()` already sends its signals within its transaction.
+    """
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class CounterModel(models.Model):
+    """
+    Base of the models with counters, which are only changed by `F()` updates: saving an instance
+    never writes back the counters loaded with it, which may be outdated.
+    """
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None and not args:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in self.counter_fields
+                                       and field.attname not in deferred]
+        super().save(*args, **kwargs)
+
+
+class ProjectQuerySet(models.QuerySet):
+
+    def active(self):
+        """
+        Excludes the projects waiting for their deletion, see `DeletionJob`.
+        """
+        return self.filter(deletion_pending=False)
+
+    def visible_to(self, user):
+        """
+        Returns the projects authored by `user` or to which `user` contributes.
+        """
+        is_contributor = models.Exists(Contributor.objects.filter(project_id=models.OuterRef("pk"),
+                                                                  user_id=user.pk))
+        return self.active().filter(models.Q(author_id=user.pk) | is_contributor)
+
+    def recount_issues(self):
+        """
+        Recomputes the issue counters of the projects whose counters are wrong, and sets their
+        `updated_time`. Returns the number of projects repaired.
+        """
+        # Archived issues are still issues of their project.
+        counts = {field: _count(Issue.objects.filter(project=models.OuterRef("pk"), **lookup))
+                  + _count(ArchivedIssue.objects.filter(project=models.OuterRef("pk"), **lookup))
+                  for field, lookup in issue_counter_lookups()}
+        drifted = models.Q()
+        for field in counts:
+            drifted |= ~models.Q(**{field: models.F(f"actual_{field}")})
+        wrong = self.alias(**{f"actual_{field}": count for field, count in counts.items()}).filter(drifted)
+        return Project.objects.filter(pk__in=wrong.values("pk")).update(updated_time=timezone.now(), **counts)
+
+    def touch(self):
+        """
+        Sets the `updated_time` of the projects to now, without sending signals. Used when their
+        issues or contributors change, as these are part of the project responses.
+        """
+        return self.update(updated_time=timezone.now())
+
+    def update_counters(self, deltas):
+        """
+        Adds `deltas` ({counter field: change}) to the issue counters of the projects with `F()`
+        expressions, and sets their `updated_time` in the same query.
+        """
+        changes = {field: models.F(field) + delta for field, delta in deltas.items() if delta}
+        return self.update(updated_time=timezone.now(), **changes)
+
+
+class Project(CounterModel):
     TYPE_CHOICES = (
         ("backend", "Back-end"),
         ("frontend", "Front-end"),
@@ -22,12 +130,40 @@ class Project(models.Model):
                                           through="user_contrib_app.Contributor",
                                           related_name="projects")
     created_time = models.DateTimeField(auto_now_add=True)
+    updated_time = models.DateTimeField(auto_now=True)
+    # Number of issues per status and per priority, see `issue_counter_lookups`.
+    to_do_issues = models.PositiveIntegerField(default=0)
+    in_progress_issues = models.PositiveIntegerField(default=0)
+    finished_issues = models.PositiveIntegerField(default=0)
+    low_priority_issues = models.PositiveIntegerField(default=0)
+    medium_priority_issues = models.PositiveIntegerField(default=0)
+    high_priority_issues = models.PositiveIntegerField(default=0)
+    # Set when the deletion of the project is requested: the project is hidden until it is deleted.
+    deletion_pending = models.BooleanField(default=False)
+
+    counter_fields = ("to_do_issues", "in_progress_issues", "finished_issues",
+                      "low_priority_issues", "medium_priority_issues", "high_priority_issues")
+
+    objects = ProjectQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
 
-class Issue(models.Model):
+class IssueQuerySet(models.QuerySet):
+
+    def recount_comments(self):
+        """
+        Recomputes the comment counter of the issues whose counter is wrong, and sets their
+        `updated_time`. Returns the number of issues repaired.
+        """
+        count = _count(Comment.objects.filter(issue=models.OuterRef("pk")))
+        wrong = self.alias(actual_comments=count).exclude(comment_count=models.F("actual_comments"))
+        return Issue.objects.filter(pk__in=wrong.values("pk")).update(updated_time=timezone.now(),
+                                                                      comment_count=count)
+
+
+class Issue(AtomicSaveMixin, CounterModel):
     STATUS_CHOICES = (
         ("to_do", "To do"),
         ("in_progress", "In progress"),
@@ -59,17 +195,207 @@ class Issue(models.Model):
                                  related_name="assigned_issues")
     author = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="created_issues")
     created_time = models.DateTimeField(auto_now_add=True)
+    updated_time = models.DateTimeField(auto_now=True)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    counter_fields = ("comment_count",)
+
+    objects = IssueQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the issues of a project.
+            models.Index(fields=["project", "created_time", "id"], name="issue_project_created_idx"),
+            # Filters of the issue list on status and on assignee, in the order of the list.
+            models.Index(fields=["project", "status", "created_time"], name="issue_project_status_idx"),
+            models.Index(fields=["project", "assignee", "created_time", "id"], name="issue_project_assignee_idx"),
+            # Validators (ETag) of the issue list.
+            models.Index(fields=["project", "updated_time"], name="issue_project_updated_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_counted_values()
+        return instance
+
+    def remember_counted_values(self):
+        """
+        Remembers the stored status and priority (when loaded), to move the issue between
+        the counters of its project when they change.
+        """
+        self._counted_values = {name: self.__dict__[name] for name in ("status", "priority")
+                                if name in self.__dict__}
+
+    def counters(self, stored=False):
+        """
+        Returns the project counters of the issue, for its stored values if `stored` is set,
+        or None when these values were not loaded.
+        """
+        values = getattr(self, "_counted_values", {}) if stored else self.__dict__
+        if "status" not in values or "priority" not in values:
+            return None
+        return issue_status_counter(values["status"]), issue_priority_counter(values["priority"])
 
-class Comment(models.Model):
+
+class Comment(AtomicSaveMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     description = models.TextField()
     author = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="authored_comments")
     issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name="issue_comments")
     created_time = models.DateTimeField(auto_now_add=True)
+    updated_time = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the comments of an issue.
+            models.Index(fields=["issue", "created_time", "id"], name="comment_issue_created_idx"),
+            # Validators (ETag) of the comment list.
+            models.Index(fields=["issue", "updated_time"], name="comment_issue_updated_idx"),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.username} on {self.created_time}"
+
+
+class ArchivedIssue(models.Model):
+    """
+    Finished issue moved out of the `Issue` table by the `archive_issues` command, with the same ID.
+    Archived issues are read-only.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    status = models.CharField(max_length=50, choices=Issue.STATUS_CHOICES)
+    priority = models.CharField(max_length=50, choices=Issue.PRIORITY_CHOICES)
+    tag = models.CharField(max_length=50, choices=Issue.TAG_CHOICES)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="archived_issues")
+    assignee = models.ForeignKey(CustomUser,
+                                 on_delete=models.SET_NULL,
+                                 null=True,
+                                 blank=True,
+                                 related_name="archived_assigned_issues")
+    author = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="archived_created_issues")
+    # Copied from the issue, not set automatically.
+    created_time = models.DateTimeField()
+    updated_time = models.DateTimeField()
+    comment_count = models.PositiveIntegerField(default=0)
+    archived_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the archived issues of a project.
+            models.Index(fields=["project", "created_time", "id"], name="archived_issue_created_idx"),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedComment(models.Model):
+    """
+    Comment of an `ArchivedIssue`, with the same ID as when it was a `Comment`.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    description = models.TextField()
+    author = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="archived_comments")
+    issue = models.ForeignKey(ArchivedIssue, on_delete=models.CASCADE, related_name="issue_comments")
+    # Copied from the comment, not set automatically.
+    created_time = models.DateTimeField()
+    updated_time = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the comments of an archived issue.
+            models.Index(fields=["issue", "created_time", "id"], name="archived_comment_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Comment by {self.author.username} on {self.created_time}"
+
+
+class DeletionJob(models.Model):
+    """
+    Deletion of a user or a project with everything that depends on them, done in batches by the
+    `process_deletions` command. `deleted` counts the rows deleted so far per model.
+    """
+    KIND_CHOICES = (
+        ("user", "User"),
+        ("project", "Project"),
+    )
+
+    STATUS_CHOICES = (
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+    )
+
+    # Random, so that the progress of a deletion is only known to its requester.
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    # The only user who can read the progress. Nulled when the user is deleted, e.g. by the last step
+    # of their own deletion: the job is then readable by nobody, not by a new user reusing their ID.
+    requested_by = models.ForeignKey(CustomUser,
+                                     on_delete=models.SET_NULL,
+                                     null=True,
+                                     blank=True,
+                                     related_name="deletion_jobs")
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES, default="pending")
+    deleted = models.JSONField(default=dict)
+    created_time = models.DateTimeField(auto_now_add=True)
+    updated_time = models.DateTimeField(auto_now=True)
+    finished_time = models.DateTimeField(null=True, blank=True)
+    # Random token of the worker running the job, see `project_management_app.deletion.claim_next_job`.
+    claim = models.UUIDField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Pending jobs, oldest first.
+            models.Index(fields=["status", "created_time"], name="deletion_job_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"Deletion of {self.kind} {self.object_id}"
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only log of the changes to a project, its issues, comments and contributors, written in
+    the same transaction as the changes and read by the sync endpoint. The auto-incremented ID
+    orders the entries and is the sync cursor. Contributors are identified by their user ID.
+    """
+    MODEL_CHOICES = (
+        ("project", "Project"),
+        ("issue", "Issue"),
+        ("comment", "Comment"),
+        ("contributor", "Contributor"),
+    )
+
+    ACTION_CHOICES = (
+        ("created", "Created"),
+        ("updated", "Updated"),
+        ("deleted", "Deleted"),
+        ("archived", "Archived"),
+    )
+
+    # The entries outlive the rows they describe: no constraint, the deletion job of a project
+    # removes its entries.
+    project = models.ForeignKey(Project, on_delete=models.DO_NOTHING, db_constraint=False,
+                                related_name="changes")
+    model = models.CharField(max_length=50, choices=MODEL_CHOICES)
+    object_id = models.CharField(max_length=36)
+    action = models.CharField(max_length=50, choices=ACTION_CHOICES)
+    created_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Changes of a project after a cursor.
+            models.Index(fields=["project", "id"], name="changelog_project_id_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} {self.action}"
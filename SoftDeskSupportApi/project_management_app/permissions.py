@@ -2,8 +2,9 @@ from rest_framework.permissions import BasePermission
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.exceptions import NotFound
 
-from project_management_app.models import Project
-from project_management_app.models import Issue
+from project_management_app.membership import get_project_membership
+from project_management_app.membership import get_issue_membership
+from project_management_app.membership import is_project_contributor
 
 
 class IsProjectAuthor(BasePermission):
@@ -12,7 +13,7 @@ class IsProjectAuthor(BasePermission):
     This method verifies if the user attempting to modify or delete the object is its author.
     """
     def has_object_permission(self, request, view, obj):
-        if not request.user == obj.author:
+        if obj.author_id != request.user.pk:
             raise PermissionDenied("Only the author can modify or delete this project.")
         return True
 
@@ -26,12 +27,12 @@ class IsProjectContributor(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # Check if the current user is the author of the project
-        if request.user == obj.author:
+        if obj.author_id == request.user.pk:
             # Grant access if the user is the author
             return True
 
         # Check if the current user is a contributor to the project
-        if obj.contributors.filter(id=request.user.id).exists():
+        if is_project_contributor(obj, request.user):
             # Grant access if the user is a contributor
             return True
 
@@ -49,23 +50,22 @@ class HasProjectAccessPermission (BasePermission):
         # Retrieve the project_pk from the URL
         project_pk = view.kwargs['project_pk']
 
-        # Retrieve the project instance using the project ID
-        try:
-            project = Project.objects.get(pk=project_pk)
-        except Project.DoesNotExist:
+        # Resolve the project and the user's membership with a single query shared by the request
+        membership = get_project_membership(request, project_pk)
+        if not membership.exists:
             # Raise a NotFound error if the project does not exist
             raise NotFound("Project not found")
 
         # Determine if the user is the author or a contributor of the project
-        is_author = request.user == project.author
-        is_contributor = request.user in project.contributors.all()
+        is_author = membership.is_author
+        is_contributor = membership.is_contributor
 
         if is_author or is_contributor:
             return True
 
         if view.action in ['list', 'retrieve']:
             raise PermissionDenied("Only contributors of the project can access its resources.")
-        if view.action == 'create':
+        if view.action in ['create', 'bulk_create']:
             raise PermissionDenied("You cannot create issues for a project you are not contributing to.")
         return False
 
@@ -78,7 +78,7 @@ class IsIssueAuthor(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # Check if the current user is the author of the issue.
-        if obj.author != request.user:
+        if obj.author_id != request.user.pk:
             if view.action == "destroy":
                 # If the action is 'destroy' (DELETE), only the author can delete the issue.
                 raise PermissionDenied("Only the author can delete this issue.")
@@ -99,14 +99,13 @@ class IsContributorToProjectOfIssue(BasePermission):
         # Extract the issue ID from the URL parameters
         issue_pk = view.kwargs.get('issue_pk')
 
-        try:
-            # Retrieve the issue and its related project
-            issue = Issue.objects.get(pk=issue_pk)
-        except Issue.DoesNotExist:
+        # Retrieve the issue, its related project and the user's membership in one query
+        issue, membership = get_issue_membership(request, issue_pk, archived=view.reads_archive())
+        if issue is None:
             raise NotFound(detail="The requested resource is not available or does not exist")
 
         # Check if the user is a contributor to the project
-        is_contributor = issue.project.contributors.filter(pk=request.user.pk).exists()
+        is_contributor = membership.is_contributor
 
         if not is_contributor:
             if view.action == "create":
@@ -128,7 +127,7 @@ class IsCommentAuthor(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # Check if the current user is the author of the comment.
-        if obj.author != request.user:
+        if obj.author_id != request.user.pk:
             if view.action == 'destroy':
                 # If the action is 'destroy' (DELETE), only the author can delete the comment.
                 raise PermissionDenied(detail="Only the author can delete this comment.")
@@ -0,0 +1,180 @@
+"""
+Versioned cache of the responses of the issue, comment and contributor endpoints and of the project details.
+
+Many contributors of a project send the same requests. The data of a `list` or `retrieve` response
+is cached under a key made of the version of its project, a version shared by all the projects,
+and the absolute URL of the request (query string included). The permissions are checked before
+the cache is read, and the cached data does not depend on the requesting user.
+
+Any change to a project, its issues, comments or contributors bumps the version of the project
+(see `project_management_app.signals`), and so does any change to the public fields of a user
+shown in its responses, e.g. the username or the `can_data_be_shared` preference read by
+`AuthorSerializerMixin` (see `user_contrib_app.signals`). The shared version is bumped by the
+changes made to all the projects at once. The previous entries are never read again and expire
+after `RESPONSE_CACHE_TIMEOUT` seconds. The versions are also part of the ETags of the responses,
+which would otherwise miss the changes to the users they show.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from rest_framework import status
+from rest_framework.response import Response
+
+from SoftDeskSupportAPI.replicas import replica_cache_timeout
+
+
+class ResponseCache:
+    """
+    Response data per (project version, shared version, request URL), with the hit and miss
+    counters of the process.
+    """
+    key_prefix = "softdesk:responses"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def timeout(self):
+        return getattr(settings, "RESPONSE_CACHE_TIMEOUT", 60)
+
+    def _version_key(self, name):
+        return f"{self.key_prefix}:version:{name}"
+
+    def _get_versions(self, project_pk):
+        """
+        Returns the versions of the project and of all the projects, initializing the missing ones
+        with a time based value, so that an evicted version never points back to stale entries.
+        """
+        keys = [self._version_key(project_pk), self._version_key("all")]
+        versions = cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                cache.add(key, time.time_ns(), timeout=None)
+                versions[key] = cache.get(key)
+        return [versions[key] for key in keys]
+
+    def _bump(self, name):
+        key = self._version_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The version does not exist (never used or evicted): start a new one.
+            cache.set(key, time.time_ns(), timeout=None)
+
+    def _bump_now_and_on_commit(self, name):
+        self._bump(name)
+        # A response cached before the transaction commits holds the previous rows: bump again after it.
+        transaction.on_commit(lambda: self._bump(name))
+
+    def get_version(self, project_pk):
+        """
+        Returns the current version of the responses of the project, both versions in one string.
+        """
+        version, shared_version = self._get_versions(project_pk)
+        return f"{version}:{shared_version}"
+
+    def get_key(self, project_pk, *parts):
+        """
+        Returns the key of the response identified by `parts` in the current version of the project.
+        """
+        version, shared_version = self._get_versions(project_pk)
+        digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+        return f"{self.key_prefix}:{project_pk}:{version}:{shared_version}:{digest}"
+
+    def get(self, key):
+        """
+        Returns the cached entry, or None on a miss.
+        """
+        entry = cache.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def set(self, key, entry):
+        # Data read from a replica may be behind: it is kept no longer than the replica pin.
+        cache.set(key, entry, timeout=replica_cache_timeout(self.timeout))
+
+    def invalidate(self, project_pk):
+        """
+        Bumps the version of the project so that its cached responses are ignored.
+        """
+        self._bump_now_and_on_commit(project_pk)
+
+    def invalidate_all(self):
+        """
+        Bumps the version shared by all the projects, e.g. when a user profile shown in the responses changes.
+        """
+        self._bump_now_and_on_commit("all")
+
+    def stats(self):
+        """
+        Returns the hit and miss counters of this process.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+response_cache = ResponseCache()
+
+
+class ResponseCacheMixin:
+    """
+    Viewset mixin serving `list` and `retrieve` from the response cache. It must come before the
+    classes defining these actions in the bases, so that a hit skips them entirely.
+    """
+
+    def get_cache_project_pk(self):
+        """
+        Returns the primary key of the project whose version keys the response, or None not to
+        cache it. It is called after the permission checks of the action.
+        """
+        return self.kwargs.get("project_pk")
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        """
+        Returns the cached response of the request, or the response of `handler`, cached when successful.
+        The validators (ETag, Last-Modified) computed by the handler are cached with the data.
+        """
+        project_pk = self.get_cache_project_pk() if response_cache.timeout else None
+        if project_pk is None:
+            return handler(request, *args, **kwargs)
+
+        # The response is the same for all the users of the project, and so are its validators.
+        self.shared_response = True
+        key = response_cache.get_key(project_pk, self.action, request.build_absolute_uri())
+        entry = response_cache.get(key)
+        if entry is not None:
+            data, self.etag, self.last_modified = entry
+            if self.etag is not None:
+                last_modified = int(self.last_modified.timestamp()) if self.last_modified else None
+                not_modified = get_conditional_response(request, etag=self.etag, last_modified=last_modified)
+                if not_modified is not None:
+                    return not_modified
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set(key, (response.data, getattr(self, "etag", None),
+                                     getattr(self, "last_modified", None)))
+        return response
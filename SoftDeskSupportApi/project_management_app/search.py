@@ -0,0 +1,232 @@
+import abc
+import functools
+import re
+import uuid
+
+from django.conf import settings
+from django.db import connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from project_management_app.models import Project
+from project_management_app.models import Issue
+from project_management_app.models import Comment
+
+DEFAULT_SEARCH_BACKEND = "project_management_app.search.SQLiteFTS5SearchBackend"
+
+
+def search_terms(query):
+    """
+    Returns the words of a search query, ignoring operators and punctuation.
+    """
+    return re.findall(r"\w+", query)
+
+
+class SearchBackend(abc.ABC):
+    """
+    Keeps a search index of the issues and comments in sync and searches it.
+
+    Each result is a dictionary with the `type` ("issue" or "comment"), `id`, `issue`, `project`
+    and a `snippet` of the matching text, in decreasing order of relevance.
+    """
+
+    def index_issues(self, issues):
+        pass
+
+    def index_comments(self, comments):
+        pass
+
+    def remove_issue(self, issue_pk):
+        pass
+
+    def remove_comment(self, comment_pk):
+        pass
+
+    def remove_issues(self, issue_pks):
+        for issue_pk in issue_pks:
+            self.remove_issue(issue_pk)
+
+    def remove_comments(self, comment_pks):
+        for comment_pk in comment_pks:
+            self.remove_comment(comment_pk)
+
+    def rebuild(self):
+        """
+        Rebuilds the whole index and returns the number of indexed documents.
+        """
+        return 0
+
+    @abc.abstractmethod
+    def search(self, user, query, limit):
+        """
+        Returns up to `limit` results matching the words of `query` in the projects of `user`.
+        """
+
+
+class SimpleSearchBackend(SearchBackend):
+    """
+    Portable backend without an index, for databases without a full-text search backend.
+    It scans the issues and comments of the user's projects and returns the most recent matching
+    issues, then comments.
+    """
+
+    def search(self, user, query, limit):
+        projects = Project.objects.visible_to(user).values("pk")
+        text = Q()
+        comment_text = Q()
+        for term in search_terms(query):
+            text &= Q(title__icontains=term) | Q(description__icontains=term)
+            comment_text &= Q(description__icontains=term)
+
+        issues = (Issue.objects.filter(text, project_id__in=projects)
+                  .order_by("-created_time").values("id", "project_id", "description")[:limit])
+        comments = (Comment.objects.filter(comment_text, issue__project_id__in=projects)
+                    .order_by("-created_time").values("id", "issue_id", "issue__project_id", "description")[:limit])
+        results = [
+            {"type": "issue", "id": issue["id"], "issue": issue["id"], "project": issue["project_id"],
+             "snippet": issue["description"][:200]}
+            for issue in issues
+        ] + [
+            {"type": "comment", "id": str(comment["id"]), "issue": comment["issue_id"],
+             "project": comment["issue__project_id"], "snippet": comment["description"][:200]}
+            for comment in comments
+        ]
+        return results[:limit]
+
+
+class SQLiteFTS5SearchBackend(SearchBackend):
+    """
+    Backend using an SQLite FTS5 table ranked with bm25, created by the migrations on SQLite.
+
+    `document_table` maps each FTS row (by rowid) to its issue or comment and project, so that
+    updates and deletions find their row through an index instead of scanning the FTS table.
+    """
+    document_table = "project_management_app_search_document"
+    fts_table = "project_management_app_search_fts"
+    # Weights of the title and body columns in the bm25 ranking.
+    title_weight = 10.0
+    body_weight = 1.0
+
+    # Documents written per statement, below the SQLite limit of query parameters.
+    batch_size = 500
+
+    def index_documents(self, kind, documents):
+        """
+        Inserts or replaces `(object_id, issue_id, project_id, title, body)` documents of `kind`,
+        with the same three statements whatever their number.
+        """
+        documents = list(documents)
+        # No savepoint: a failure rolls back the change being indexed as well.
+        with transaction.atomic(savepoint=False), connection.cursor() as cursor:
+            for start in range(0, len(documents), self.batch_size):
+                batch = documents[start:start + self.batch_size]
+                cursor.executemany(
+                    f"INSERT INTO {self.document_table} (kind, object_id, issue_id, project_id) "
+                    f"VALUES (%s, %s, %s, %s) "
+                    f"ON CONFLICT (kind, object_id) DO UPDATE SET project_id = excluded.project_id",
+                    [(kind, object_id, issue_id, project_id)
+                     for object_id, issue_id, project_id, title, body in batch])
+                placeholders = ", ".join(["%s"] * len(batch))
+                cursor.execute(
+                    f"DELETE FROM {self.fts_table} WHERE rowid IN (SELECT rowid FROM {self.document_table} "
+                    f"WHERE kind = %s AND object_id IN ({placeholders}))",
+                    [kind, *[document[0] for document in batch]])
+                cursor.executemany(
+                    f"INSERT INTO {self.fts_table} (rowid, title, body) SELECT rowid, %s, %s "
+                    f"FROM {self.document_table} WHERE kind = %s AND object_id = %s",
+                    [(title, body, kind, object_id) for object_id, issue_id, project_id, title, body in batch])
+
+    def index_issues(self, issues):
+        self.index_documents("issue", (
+            (str(issue.pk), issue.pk, issue.project_id, issue.title, issue.description)
+            for issue in issues))
+
+    def index_comments(self, comments):
+        # Read the projects of the issues that are not loaded yet with one query.
+        issue_projects = {comment.issue_id: comment.issue.project_id
+                          for comment in comments if Comment.issue.is_cached(comment)}
+        missing = {comment.issue_id for comment in comments} - set(issue_projects)
+        if missing:
+            issue_projects.update(Issue.objects.filter(pk__in=missing).values_list("pk", "project_id"))
+        self.index_documents("comment", (
+            (comment.pk.hex, comment.issue_id, issue_projects[comment.issue_id], "", comment.description)
+            for comment in comments))
+
+    def remove_documents(self, where, params):
+        with transaction.atomic(savepoint=False), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.fts_table} WHERE rowid IN "
+                           f"(SELECT rowid FROM {self.document_table} WHERE {where})", params)
+            cursor.execute(f"DELETE FROM {self.document_table} WHERE {where}", params)
+
+    def remove_issue(self, issue_pk):
+        # The comments of the issue are removed with it.
+        self.remove_documents("issue_id = %s", [issue_pk])
+
+    def remove_comment(self, comment_pk):
+        self.remove_documents("kind = 'comment' AND object_id = %s", [uuid.UUID(str(comment_pk)).hex])
+
+    def remove_issues(self, issue_pks):
+        issue_pks = list(issue_pks)
+        for start in range(0, len(issue_pks), self.batch_size):
+            batch = issue_pks[start:start + self.batch_size]
+            self.remove_documents(f"issue_id IN ({', '.join(['%s'] * len(batch))})", batch)
+
+    def remove_comments(self, comment_pks):
+        object_ids = [uuid.UUID(str(comment_pk)).hex for comment_pk in comment_pks]
+        for start in range(0, len(object_ids), self.batch_size):
+            batch = object_ids[start:start + self.batch_size]
+            self.remove_documents(f"kind = 'comment' AND object_id IN ({', '.join(['%s'] * len(batch))})", batch)
+
+    def rebuild(self):
+        issue_table = Issue._meta.db_table
+        comment_table = Comment._meta.db_table
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.fts_table}")
+            cursor.execute(f"DELETE FROM {self.document_table}")
+            cursor.execute(f"INSERT INTO {self.document_table} (kind, object_id, issue_id, project_id) "
+                           f"SELECT 'issue', CAST(id AS TEXT), id, project_id FROM {issue_table}")
+            cursor.execute(f"INSERT INTO {self.document_table} (kind, object_id, issue_id, project_id) "
+                           f"SELECT 'comment', c.id, c.issue_id, i.project_id FROM {comment_table} c "
+                           f"JOIN {issue_table} i ON i.id = c.issue_id")
+            cursor.execute(f"INSERT INTO {self.fts_table} (rowid, title, body) "
+                           f"SELECT d.rowid, i.title, i.description FROM {self.document_table} d "
+                           f"JOIN {issue_table} i ON i.id = d.issue_id WHERE d.kind = 'issue'")
+            cursor.execute(f"INSERT INTO {self.fts_table} (rowid, title, body) "
+                           f"SELECT d.rowid, '', c.description FROM {self.document_table} d "
+                           f"JOIN {comment_table} c ON c.id = d.object_id WHERE d.kind = 'comment'")
+            # Merge the index segments written by the bulk inserts.
+            cursor.execute(f"INSERT INTO {self.fts_table} ({self.fts_table}) VALUES ('optimize')")
+            cursor.execute(f"SELECT COUNT(*) FROM {self.document_table}")
+            return cursor.fetchone()[0]
+
+    def search(self, user, query, limit):
+        # Quote each word so that user input is never parsed as FTS5 query syntax.
+        match = " ".join(f'"{term}"' for term in search_terms(query))
+        projects_sql, projects_params = Project.objects.visible_to(user).values("pk").query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT d.kind, d.object_id, d.issue_id, d.project_id, "
+                f"snippet({self.fts_table}, -1, '[', ']', '...', 16) "
+                f"FROM {self.fts_table} JOIN {self.document_table} d ON d.rowid = {self.fts_table}.rowid "
+                f"WHERE {self.fts_table} MATCH %s AND d.project_id IN ({projects_sql}) "
+                f"ORDER BY bm25({self.fts_table}, {self.title_weight}, {self.body_weight}) LIMIT %s",
+                [match, *projects_params, limit])
+            rows = cursor.fetchall()
+        return [
+            {"type": kind, "id": int(object_id) if kind == "issue" else str(uuid.UUID(object_id)),
+             "issue": issue_id, "project": project_id, "snippet": snippet}
+            for kind, object_id, issue_id, project_id, snippet in rows
+        ]
+
+
+@functools.lru_cache
+def load_search_backend(path):
+    return import_string(path)()
+
+
+def get_search_backend():
+    """
+    Returns the backend configured by the `SEARCH_BACKEND` setting.
+    """
+    return load_search_backend(getattr(settings, "SEARCH_BACKEND", DEFAULT_SEARCH_BACKEND))
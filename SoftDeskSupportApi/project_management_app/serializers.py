@@ -6,10 +6,28 @@ from rest_framework import serializers
 from project_management_app.models import Project
 from project_management_app.models import Issue
 from project_management_app.models import Comment
+from project_management_app.models import DeletionJob
 from project_management_app.models import CustomUser
+from project_management_app.models import issue_counter_lookups
+from project_management_app.membership import is_project_contributor
+from project_management_app.search import search_terms
 from user_contrib_app.serializers import CustomUserSerializer
 
 
+ISSUE_COUNT_FIELDS = tuple(field for field, lookup in issue_counter_lookups())
+
+
+def issue_counts_representation(counts):
+    """
+    Builds the `issue_counts` representation from the counts in `ISSUE_COUNT_FIELDS` order.
+    """
+    statuses = len(Issue.STATUS_CHOICES)
+    return {
+        "status": dict(zip([status for status, label in Issue.STATUS_CHOICES], counts[:statuses])),
+        "priority": dict(zip([priority for priority, label in Issue.PRIORITY_CHOICES], counts[statuses:])),
+    }
+
+
 class AuthorSerializerMixin(serializers.Serializer):
     """
     A mixin serializer to include author information based on user's data sharing preferences.
@@ -32,10 +50,18 @@ class ProjectListSerializer(ModelSerializer):
     Serializer for listing projects with a URL to detailed view.
     """
     url = HyperlinkedIdentityField(view_name="projects-detail", read_only=True)
+    issue_counts = serializers.SerializerMethodField()
 
     class Meta:
         model = Project
-        fields = ["url", "name", "description", "type"]
+        fields = ["url", "name", "description", "type", "issue_counts"]
+
+    def get_issue_counts(self, instance):
+        """
+        Returns the number of issues per status and per priority, from the counters of the project.
+        """
+        return issue_counts_representation(
+            [getattr(instance, name) for name in ISSUE_COUNT_FIELDS])
 
 
 class IssueListSerializer(ModelSerializer):
@@ -49,7 +75,8 @@ class IssueListSerializer(ModelSerializer):
 
     class Meta:
         model = Issue
-        fields = ["id", "title", "description", "status", "priority", "tag", "assignee"]
+        fields = ["id", "title", "description", "status", "priority", "tag", "assignee", "comment_count"]
+        read_only_fields = ["comment_count"]
 
     def validate_assignee(self, value):
         """
@@ -61,11 +88,24 @@ class IssueListSerializer(ModelSerializer):
             raise serializers.ValidationError("Project context is missing.")
 
         # Check if the assignee is a contributor of the project
-        if value and value not in project.contributors.all():
+        if value and not is_project_contributor(project, value):
             raise serializers.ValidationError("The assigned user must be a contributor of the project.")
         return value
 
 
+class IssueBulkItemSerializer(ModelSerializer):
+    """
+    Validates one item of a bulk issue creation or update. The assignee is kept as a username:
+    the view resolves the assignees of all the items with a single query.
+    """
+    id = serializers.IntegerField(required=False)
+    assignee = CharField(required=False, allow_null=True)
+
+    class Meta:
+        model = Issue
+        fields = ["id", "title", "description", "status", "priority", "tag", "assignee"]
+
+
 class ProjectDetailSerializer(AuthorSerializerMixin, ModelSerializer):
     """
     Detailed serializer for projects, including author, issues, and contributors.
@@ -97,7 +137,8 @@ class IssueDetailSerializer(AuthorSerializerMixin, ModelSerializer):
 
     class Meta:
         model = Issue
-        fields = ("id", "title", "description", "status", "priority", "tag", "project", "assignee", "author")
+        fields = ("id", "title", "description", "status", "priority", "tag", "project", "assignee", "author",
+                  "comment_count")
 
 
 class CommentDetailSerializer(ModelSerializer):
@@ -119,3 +160,44 @@ class CommentListSerializer(ModelSerializer):
     class Meta:
         model = Comment
         fields = ["id", "description"]
+
+
+class CommentChangeSerializer(ModelSerializer):
+    """
+    Comment of the change log, with the ID of its issue.
+    """
+    class Meta:
+        model = Comment
+        fields = ["id", "issue", "description"]
+
+
+class ChangesQuerySerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the change log endpoint.
+    """
+    since = serializers.IntegerField(min_value=0, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=500)
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the search endpoint.
+    """
+    q = CharField()
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate_q(self, value):
+        if not search_terms(value):
+            raise serializers.ValidationError("The search must contain at least one word.")
+        return value
+
+
+class DeletionJobSerializer(ModelSerializer):
+    """
+    Progress of a deletion: its status and the number of rows deleted so far per model.
+    """
+    url = HyperlinkedIdentityField(view_name="deletion-detail", read_only=True)
+
+    class Meta:
+        model = DeletionJob
+        fields = ["url", "id", "kind", "object_id", "status", "deleted", "created_time", "finished_time"]
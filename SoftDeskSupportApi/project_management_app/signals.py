@@ -0,0 +1,313 @@
+from collections import Counter
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_save
+from django.db.models.signals import post_delete
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+
+from project_management_app.models import Project
+from project_management_app.models import Issue
+from project_management_app.models import Comment
+from project_management_app.models import ChangeLogEntry
+from project_management_app.models import issue_status_counter
+from project_management_app.models import issue_priority_counter
+from project_management_app.membership import membership_cache
+from project_management_app.response_cache import response_cache
+from project_management_app.search import get_search_backend
+from user_contrib_app.models import Contributor
+
+# Changes to apply at the end of a `deferred_project_touches` block, or None outside of one.
+_deferred_changes = ContextVar("deferred_project_touches", default=None)
+
+
+class PendingChanges:
+    """
+    Changes to the projects and their issue counters, to the comment counters of the issues,
+    to the search index, to the cached responses and to the change log.
+    """
+
+    def __init__(self):
+        # Counter deltas of each changed project, None for the projects to recount.
+        self.projects = {}
+        # Comment count delta of each issue.
+        self.issues = Counter()
+        # Deleted issues and comments, to remove from the search index.
+        self.removed_issues = []
+        self.removed_comments = []
+        # Other projects, and issues of projects, whose cached responses are invalidated.
+        self.cached_projects = set()
+        self.cached_issues = set()
+        # Entries of the change log, as (project pk, issue pk, model, object ID, action): the project
+        # of a comment is looked up from its issue.
+        self.change_log = []
+        # Action logged for the deleted rows: "archived" when they move to the archive, None not to
+        # log them, e.g. for the rows of a deleted project.
+        self.deleted_action = "deleted"
+
+    def log(self, model, object_id, action, project_pk=None, issue_pk=None):
+        if action == "deleted":
+            action = self.deleted_action
+        if action is not None:
+            self.change_log.append((project_pk, issue_pk, model, object_id, action))
+
+    def change_project(self, project_pk, deltas=None, recount=False):
+        if recount or (project_pk in self.projects and self.projects[project_pk] is None):
+            self.projects[project_pk] = None
+        else:
+            self.projects.setdefault(project_pk, Counter()).update(deltas or {})
+
+    def change_issue(self, issue_pk, delta):
+        self.issues[issue_pk] += delta
+
+    def apply(self):
+        touched = []
+        for project_pk, deltas in self.projects.items():
+            if deltas is None or not any(deltas.values()):
+                touched.append(project_pk)
+            else:
+                Project.objects.filter(pk=project_pk).update_counters(deltas)
+        if touched:
+            Project.objects.filter(pk__in=touched).touch()
+        recounted = [project_pk for project_pk, deltas in self.projects.items() if deltas is None]
+        if recounted:
+            Project.objects.filter(pk__in=recounted).recount_issues()
+
+        # One query per distinct delta, e.g. for the issues losing one comment each.
+        issues = defaultdict(list)
+        for issue_pk, delta in self.issues.items():
+            if delta:
+                issues[delta].append(issue_pk)
+        for delta, issue_pks in issues.items():
+            Issue.objects.filter(pk__in=issue_pks).update(comment_count=F("comment_count") + delta,
+                                                          updated_time=timezone.now())
+
+        if self.removed_issues:
+            get_search_backend().remove_issues(self.removed_issues)
+        if self.removed_comments:
+            get_search_backend().remove_comments(self.removed_comments)
+
+        # The projects of the issues, looked up at once. The issues deleted in the same batch, e.g.
+        # with their comments, are no longer found but are in the change log with their project.
+        issue_projects = {object_id: project_pk for project_pk, issue_pk, model, object_id, action
+                          in self.change_log if model == "issue"}
+        issues = self.cached_issues.union(issue_pk for project_pk, issue_pk, *entry in self.change_log
+                                          if project_pk is None).difference(issue_projects)
+        if issues:
+            issue_projects.update(Issue.objects.filter(pk__in=issues).values_list("pk", "project_id"))
+
+        cached_projects = self.cached_projects.union(self.projects)
+        cached_projects.update(issue_projects[issue_pk] for issue_pk in self.cached_issues
+                               if issue_pk in issue_projects)
+        for project_pk in cached_projects:
+            response_cache.invalidate(project_pk)
+
+        entries = []
+        for project_pk, issue_pk, model, object_id, action in self.change_log:
+            project_pk = project_pk or issue_projects.get(issue_pk)
+            if project_pk is not None:
+                entries.append(ChangeLogEntry(project_id=project_pk, model=model, object_id=str(object_id),
+                                              action=action))
+        if entries:
+            ChangeLogEntry.objects.bulk_create(entries)
+
+
+@contextmanager
+def deferred_project_touches():
+    """
+    Updates each project and issue changed in the block, and the search index, once at its end
+    instead of once per signal, e.g. for a queryset `delete()` sending `post_delete` for every row.
+    Yields the `PendingChanges`, to which the block can add its own changes.
+    """
+    changes = PendingChanges()
+    token = _deferred_changes.set(changes)
+    try:
+        yield changes
+    finally:
+        _deferred_changes.reset(token)
+    changes.apply()
+
+
+def _record(callback):
+    """
+    Calls `callback` with the changes of the current `deferred_project_touches` block, or with
+    changes applied at once outside of a block.
+    """
+    deferred = _deferred_changes.get()
+    changes = deferred if deferred is not None else PendingChanges()
+    callback(changes)
+    if deferred is None:
+        changes.apply()
+
+
+@receiver(post_save, sender=Contributor)
+@receiver(post_delete, sender=Contributor)
+def invalidate_contributor_membership(sender, instance, **kwargs):
+    """
+    Invalidates the cached memberships of the project when a contributor is added or removed.
+    """
+    membership_cache.invalidate(instance.project_id)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_membership(sender, instance, **kwargs):
+    """
+    Invalidates the cached memberships of the project when it is saved (the author may have changed)
+    or deleted.
+    """
+    membership_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_responses(sender, instance, **kwargs):
+    """
+    Invalidates the cached responses of the project when it is saved or deleted. The changes to its
+    issues and contributors invalidate them through `touch_project` and the issue counters.
+    """
+    _record(lambda changes: changes.cached_projects.add(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_responses(sender, instance, **kwargs):
+    """
+    Invalidates the cached responses of the project of the comment, looked up with the other
+    changed comments when the issue is not loaded.
+    """
+    if Comment.issue.is_cached(instance):
+        project_pk = instance.issue.project_id
+        _record(lambda changes: changes.cached_projects.add(project_pk))
+    else:
+        _record(lambda changes: changes.cached_issues.add(instance.issue_id))
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Issue)
+@receiver(post_save, sender=Contributor)
+def log_saved_row(sender, instance, created, **kwargs):
+    """
+    Adds the creation or update of a project, an issue or a contributor to the change log.
+    """
+    action = "created" if created else "updated"
+    if sender is Project:
+        _record(lambda changes: changes.log("project", instance.pk, action, project_pk=instance.pk))
+    elif sender is Issue:
+        _record(lambda changes: changes.log("issue", instance.pk, action, project_pk=instance.project_id))
+    else:
+        _record(lambda changes: changes.log("contributor", instance.user_id, action,
+                                            project_pk=instance.project_id))
+
+
+@receiver(post_delete, sender=Issue)
+@receiver(post_delete, sender=Contributor)
+def log_deleted_row(sender, instance, **kwargs):
+    """
+    Adds a tombstone of the issue or contributor to the change log. A deleted project has no
+    change log anymore.
+    """
+    if sender is Issue:
+        _record(lambda changes: changes.log("issue", instance.pk, "deleted", project_pk=instance.project_id))
+    else:
+        _record(lambda changes: changes.log("contributor", instance.user_id, "deleted",
+                                            project_pk=instance.project_id))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def log_comment(sender, instance, created=False, **kwargs):
+    """
+    Adds the creation, update or deletion of the comment to the change log of the project of its issue.
+    """
+    action = "deleted" if kwargs["signal"] is post_delete else "created" if created else "updated"
+    project_pk = instance.issue.project_id if Comment.issue.is_cached(instance) else None
+    _record(lambda changes: changes.log("comment", instance.pk, action, project_pk=project_pk,
+                                        issue_pk=instance.issue_id))
+
+
+@receiver(post_save, sender=Contributor)
+@receiver(post_delete, sender=Contributor)
+def touch_project(sender, instance, **kwargs):
+    """
+    Updates the `updated_time` of the project when one of its contributors changes,
+    so that the validators (ETag, Last-Modified) of the project responses change too.
+    """
+    _record(lambda changes: changes.change_project(instance.project_id))
+
+
+@receiver(post_save, sender=Issue)
+def count_saved_issue(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Moves the issue between the counters of its project when its status or priority changes,
+    and updates the `updated_time` of the project (the issues are part of its responses).
+    """
+    stored = {} if created else getattr(instance, "_counted_values", {})
+    saved = {name: instance.__dict__.get(name) if update_fields is None or name in update_fields
+             else stored.get(name)
+             for name in ("status", "priority")}
+    project_pk = instance.project_id
+    if None in saved.values() or not (created or stored.keys() == saved.keys()):
+        # Values not loaded: count the issues of the project again.
+        _record(lambda changes: changes.change_project(project_pk, recount=True))
+    else:
+        deltas = Counter([issue_status_counter(saved["status"]), issue_priority_counter(saved["priority"])])
+        if not created:
+            deltas.subtract([issue_status_counter(stored["status"]),
+                             issue_priority_counter(stored["priority"])])
+        _record(lambda changes: changes.change_project(project_pk, deltas))
+    instance._counted_values = {name: value for name, value in saved.items() if value is not None}
+
+
+@receiver(post_delete, sender=Issue)
+def count_deleted_issue(sender, instance, **kwargs):
+    counters = instance.counters(stored=True) or instance.counters()
+    project_pk = instance.project_id
+    if counters is None:
+        _record(lambda changes: changes.change_project(project_pk, recount=True))
+    else:
+        _record(lambda changes: changes.change_project(project_pk, Counter({field: -1 for field in counters})))
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    """
+    Updates the comment counter of the issue, and its `updated_time` (the counter is part
+    of the issue responses).
+    """
+    if created:
+        _record(lambda changes: changes.change_issue(instance.issue_id, 1))
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    _record(lambda changes: changes.change_issue(instance.issue_id, -1))
+
+
+@receiver(post_save, sender=Issue)
+def index_issue(sender, instance, **kwargs):
+    """
+    Adds the issue to the search index, or updates it.
+    """
+    get_search_backend().index_issues([instance])
+
+
+@receiver(post_delete, sender=Issue)
+def remove_issue_from_index(sender, instance, **kwargs):
+    _record(lambda changes: changes.removed_issues.append(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    """
+    Adds the comment to the search index, or updates it.
+    """
+    get_search_backend().index_comments([instance])
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment_from_index(sender, instance, **kwargs):
+    _record(lambda changes: changes.removed_comments.append(instance.pk))
@@ -1,3 +1,1595 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import os
+import runpy
+import sqlite3
+import sys
+import tempfile
+import threading
+from collections import Counter
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.signals import got_request_exception
+from django.db import connection
+from django.db import connections
+from django.db import models
+from django.db import OperationalError
+from django.db import router
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import APITestCase
+from rest_framework.test import APITransactionTestCase
+from rest_framework.test import force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from SoftDeskSupportAPI import settings as settings_module
+from SoftDeskSupportAPI.database import apply_sqlite_pragmas
+from SoftDeskSupportAPI.metrics import MetricsMiddleware
+from SoftDeskSupportAPI.metrics import registry
+from SoftDeskSupportAPI.replicas import ReplicaRoutingMiddleware
+from SoftDeskSupportAPI.replicas import reading_from_replica
+from project_management_app.models import Project
+from project_management_app.models import Issue
+from project_management_app.models import Comment
+from project_management_app.models import DeletionJob
+from project_management_app.models import ArchivedIssue
+from project_management_app.models import ArchivedComment
+from project_management_app.models import ChangeLogEntry
+from project_management_app.deletion import JobClaimLost
+from project_management_app.deletion import claim_next_job
+from project_management_app.deletion import delete_batch
+from project_management_app.management.commands.stress_writes import Command as StressWritesCommand
+from project_management_app.deletion import process_job
+from project_management_app.deletion import request_project_deletion
+from project_management_app.membership import membership_cache
+from project_management_app.response_cache import response_cache
+from project_management_app.search import SQLiteFTS5SearchBackend
+from project_management_app.views import IssueViewSet
+from user_contrib_app.authentication import user_cache
+from user_contrib_app.models import CustomUser
+from user_contrib_app.models import Contributor
+
+
+class ProjectManagementTestCase(APITestCase):
+    """
+    Base test case creating a project with an author, a contributor and an outsider.
+    """
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        membership_cache.reset_stats()
+        response_cache.reset_stats()
+        registry.reset()
+
+        self.author = CustomUser.objects.create(username="author", age=30)
+        self.contributor = CustomUser.objects.create(username="contributor", age=30)
+        self.outsider = CustomUser.objects.create(username="outsider", age=30)
+
+        self.project = Project.objects.create(name="Project", description="Description",
+                                              type="backend", author=self.author)
+        Contributor.objects.create(user=self.author, project=self.project)
+        Contributor.objects.create(user=self.contributor, project=self.project)
+
+    def create_issue(self, **kwargs):
+        data = {"title": "Issue", "description": "Description", "tag": "bug",
+                "project": self.project, "author": self.author}
+        data.update(kwargs)
+        return Issue.objects.create(**data)
+
+    def create_comment(self, issue, **kwargs):
+        data = {"description": "Comment", "author": self.author, "issue": issue}
+        data.update(kwargs)
+        return Comment.objects.create(**data)
+
+    def issues_url(self, project=None):
+        return f"/api/projects/{(project or self.project).pk}/issues/"
+
+    def comments_url(self, issue):
+        return f"/api/projects/{issue.project_id}/issues/{issue.pk}/comments/"
+
+
+class ProjectMembershipTests(ProjectManagementTestCase):
+
+    def test_issue_create_resolves_project_once(self):
+        self.client.force_authenticate(self.contributor)
+        # Membership, assignee lookup, assignee membership, insert, change log, project update and
+        # the three statements of the search index.
+        with self.assertNumQueries(9):
+            response = self.client.post(self.issues_url(), {
+                "title": "New", "description": "Desc", "tag": "bug", "assignee": "author",
+            })
+        self.assertEqual(response.status_code, 201)
+
+    def test_assignee_must_be_contributor(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.post(self.issues_url(), {
+            "title": "New", "description": "Desc", "tag": "bug", "assignee": "outsider",
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("assignee", response.data)
+
+    def test_outsider_cannot_list_issues(self):
+        self.client.force_authenticate(self.outsider)
+        response = self.client.get(self.issues_url())
+        self.assertEqual(response.status_code, 403)
+
+    def test_unknown_project_returns_not_found(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get("/api/projects/999/issues/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_comment_permissions_use_issue_membership(self):
+        issue = self.create_issue()
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.client.get(self.comments_url(issue)).status_code, 403)
+
+        self.client.force_authenticate(self.contributor)
+        response = self.client.post(self.comments_url(issue), {"description": "Hello"})
+        self.assertEqual(response.status_code, 201)
+
+
+# The responses are not cached, so that the requests check the memberships.
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class MembershipCacheTests(ProjectManagementTestCase):
+
+    def test_membership_is_served_from_cache(self):
+        self.client.force_authenticate(self.contributor)
+        self.client.get(self.issues_url())
+        self.assertEqual(membership_cache.stats(), {"hits": 0, "misses": 1})
+
+        # Validators and page of issues only: the membership check needs no query.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.issues_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(membership_cache.stats()["hits"], 1)
+
+    def test_removing_contributor_invalidates_cache(self):
+        self.client.force_authenticate(self.contributor)
+        self.assertEqual(self.client.get(self.issues_url()).status_code, 200)
+
+        Contributor.objects.filter(user=self.contributor).delete()
+        self.assertEqual(self.client.get(self.issues_url()).status_code, 403)
+
+    def test_flags_read_during_a_removal_are_not_kept(self):
+        # A request reading the membership while the removal commits reads the previous flags, and
+        # caches them under the version it read before its query: before or after the first bump.
+        version_before = membership_cache.get_version(self.project.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Contributor.objects.filter(user=self.contributor).delete()
+                version_during = membership_cache.get_version(self.project.pk)
+                for version in (version_before, version_during):
+                    membership_cache.set(self.contributor.pk, self.project.pk, version, False, True)
+
+        self.client.force_authenticate(self.contributor)
+        self.assertEqual(self.client.get(self.issues_url()).status_code, 403)
+
+    def test_changing_project_author_invalidates_cache(self):
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.client.get(self.issues_url()).status_code, 403)
+
+        self.project.author = self.outsider
+        self.project.save()
+        self.assertEqual(self.client.get(self.issues_url()).status_code, 200)
+
+
+class QuerysetPlanTests(ProjectManagementTestCase):
+
+    def add_contributors(self, count):
+        users = CustomUser.objects.bulk_create(
+            [CustomUser(username=f"user{index}", age=30) for index in range(count)])
+        Contributor.objects.bulk_create([Contributor(user=user, project=self.project) for user in users])
+        return users
+
+    def test_issue_list_queries_do_not_depend_on_rows(self):
+        self.client.force_authenticate(self.contributor)
+        self.client.get(self.issues_url())
+        for user in self.add_contributors(5):
+            self.create_issue(assignee=user)
+
+        # Validators, count and page of issues with their assignees.
+        with self.assertNumQueries(3):
+            response = self.client.get(self.issues_url())
+        self.assertEqual([issue["assignee"] for issue in response.data["results"]],
+                         [f"user{index}" for index in range(5)])
+
+    def test_issue_detail_loads_relations_with_issue(self):
+        issue = self.create_issue(assignee=self.contributor)
+        self.client.force_authenticate(self.contributor)
+        self.client.get(self.issues_url())
+
+        # Validators and issue with its relations.
+        with self.assertNumQueries(2):
+            response = self.client.get(f"{self.issues_url()}{issue.pk}/")
+        self.assertEqual(response.data["project"], "Project")
+        self.assertEqual(response.data["assignee"], "contributor")
+        self.assertEqual(response.data["author"], "author")
+
+    def test_project_detail_queries_do_not_depend_on_contributors(self):
+        self.client.force_authenticate(self.contributor)
+        url = f"/api/projects/{self.project.pk}/"
+        self.client.get(url)
+        self.add_contributors(10)
+        for index in range(3):
+            self.create_issue(title=f"Issue {index}")
+
+        # Validators, project with its author, issues and contributors (the membership is cached).
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.data["author_username"], "author")
+        self.assertEqual(len(response.data["contributors"]), 12)
+        self.assertEqual(len(response.data["issues"]), 3)
+
+    def test_comment_detail_loads_author_with_comment(self):
+        issue = self.create_issue()
+        comment = self.create_comment(issue)
+        self.client.force_authenticate(self.contributor)
+
+        # Issue membership, validators and comment with its author.
+        with self.assertNumQueries(3):
+            response = self.client.get(f"{self.comments_url(issue)}{comment.pk}/")
+        self.assertEqual(response.data["author_username"], "author")
+
+
+class FastSerializerTestCase(ProjectManagementTestCase):
+    """
+    Base test case comparing the responses of the DRF and the fast serializers.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.add_data()
+        self.client.force_authenticate(self.contributor)
+
+    def add_data(self):
+        other = CustomUser.objects.create(username="shared", age=30, can_data_be_shared=True)
+        Contributor.objects.create(user=other, project=self.project)
+        for index in range(3):
+            issue = self.create_issue(title=f"Issue {index}", assignee=other if index else None)
+            self.create_comment(issue, author=other)
+            self.create_comment(issue, description="Élan ✓")
+        self.issue = issue
+        self.comment = issue.issue_comments.first()
+
+    def assertSameResponse(self, url):
+        with self.settings(FAST_SERIALIZATION=False):
+            expected = self.client.get(url)
+        with self.settings(FAST_SERIALIZATION=True):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+
+
+class FastSerializerTests(FastSerializerTestCase):
+
+    def test_project_endpoints_are_identical(self):
+        self.assertSameResponse("/api/projects/")
+        self.assertSameResponse(f"/api/projects/{self.project.pk}/")
+
+    def test_issue_endpoints_are_identical(self):
+        self.assertSameResponse(self.issues_url())
+        self.assertSameResponse(f"{self.issues_url()}?limit=2&offset=1")
+        self.assertSameResponse(f"{self.issues_url()}{self.issue.pk}/")
+
+    def test_comment_endpoints_are_identical(self):
+        self.assertSameResponse(self.comments_url(self.issue))
+        self.assertSameResponse(f"{self.comments_url(self.issue)}{self.comment.pk}/")
+
+    def test_object_permissions_are_checked(self):
+        self.client.force_authenticate(self.outsider)
+        with self.settings(FAST_SERIALIZATION=True):
+            response = self.client.get(f"/api/projects/{self.project.pk}/")
+        self.assertEqual(response.status_code, 403)
+
+
+class SparseFieldsTests(FastSerializerTestCase):
+
+    def get_columns(self, url):
+        """
+        Returns the response of `url` and the SQL of the queries it ran.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        return response, " ".join(query["sql"] for query in context.captured_queries)
+
+    def test_fields_selects_only_their_columns(self):
+        response, sql = self.get_columns(f"{self.issues_url()}?fields=id,title")
+        self.assertEqual(list(response.data["results"][0]), ["id", "title"])
+        self.assertNotIn('"project_management_app_issue"."description"', sql)
+        self.assertNotIn("JOIN", sql)
+
+        with self.settings(FAST_SERIALIZATION=True):
+            response, sql = self.get_columns(f"{self.issues_url()}?fields=id,title")
+        self.assertEqual(list(response.data["results"][0]), ["id", "title"])
+        self.assertNotIn('"project_management_app_issue"."description"', sql)
+
+    def test_omit_leaves_out_relations(self):
+        response, sql = self.get_columns(f"/api/projects/{self.project.pk}/?omit=issues,contributors")
+        self.assertNotIn("issues", response.data)
+        self.assertNotIn("contributors", response.data)
+        self.assertEqual(response.data["author_username"], "author")
+        self.assertNotIn("project_management_app_issue", sql)
+
+    def test_sparse_endpoints_are_identical(self):
+        self.assertSameResponse("/api/projects/?omit=description,issue_counts")
+        self.assertSameResponse(f"/api/projects/{self.project.pk}/?fields=name,issues")
+        self.assertSameResponse(f"{self.issues_url()}?fields=title,assignee&limit=2")
+        self.assertSameResponse(f"{self.issues_url()}?fields=title&cursor=")
+        self.assertSameResponse(f"{self.issues_url()}{self.issue.pk}/?omit=description,project,author")
+        self.assertSameResponse(f"{self.comments_url(self.issue)}?fields=id")
+        self.assertSameResponse(f"{self.comments_url(self.issue)}{self.comment.pk}/?omit=author_username")
+
+    def test_object_permissions_are_checked_without_their_fields(self):
+        self.client.force_authenticate(self.outsider)
+        response = self.client.get(f"/api/projects/{self.project.pk}/?fields=name")
+        self.assertEqual(response.status_code, 403)
+
+    def test_invalid_fields_are_rejected(self):
+        response = self.client.get(f"{self.issues_url()}?fields=title,secret")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("secret", response.data["fields"][0])
+        response = self.client.get(f"{self.issues_url()}?fields=title&omit=description")
+        self.assertEqual(response.status_code, 400)
+        token = AccessToken.for_user(self.contributor)
+        response = self.client.get(f"/api/async{self.issues_url().removeprefix('/api')}?omit=secret",
+                                   HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, 400)
+
+    def test_writes_ignore_fields(self):
+        response = self.client.post(f"{self.issues_url()}?fields=id", {"title": "New", "description": "New",
+                                                                      "tag": "bug"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["title"], "New")
+
+
+class KeysetPaginationTests(ProjectManagementTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issues = [self.create_issue(title=f"Issue {index}") for index in range(7)]
+        self.client.force_authenticate(self.contributor)
+
+    def test_pages_follow_creation_order(self):
+        response = self.client.get(f"{self.issues_url()}?cursor=&limit=3")
+        self.assertNotIn("count", response.data)
+        self.assertIsNone(response.data["previous"])
+        titles = [issue["title"] for issue in response.data["results"]]
+
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            titles += [issue["title"] for issue in response.data["results"]]
+        self.assertEqual(titles, [issue.title for issue in self.issues])
+
+        # Walking back from the last page returns the previous pages.
+        response = self.client.get(response.data["previous"])
+        self.assertEqual([issue["title"] for issue in response.data["results"]],
+                         ["Issue 3", "Issue 4", "Issue 5"])
+
+    def test_page_queries_do_not_use_offset_or_count(self):
+        first_page = self.client.get(f"{self.issues_url()}?cursor=&limit=2")
+        # Validators, then the page.
+        with self.assertNumQueries(2) as context:
+            self.client.get(first_page.data["next"])
+        sql = context.captured_queries[-1]["sql"]
+        self.assertNotIn("OFFSET", sql)
+        self.assertNotIn("COUNT", sql)
+
+    def test_pages_follow_requested_ordering(self):
+        expected = sorted((issue.title for issue in self.issues), reverse=True)
+        for fast_serialization in (False, True):
+            with self.subTest(fast_serialization=fast_serialization), \
+                    self.settings(FAST_SERIALIZATION=fast_serialization):
+                response = self.client.get(f"{self.issues_url()}?ordering=-title&cursor=&limit=3")
+                titles = [issue["title"] for issue in response.data["results"]]
+                while response.data["next"]:
+                    response = self.client.get(response.data["next"])
+                    titles += [issue["title"] for issue in response.data["results"]]
+                self.assertEqual(titles, expected)
+
+                response = self.client.get(response.data["previous"])
+                self.assertEqual([issue["title"] for issue in response.data["results"]], expected[3:6])
+
+    def test_invalid_cursor_returns_not_found(self):
+        response = self.client.get(f"{self.issues_url()}?cursor=garbage")
+        self.assertEqual(response.status_code, 404)
+
+    def test_comments_with_fast_serializers(self):
+        issue = self.issues[0]
+        comments = [self.create_comment(issue) for _ in range(3)]
+        with self.settings(FAST_SERIALIZATION=True):
+            response = self.client.get(f"{self.comments_url(issue)}?cursor=&limit=2")
+            next_page = self.client.get(response.data["next"])
+        ids = [comment["id"] for comment in response.data["results"] + next_page.data["results"]]
+        self.assertEqual(ids, [str(comment.pk) for comment in comments])
+
+
+class IssueFilterTests(ProjectManagementTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.create_issue(title="B", status="to_do", priority="high", assignee=self.contributor)
+        self.create_issue(title="A", status="in_progress", tag="feature")
+        self.create_issue(title="C", status="finished", priority="high", assignee=self.author)
+        self.client.force_authenticate(self.contributor)
+
+    def get_titles(self, query):
+        response = self.client.get(f"{self.issues_url()}?{query}")
+        self.assertEqual(response.status_code, 200)
+        return [issue["title"] for issue in response.data["results"]]
+
+    def test_filters(self):
+        self.assertEqual(self.get_titles("status=to_do,finished"), ["B", "C"])
+        self.assertEqual(self.get_titles("priority=high&status=finished"), ["C"])
+        self.assertEqual(self.get_titles("tag=feature"), ["A"])
+        self.assertEqual(self.get_titles("assignee=contributor"), ["B"])
+        self.assertEqual(self.get_titles("assignee="), ["A"])
+
+    def test_invalid_choice_is_rejected(self):
+        response = self.client.get(f"{self.issues_url()}?status=done")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("status", response.data)
+
+    def test_ordering(self):
+        self.assertEqual(self.get_titles("ordering=title"), ["A", "B", "C"])
+        self.assertEqual(self.get_titles("ordering=-created_time"), ["C", "A", "B"])
+
+    def get_list_queryset(self, query):
+        """
+        Returns the queryset of the issue list for the query string `query`, built by the view and its filters.
+        """
+        request = APIRequestFactory().get(f"{self.issues_url()}?{query}")
+        force_authenticate(request, self.contributor)
+        view = IssueViewSet(action="list", action_map={"get": "list"}, kwargs={"project_pk": self.project.pk},
+                            format_kwarg=None)
+        view.request = view.initialize_request(request)
+        return view.filter_queryset(view.get_queryset())
+
+    def test_status_filter_uses_index(self):
+        queryset = self.get_list_queryset("status=to_do")
+        self.assertIn('"status" IN', str(queryset.query))
+        self.assertIn("issue_project_status_idx", queryset.explain())
+
+    def test_assignee_filter_uses_index(self):
+        queryset = self.get_list_queryset("assignee=contributor")
+        # The assignee is selected by a subquery on the username, not a join.
+        self.assertIn('"assignee_id" = (SELECT', str(queryset.query))
+        self.assertIn("issue_project_assignee_idx", queryset.explain())
+        queryset = self.get_list_queryset("assignee=")
+        self.assertIn('"assignee_id" IS NULL', str(queryset.query))
+        self.assertIn("issue_project_assignee_idx", queryset.explain())
+
+
+class ProjectListTests(ProjectManagementTestCase):
+
+    def test_list_only_contains_visible_projects(self):
+        Project.objects.create(name="Other", description="Description", type="ios", author=self.outsider)
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get("/api/projects/")
+        self.assertEqual([project["name"] for project in response.data["results"]], ["Project"])
+
+    def test_issue_counts(self):
+        self.create_issue(status="to_do", priority="high")
+        self.create_issue(status="to_do")
+        self.create_issue(status="finished", priority="medium")
+        self.client.force_authenticate(self.contributor)
+
+        response = self.client.get("/api/projects/")
+        self.assertEqual(response.data["results"][0]["issue_counts"], {
+            "status": {"to_do": 2, "in_progress": 0, "finished": 1},
+            "priority": {"low": 1, "medium": 1, "high": 1},
+        })
+
+    def test_list_queries_do_not_depend_on_projects(self):
+        self.client.force_authenticate(self.author)
+        for index in range(4):
+            project = Project.objects.create(name=f"Project {index}", description="Description",
+                                             type="ios", author=self.author)
+            self.create_issue(project=project)
+
+        # Validators, count and page of projects with their issue counts.
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/projects/")
+        self.assertEqual(response.data["count"], 5)
+
+    def test_created_project_has_no_issues(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.post("/api/projects/", {"name": "New", "description": "Desc", "type": "ios"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["issue_counts"]["status"]["to_do"], 0)
+
+
+class BulkIssueTests(ProjectManagementTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = f"{self.issues_url()}bulk/"
+        self.client.force_authenticate(self.contributor)
+
+    def test_bulk_create(self):
+        payload = [{"title": f"Issue {index}", "description": "Desc", "tag": "bug", "assignee": "author"}
+                   for index in range(20)]
+        # Membership, assignees, and the insert, project update, search index and change log in a transaction.
+        with self.assertNumQueries(10):
+            response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(response.data[0]["assignee"], "author")
+        self.assertEqual(Issue.objects.filter(project=self.project, author=self.contributor).count(), 20)
+
+    def test_bulk_create_reports_errors_per_item(self):
+        payload = [
+            {"title": "Valid", "description": "Desc", "tag": "bug"},
+            {"title": "No tag", "description": "Desc"},
+            {"title": "Outsider", "description": "Desc", "tag": "bug", "assignee": "outsider"},
+        ]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("tag", response.data[1])
+        self.assertIn("assignee", response.data[2])
+        self.assertFalse(Issue.objects.exists())
+
+    def test_bulk_create_requires_membership(self):
+        self.client.force_authenticate(self.outsider)
+        response = self.client.post(self.url, [], format="json")
+        self.assertEqual(response.status_code, 403)
+
+    def test_bulk_update(self):
+        own = [self.create_issue(author=self.contributor) for _ in range(3)]
+        response = self.client.patch(self.url, [{"id": issue.pk, "status": "finished", "assignee": "author"}
+                                                for issue in own], format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Issue.objects.filter(status="finished", assignee=self.author).count(), 3)
+
+    def test_bulk_update_only_by_author(self):
+        other = self.create_issue(author=self.author)
+        response = self.client.patch(self.url, [{"id": other.pk, "status": "finished"}, {"status": "finished"}],
+                                     format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("id", response.data[0])
+        self.assertIn("id", response.data[1])
+        other.refresh_from_db()
+        self.assertEqual(other.status, "to_do")
+
+
+class CounterTests(ProjectManagementTestCase):
+
+    def counters(self, project=None):
+        project = Project.objects.get(pk=(project or self.project).pk)
+        return {field: getattr(project, field) for field in Project.counter_fields if getattr(project, field)}
+
+    def test_issue_create_status_change_and_delete(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.post(self.issues_url(), {"title": "New", "description": "Desc", "tag": "bug",
+                                                        "priority": "high"})
+        self.assertEqual(self.counters(), {"to_do_issues": 1, "high_priority_issues": 1})
+
+        url = f"{self.issues_url()}{response.data['id']}/"
+        self.client.patch(url, {"status": "finished"})
+        self.assertEqual(self.counters(), {"finished_issues": 1, "high_priority_issues": 1})
+        self.client.patch(url, {"title": "Renamed"})
+        self.assertEqual(self.counters(), {"finished_issues": 1, "high_priority_issues": 1})
+
+        self.client.delete(url)
+        self.assertEqual(self.counters(), {})
+
+    def test_saving_deferred_issue_recounts(self):
+        self.create_issue(status="in_progress")
+        issue = Issue.objects.only("id", "title", "project_id").get()
+        issue.status = "finished"
+        issue.save()
+        self.assertEqual(self.counters(), {"finished_issues": 1, "low_priority_issues": 1})
+
+    def test_saving_project_keeps_counters(self):
+        stale = Project.objects.get(pk=self.project.pk)
+        self.create_issue()
+        stale.name = "Renamed"
+        stale.save()
+        self.assertEqual(self.counters(), {"to_do_issues": 1, "low_priority_issues": 1})
+
+    def test_comment_count(self):
+        issue = self.create_issue()
+        self.client.force_authenticate(self.author)
+        response = self.client.post(self.comments_url(issue), {"description": "Hello"})
+        self.client.post(self.comments_url(issue), {"description": "Again"})
+
+        response_list = self.client.get(self.issues_url())
+        self.assertEqual(response_list.data["results"][0]["comment_count"], 2)
+        self.client.delete(f"{self.comments_url(issue)}{response.data['id']}/")
+        response_detail = self.client.get(f"{self.issues_url()}{issue.pk}/")
+        self.assertEqual(response_detail.data["comment_count"], 1)
+
+    def test_bulk_paths(self):
+        self.client.force_authenticate(self.contributor)
+        url = f"{self.issues_url()}bulk/"
+        response = self.client.post(url, [{"title": f"Issue {index}", "description": "Desc", "tag": "bug"}
+                                          for index in range(3)], format="json")
+        self.assertEqual(self.counters(), {"to_do_issues": 3, "low_priority_issues": 3})
+
+        self.client.patch(url, [{"id": response.data[0]["id"], "status": "in_progress", "priority": "high"}],
+                          format="json")
+        self.assertEqual(self.counters(), {"to_do_issues": 2, "in_progress_issues": 1,
+                                           "low_priority_issues": 2, "high_priority_issues": 1})
+
+    def test_project_delete_cascade(self):
+        issue = self.create_issue()
+        self.create_comment(issue)
+        self.project.delete()
+        self.assertFalse(Issue.objects.exists())
+
+    def test_repair_command(self):
+        issue = self.create_issue(status="finished")
+        self.create_comment(issue)
+        Project.objects.update(finished_issues=5, to_do_issues=2)
+        Issue.objects.update(comment_count=0)
+
+        output = io.StringIO()
+        call_command("repair_counters", stdout=output)
+        self.assertIn("1 projects and 1 issues", output.getvalue())
+        self.assertEqual(self.counters(), {"finished_issues": 1, "low_priority_issues": 1})
+        self.assertEqual(Issue.objects.get().comment_count, 1)
+
+    def test_written_issues_are_locked(self):
+        issue = self.create_issue()
+        self.client.force_authenticate(self.author)
+        select_for_update = models.QuerySet.select_for_update
+        with mock.patch.object(models.QuerySet, "select_for_update", autospec=True,
+                               side_effect=select_for_update) as lock:
+            self.client.get(f"{self.issues_url()}{issue.pk}/")
+            self.assertEqual(lock.call_count, 0)
+            self.client.patch(f"{self.issues_url()}{issue.pk}/", {"status": "finished"})
+            self.client.patch(f"{self.issues_url()}bulk/", [{"id": issue.pk, "status": "to_do"}], format="json")
+        self.assertEqual([call.args[0].model for call in lock.call_args_list], [Issue, Issue])
+        self.assertEqual(self.counters(), {"to_do_issues": 1, "low_priority_issues": 1})
+
+
+class CounterTransactionTests(APITransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        author = CustomUser.objects.create(username="author", age=30)
+        self.project = Project.objects.create(name="Project", description="Description", type="backend",
+                                              author=author)
+        self.issue = Issue.objects.create(title="Issue", description="Description", tag="bug",
+                                          project=self.project, author=author)
+
+    def test_failed_counter_update_rolls_back_the_issue(self):
+        self.issue.status = "finished"
+        with mock.patch("project_management_app.models.ProjectQuerySet.update_counters",
+                        side_effect=OperationalError("database is locked")):
+            with self.assertRaises(OperationalError):
+                self.issue.save()
+        self.assertEqual(Issue.objects.get().status, "to_do")
+        self.assertEqual(Project.objects.get().to_do_issues, 1)
+
+
+class DeletionTests(ProjectManagementTestCase):
+
+    def test_project_deletion_hides_project_until_processed(self):
+        issue = self.create_issue()
+        self.create_comment(issue)
+        self.client.force_authenticate(self.author)
+        response = self.client.delete(f"/api/projects/{self.project.pk}/")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], "pending")
+
+        self.assertEqual(self.client.get(f"/api/projects/{self.project.pk}/").status_code, 404)
+        self.assertEqual(self.client.get(self.issues_url()).status_code, 404)
+        self.assertEqual(self.client.get(self.comments_url(issue)).status_code, 404)
+        self.assertEqual(self.client.get("/api/projects/").data["count"], 0)
+        self.assertTrue(Project.objects.filter(pk=self.project.pk).exists())
+
+        call_command("process_deletions", batch_size=1, stdout=io.StringIO())
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        self.assertFalse(Issue.objects.exists())
+        progress = self.client.get(response.data["url"])
+        self.assertEqual(progress.data["status"], "done")
+        self.assertEqual(progress.data["deleted"], {
+            "project_management_app.Comment": 1, "project_management_app.Issue": 1,
+            "user_contrib_app.Contributor": 2, "project_management_app.ChangeLogEntry": 5,
+            "project_management_app.Project": 1,
+        })
+
+    def test_progress_is_only_readable_by_the_requester(self):
+        job = request_project_deletion(self.project, self.author)
+        url = f"/api/deletions/{job.pk}/"
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_authenticate(self.contributor)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.client.get(url).data["status"], "pending")
+
+    def test_user_deletion(self):
+        other_project = Project.objects.create(name="Other", description="Description", type="ios",
+                                               author=self.contributor)
+        Contributor.objects.create(user=self.author, project=other_project)
+        other_issue = self.create_issue(project=other_project, author=self.contributor, assignee=self.author)
+        self.create_comment(other_issue)
+        self.create_comment(self.create_issue())
+
+        self.client.force_authenticate(self.author)
+        response = self.client.delete(f"/api/users/{self.author.pk}/")
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(CustomUser.objects.get(pk=self.author.pk).is_active)
+        self.client.force_authenticate(self.contributor)
+        self.assertEqual([project["name"] for project in self.client.get("/api/projects/").data["results"]],
+                         ["Other"])
+
+        call_command("process_deletions", stdout=io.StringIO())
+        self.assertFalse(CustomUser.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(list(Issue.objects.all()), [other_issue])
+        other_issue.refresh_from_db()
+        self.assertIsNone(other_issue.assignee)
+        self.assertEqual(other_issue.comment_count, 0)
+        self.assertEqual(list(Contributor.objects.values_list("user__username", flat=True)), [])
+
+    def test_interrupted_job_resumes(self):
+        issue = self.create_issue()
+        for _ in range(3):
+            self.create_comment(issue)
+        job = request_project_deletion(self.project, self.author)
+
+        def crash_after_first_batch(*args):
+            if Comment.objects.count() < 3:
+                raise RuntimeError("Worker stopped")
+            return delete_batch(*args)
+        with mock.patch("project_management_app.deletion.delete_batch", side_effect=crash_after_first_batch):
+            with self.assertRaises(RuntimeError):
+                process_job(job, batch_size=1)
+
+        job = DeletionJob.objects.get(pk=job.pk)
+        self.assertEqual((job.status, job.deleted), ("pending", {"project_management_app.Comment": 1}))
+        process_job(job, batch_size=2)
+        self.assertEqual(job.deleted["project_management_app.Comment"], 3)
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+
+    def test_each_job_is_claimed_by_one_worker(self):
+        job = request_project_deletion(self.project, self.author)
+        claimed = claim_next_job(lease=300)
+        self.assertEqual((claimed.pk, claimed.status), (job.pk, "running"))
+        # Another worker finds nothing to do until the first one stops making progress.
+        self.assertIsNone(claim_next_job(lease=300))
+        DeletionJob.objects.update(updated_time=timezone.now() - datetime.timedelta(seconds=301))
+        taken_over = claim_next_job(lease=300)
+        self.assertEqual(taken_over.pk, job.pk)
+        self.assertNotEqual(taken_over.claim, claimed.claim)
+
+        # The batches of the first worker are rolled back, and not counted.
+        self.create_issue()
+        with self.assertRaises(JobClaimLost):
+            process_job(claimed)
+        self.assertTrue(Issue.objects.exists())
+        process_job(taken_over)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.deleted["project_management_app.Issue"]), ("done", 1))
+
+
+class ArchiveTests(ProjectManagementTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.old = self.create_issue(title="Old", status="finished", priority="high")
+        self.comment = self.create_comment(self.old)
+        self.recent = self.create_issue(title="Recent", status="finished")
+        self.open = self.create_issue(title="Open")
+        long_ago = timezone.now() - datetime.timedelta(days=365)
+        Issue.objects.filter(pk__in=[self.old.pk, self.open.pk]).update(updated_time=long_ago)
+
+    def archive(self):
+        call_command("archive_issues", days=30, stdout=io.StringIO())
+
+    def test_archive_moves_old_finished_issues(self):
+        self.archive()
+        self.assertEqual(set(Issue.objects.values_list("title", flat=True)), {"Recent", "Open"})
+        archived = ArchivedIssue.objects.get()
+        self.assertEqual((archived.pk, archived.comment_count), (self.old.pk, 1))
+        self.assertEqual(ArchivedComment.objects.get().pk, self.comment.pk)
+        self.assertFalse(Comment.objects.exists())
+
+        # The archived issue is still counted, and the counters need no repair.
+        self.assertEqual(Project.objects.get().finished_issues, 2)
+        output = io.StringIO()
+        call_command("repair_counters", stdout=output)
+        self.assertIn("0 projects", output.getvalue())
+
+    def test_endpoints_read_archive_on_request(self):
+        self.archive()
+        self.client.force_authenticate(self.contributor)
+        issue_url = f"{self.issues_url()}{self.old.pk}/"
+        comment_url = f"{self.comments_url(self.old)}{self.comment.pk}/"
+        self.assertEqual(self.client.get(issue_url).status_code, 404)
+        self.assertEqual(self.client.get(comment_url).status_code, 404)
+
+        response = self.client.get(f"{self.issues_url()}?archived=true")
+        self.assertEqual([issue["title"] for issue in response.data["results"]], ["Old"])
+        self.assertEqual(self.client.get(f"{issue_url}?archived=true").data["priority"], "high")
+        response = self.client.get(f"{self.comments_url(self.old)}?archived=true")
+        self.assertEqual([comment["id"] for comment in response.data["results"]], [str(self.comment.pk)])
+        self.assertEqual(self.client.get(f"{comment_url}?archived=true").status_code, 200)
+
+        response = self.client.get(f"/api/async{self.issues_url().removeprefix('/api')}?archived=true",
+                                   HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.contributor)}")
+        self.assertEqual([issue["title"] for issue in response.json()["results"]], ["Old"])
+
+    def test_invalid_archived_value(self):
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get(f"{self.issues_url()}?archived=maybe")
+        self.assertEqual(response.status_code, 400)
+
+    def test_project_deletion_removes_archive(self):
+        self.archive()
+        request_project_deletion(self.project, self.author)
+        call_command("process_deletions", stdout=io.StringIO())
+        self.assertFalse(ArchivedIssue.objects.exists())
+        self.assertFalse(ArchivedComment.objects.exists())
+
+
+class ChangeLogTests(ProjectManagementTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = f"/api/projects/{self.project.pk}/changes/"
+        self.client.force_authenticate(self.author)
+        self.cursor = self.client.get(self.url).data["cursor"]
+
+    def get_changes(self, **params):
+        response = self.client.get(self.url, {"since": self.cursor, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def summary(self, data):
+        return [(change["model"], change["id"], change["action"]) for change in data["changes"]]
+
+    def test_without_cursor_returns_latest_cursor(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data, {"cursor": ChangeLogEntry.objects.latest("id").pk, "next": None,
+                                         "changes": []})
+        self.assertEqual(self.get_changes()["changes"], [])
+
+    def test_created_updated_and_deleted_objects(self):
+        issue = self.create_issue()
+        comment = self.create_comment(issue)
+        data = self.get_changes()
+        self.assertEqual(self.summary(data), [("issue", issue.pk, "created"), ("comment", str(comment.pk), "created")])
+        self.assertEqual(data["changes"][1]["data"], {"id": str(comment.pk), "issue": issue.pk,
+                                                       "description": "Comment"})
+
+        self.cursor = data["cursor"]
+        response = self.client.patch(f"{self.issues_url()}{issue.pk}/", {"title": "Renamed"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        comment_pk = str(comment.pk)
+        comment.delete()
+        data = self.get_changes()
+        self.assertEqual(self.summary(data), [("issue", issue.pk, "updated"), ("comment", comment_pk, "deleted")])
+        self.assertEqual(data["changes"][0]["data"]["title"], "Renamed")
+        self.assertNotIn("data", data["changes"][1])
+
+        # Only the last change of an object is returned, a tombstone once it is deleted.
+        self.cursor = data["cursor"]
+        issue_pk = issue.pk
+        issue.title = "Again"
+        issue.save()
+        issue.delete()
+        self.assertEqual(self.summary(self.get_changes()), [("issue", issue_pk, "deleted")])
+
+    def test_recent_entries_wait_for_the_safety_lag(self):
+        a_while_ago = timezone.now() - datetime.timedelta(seconds=6)
+        ChangeLogEntry.objects.update(created_time=a_while_ago)
+        issue = self.create_issue()
+        with self.settings(CHANGE_LOG_SAFETY_LAG=5):
+            # The entry may still be behind an uncommitted one with a lower ID: the cursor stays.
+            self.assertEqual(self.get_changes(), {"cursor": self.cursor, "next": None, "changes": []})
+            self.assertEqual(self.client.get(self.url).data["cursor"], self.cursor)
+
+            ChangeLogEntry.objects.update(created_time=a_while_ago)
+            self.assertEqual(self.summary(self.get_changes()), [("issue", issue.pk, "created")])
+
+    def test_contributors(self):
+        response = self.client.post(f"/api/projects/{self.project.pk}/contributors/",
+                                    {"user": "outsider"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        Contributor.objects.filter(user=self.contributor).delete()
+        data = self.get_changes()
+        self.assertEqual(self.summary(data), [("contributor", self.outsider.pk, "created"),
+                                              ("contributor", self.contributor.pk, "deleted")])
+
+    def test_bulk_endpoints_are_logged(self):
+        response = self.client.post(f"{self.issues_url()}bulk/", [{"title": "Bulk", "description": "Desc",
+                                                                   "tag": "bug"}], format="json")
+        self.assertEqual(response.status_code, 201)
+        issue_pk = response.data[0]["id"]
+        self.assertEqual(self.summary(self.get_changes()), [("issue", issue_pk, "created")])
+
+        response = self.client.patch(f"{self.issues_url()}bulk/", [{"id": issue_pk, "status": "finished"}],
+                                     format="json")
+        self.assertEqual(response.status_code, 200)
+        # The contributor already in the project is not logged.
+        response = self.client.post(f"/api/projects/{self.project.pk}/contributors/bulk/",
+                                    {"usernames": ["outsider", "contributor"]}, format="json")
+        self.assertEqual(response.status_code, 201)
+        data = self.get_changes()
+        self.assertEqual(self.summary(data), [("issue", issue_pk, "updated"),
+                                              ("contributor", self.outsider.pk, "created")])
+        self.assertEqual(data["changes"][0]["data"]["status"], "finished")
+
+    def test_limit_and_next_page(self):
+        issues = [self.create_issue(title=f"Issue {index}") for index in range(3)]
+        data = self.get_changes(limit=2)
+        self.assertEqual([change["id"] for change in data["changes"]], [issues[0].pk, issues[1].pk])
+        self.assertIn(f"since={data['cursor']}", data["next"])
+
+        data = self.client.get(data["next"]).data
+        self.assertEqual([change["id"] for change in data["changes"]], [issues[2].pk])
+        self.assertIsNone(data["next"])
+        self.assertEqual(self.client.get(self.url, {"since": -1}).status_code, 400)
+
+    def test_archived_issues(self):
+        issue = self.create_issue(status="finished")
+        comment = self.create_comment(issue)
+        self.cursor = self.get_changes()["cursor"]
+        Issue.objects.filter(pk=issue.pk).update(updated_time=timezone.now() - datetime.timedelta(days=365))
+        call_command("archive_issues", days=30, stdout=io.StringIO())
+        self.assertEqual(self.summary(self.get_changes()), [("comment", str(comment.pk), "archived"),
+                                                            ("issue", issue.pk, "archived")])
+
+    def test_failed_write_is_not_logged(self):
+        response = self.client.post(self.issues_url(), {"title": "Invalid"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.get_changes()["changes"], [])
+
+    def test_outsider_cannot_read_changes(self):
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_project_deletion_removes_log(self):
+        self.create_issue()
+        request_project_deletion(self.project, self.author)
+        call_command("process_deletions", stdout=io.StringIO())
+        self.assertFalse(ChangeLogEntry.objects.exists())
+
+
+class ExportTests(ProjectManagementTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = f"/api/projects/{self.project.pk}/export/"
+        self.first = self.create_issue(title="First", assignee=self.contributor)
+        self.create_comment(self.first, description="One")
+        self.create_comment(self.first, description="Two, with a comma")
+        self.create_issue(title="Second")
+        self.client.force_authenticate(self.contributor)
+
+    def test_ndjson_export(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([issue["title"] for issue in lines], ["First", "Second"])
+        self.assertEqual(lines[0]["assignee"], "contributor")
+        self.assertEqual([comment["description"] for comment in lines[0]["comments"]],
+                         ["One", "Two, with a comma"])
+        self.assertEqual(lines[1]["comments"], [])
+
+    def test_csv_export(self):
+        response = self.client.get(f"{self.url}?output=csv")
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:2], ["issue_id", "issue_title"])
+        self.assertEqual([(row[1], row[10]) for row in rows[1:]],
+                         [("First", "One"), ("First", "Two, with a comma"), ("Second", "")])
+
+    def test_export_queries_do_not_depend_on_issues(self):
+        for index in range(10):
+            self.create_comment(self.create_issue(title=f"Issue {index}"))
+        # Project and membership, then one query for the issues and one for their comments.
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+            b"".join(response.streaming_content)
+
+    def test_export_requires_membership(self):
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+# The validators are computed from the database when the responses are not cached.
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class ConditionalGetTests(ProjectManagementTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issue = self.create_issue(title="Issue")
+        self.issue_url = f"{self.issues_url()}{self.issue.pk}/"
+        self.client.force_authenticate(self.author)
+
+    def test_unchanged_issue_returns_not_modified(self):
+        response = self.client.get(self.issue_url)
+        self.assertIn("Last-Modified", response)
+
+        # Validators only: the membership is cached and nothing is serialized.
+        with self.assertNumQueries(1):
+            response = self.client.get(self.issue_url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_if_modified_since(self):
+        response = self.client.get(self.issue_url)
+        response = self.client.get(self.issue_url,
+                                   HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_changed_issue_returns_new_etag(self):
+        etag = self.client.get(self.issue_url)["ETag"]
+        self.client.patch(self.issue_url, {"status": "finished"})
+        response = self.client.get(self.issue_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_changes_with_the_users_shown(self):
+        etags = [self.client.get(url)["ETag"] for url in (self.issue_url, self.issues_url())]
+        self.author.username = "renamed"
+        self.author.save()
+        for url, etag in zip((self.issue_url, self.issues_url()), etags):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(self.issue_url).data["author"], "renamed")
+
+    def test_list_etag_changes_on_delete(self):
+        self.create_issue(title="Other")
+        response = self.client.get(self.issues_url())
+        self.assertNotIn("Last-Modified", response)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(self.issues_url(), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.delete(self.issue_url)
+        self.assertEqual(self.client.get(self.issues_url(), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_project_etag_changes_with_issues_and_contributors(self):
+        url = f"/api/projects/{self.project.pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.create_issue(title="New issue")
+        etag_after_issue = self.client.get(url, HTTP_IF_NONE_MATCH=etag)["ETag"]
+        self.assertNotEqual(etag_after_issue, etag)
+
+        Contributor.objects.create(user=self.outsider, project=self.project)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag_after_issue)
+        self.assertEqual(response.status_code, 200)
+
+    def test_not_modified_requires_access(self):
+        etag = self.client.get(f"/api/projects/{self.project.pk}/")["ETag"]
+        self.client.force_authenticate(self.outsider)
+        response = self.client.get(f"/api/projects/{self.project.pk}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 403)
+
+
+class ResponseCacheTests(ProjectManagementTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issue = self.create_issue(title="Issue")
+        self.issue_url = f"{self.issues_url()}{self.issue.pk}/"
+        self.project_url = f"/api/projects/{self.project.pk}/"
+        # Cache the memberships of both users.
+        for user in (self.author, self.contributor):
+            self.client.force_authenticate(user)
+            self.client.get(self.issues_url(), {"limit": 1})
+        response_cache.reset_stats()
+
+    def test_contributors_share_cached_responses(self):
+        self.client.force_authenticate(self.author)
+        expected = self.client.get(self.issues_url())
+        self.client.force_authenticate(self.contributor)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.issues_url())
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response["ETag"], expected["ETag"])
+        self.assertEqual(response_cache.stats(), {"hits": 1, "misses": 1})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.issues_url(), HTTP_IF_NONE_MATCH=expected["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_validators_are_shared_by_the_users(self):
+        self.client.force_authenticate(self.author)
+        etag = self.client.get(self.issue_url)["ETag"]
+        # Cached again by another user once evicted, the response keeps its ETag.
+        cache.delete(response_cache.get_key(self.project.pk, "retrieve", f"http://testserver{self.issue_url}"))
+        self.client.force_authenticate(self.contributor)
+        self.assertEqual(self.client.get(self.issue_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(response_cache.stats()["hits"], 0)
+
+    def test_query_string_is_part_of_the_key(self):
+        self.create_issue(title="Other")
+        self.client.force_authenticate(self.author)
+        self.assertEqual(len(self.client.get(self.issues_url()).data["results"]), 2)
+        self.assertEqual(len(self.client.get(self.issues_url(), {"limit": 1}).data["results"]), 1)
+        self.assertEqual(list(self.client.get(self.issue_url, {"fields": "title"}).data), ["title"])
+
+    def test_writes_invalidate_the_project(self):
+        self.client.force_authenticate(self.author)
+        self.client.get(self.issues_url())
+        self.client.get(self.project_url)
+
+        self.client.patch(self.issue_url, {"title": "Renamed"})
+        self.assertEqual(self.client.get(self.issues_url()).data["results"][0]["title"], "Renamed")
+        self.assertEqual(self.client.get(self.project_url).data["issues"], ["Renamed"])
+
+        self.client.post(f"{self.comments_url(self.issue)}", {"description": "New"})
+        self.assertEqual(self.client.get(self.issue_url).data["comment_count"], 1)
+
+        self.client.post(f"{self.project_url}contributors/bulk/", {"usernames": ["outsider"]}, format="json")
+        self.assertIn("outsider", self.client.get(self.project_url).data["contributors"])
+
+        self.client.post(f"{self.issues_url()}bulk/", [{"title": "Bulk", "description": "Bulk", "tag": "bug"}],
+                         format="json")
+        self.assertEqual(self.client.get(self.issues_url()).data["count"], 2)
+
+    def test_comment_changes_invalidate_the_project(self):
+        comment = self.create_comment(self.issue)
+        self.client.force_authenticate(self.author)
+        url = f"{self.comments_url(self.issue)}{comment.pk}/"
+        self.client.get(url)
+        # The issue of the comment is not loaded: its project is looked up.
+        Comment.objects.get(pk=comment.pk).delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_profile_changes_invalidate_the_user_projects(self):
+        self.client.force_authenticate(self.author)
+        self.client.get(self.project_url)
+        self.author.username = "renamed"
+        self.author.save()
+        self.assertEqual(self.client.get(self.project_url).data["author_username"], "renamed")
+
+        self.client.get(self.issue_url)
+        self.author.username = "again"
+        self.author.save(update_fields=["username"])
+        self.assertEqual(self.client.get(self.issue_url).data["author"], "again")
+
+    def test_other_user_changes_keep_the_cached_responses(self):
+        self.client.force_authenticate(self.author)
+        self.client.get(self.project_url)
+        response_cache.reset_stats()
+        # A login, a password change, and a user outside of the project.
+        update_last_login(None, self.author)
+        user = CustomUser.objects.get(pk=self.author.pk)
+        user.set_password("new password")
+        user.save()
+        self.outsider.username = "renamed"
+        self.outsider.save()
+        self.client.get(self.project_url)
+        self.assertEqual(response_cache.stats(), {"hits": 1, "misses": 0})
+
+    def test_permissions_are_checked_before_the_cache(self):
+        self.client.force_authenticate(self.author)
+        self.client.get(self.project_url)
+        self.client.get(self.issues_url())
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.client.get(self.project_url).status_code, 403)
+        self.assertEqual(self.client.get(self.issues_url()).status_code, 403)
+
+    def test_hit_ratio_is_reported(self):
+        self.client.force_authenticate(self.author)
+        self.client.get(self.issues_url())
+        self.client.get(self.issues_url())
+        content = self.client.get("/metrics").content.decode()
+        self.assertIn("softdesk_response_cache_hits_total 1", content)
+        self.assertIn("softdesk_response_cache_hit_ratio 0.5", content)
+
+
+class SearchTests(ProjectManagementTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issue = self.create_issue(title="Login page crashes", description="Blank screen on submit")
+        self.comment = self.create_comment(self.issue, description="The crash happens on Safari only")
+        self.create_issue(title="Dashboard", description="Mentions a crash once")
+        self.client.force_authenticate(self.contributor)
+
+    def search(self, query):
+        response = self.client.get("/api/search/", {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [(result["type"], result["id"]) for result in response.data["results"]]
+
+    def test_results_are_ranked(self):
+        results = self.search("crashes")
+        self.assertEqual(results[0], ("issue", self.issue.pk))
+        self.assertEqual(self.search("safari"), [("comment", str(self.comment.pk))])
+
+    def test_index_follows_changes(self):
+        self.comment.description = "Fixed in the last release"
+        self.comment.save()
+        self.assertEqual(self.search("safari"), [])
+        self.assertEqual(self.search("release"), [("comment", str(self.comment.pk))])
+
+        self.issue.delete()
+        self.assertEqual(self.search("release login"), [])
+
+    def test_results_are_scoped_to_user_projects(self):
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.search("crashes"), [])
+
+    def test_query_syntax_is_ignored(self):
+        self.assertEqual(self.search('"safari" OR'), [])
+        self.assertEqual(self.client.get("/api/search/", {"q": "*"}).status_code, 400)
+
+    def test_rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SQLiteFTS5SearchBackend.fts_table}")
+        self.assertEqual(self.search("safari"), [])
+        call_command("rebuild_search_index", stdout=io.StringIO())
+        self.assertEqual(self.search("safari"), [("comment", str(self.comment.pk))])
+
+
+class AsyncViewTests(ProjectManagementTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issue = self.create_issue(title="Issue", assignee=self.contributor)
+        self.create_issue(title="Other", status="finished")
+        self.comment = self.create_comment(self.issue)
+
+    def get_async(self, url, user=None):
+        token = AccessToken.for_user(user or self.contributor)
+        return self.client.get(f"/api/async{url}", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_responses_match_sync_views(self):
+        issue_url = f"{self.issues_url()}{self.issue.pk}/"
+        urls = [
+            "/projects/",
+            f"/projects/{self.project.pk}/",
+            self.issues_url().removeprefix("/api"),
+            f"{self.issues_url()}?status=finished&limit=1".removeprefix("/api"),
+            issue_url.removeprefix("/api"),
+            self.comments_url(self.issue).removeprefix("/api"),
+            f"{self.comments_url(self.issue)}{self.comment.pk}/".removeprefix("/api"),
+            f"{self.issues_url()}?fields=id,title".removeprefix("/api"),
+            f"/projects/{self.project.pk}/?omit=description,contributors",
+        ]
+        self.client.force_authenticate(self.contributor)
+        for url in urls:
+            expected = self.client.get(f"/api{url}")
+            response = self.get_async(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(response.content, expected.content, url)
+
+    def test_authentication_is_required(self):
+        response = self.client.get(f"/api/async/projects/{self.project.pk}/")
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("WWW-Authenticate", response)
+
+    def test_permissions(self):
+        response = self.get_async(self.issues_url().removeprefix("/api"), user=self.outsider)
+        self.assertEqual(response.status_code, 403)
+        response = self.get_async(self.comments_url(self.issue).removeprefix("/api"), user=self.outsider)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.get_async("/projects/0/").status_code, 404)
+
+
+class MetricsTests(ProjectManagementTestCase):
+
+    def get_metrics(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        samples = {}
+        for line in response.content.decode().splitlines():
+            if not line.startswith("#"):
+                name, value = line.rsplit(" ", 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_requests_are_recorded_per_route_and_action(self):
+        self.create_issue()
+        self.client.force_authenticate(self.contributor)
+        response = self.client.get(self.issues_url())
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(self.outsider)
+        denied = self.client.get(self.issues_url())
+        self.assertEqual(denied.status_code, 403)
+
+        samples = self.get_metrics()
+        series = 'route="issue-list",action="list"'
+        self.assertEqual(samples[f"softdesk_request_duration_seconds_count{{{series}}}"], 2)
+        self.assertEqual(samples[f'softdesk_request_duration_seconds_bucket{{{series},le="+Inf"}}'], 2)
+        self.assertEqual(samples[f'softdesk_requests_total{{{series},status="200"}}'], 1)
+        self.assertEqual(samples[f"softdesk_permission_denied_total{{{series}}}"], 1)
+        self.assertEqual(samples[f"softdesk_response_size_bytes_sum{{{series}}}"],
+                         len(response.content) + len(denied.content))
+        self.assertGreater(samples[f"softdesk_request_sql_seconds_total{{{series}}}"], 0)
+        self.assertIn("softdesk_membership_cache_misses_total", samples)
+        self.assertIn("softdesk_user_cache_entries", samples)
+
+    def test_query_count_matches_the_queries_run(self):
+        self.client.force_authenticate(self.contributor)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get("/api/projects/")
+        queries = len(context.captured_queries)
+        samples = self.get_metrics()
+        self.assertEqual(samples['softdesk_request_queries_sum{route="projects-list",action="list"}'], queries)
+
+    def test_middleware_is_async_under_asgi(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        # An async middleware keeps the async views on the event loop.
+        self.assertTrue(iscoroutinefunction(MetricsMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(MetricsMiddleware(lambda request: HttpResponse())))
+
+    async def test_async_requests_are_recorded(self):
+        await sync_to_async(self.create_issue)()
+        token = AccessToken.for_user(self.contributor)
+        response = await self.async_client.get(f"/api/async{self.issues_url().removeprefix('/api')}",
+                                               headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 200)
+
+        # The queries of the async ORM run in another thread, and are counted.
+        samples = await sync_to_async(self.get_metrics)()
+        series = 'route="async-issue-list",action="get"'
+        self.assertEqual(samples[f"softdesk_request_duration_seconds_count{{{series}}}"], 1)
+        self.assertGreater(samples[f"softdesk_request_queries_sum{{{series}}}"], 0)
+
+    def test_metrics_are_only_served_to_allowed_clients(self):
+        self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="203.0.113.5").status_code, 403)
+        with self.settings(METRICS_ALLOWED_IPS=["203.0.113.0/24"]):
+            self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="203.0.113.5").status_code, 200)
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    def test_metrics_token(self):
+        with self.settings(METRICS_TOKEN="scraper-token"):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer other").status_code, 403)
+            response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scraper-token")
+            self.assertEqual(response.status_code, 200)
+
+
+class BenchmarkCommandTests(APITestCase):
+
+    def test_seed_data_and_benchmark(self):
+        call_command("seed_data", users=10, projects=2, contributors=3, issues=4, comments=2, stdout=io.StringIO())
+        self.assertEqual(CustomUser.objects.filter(username__startswith="seed-").count(), 10)
+        self.assertEqual(Contributor.objects.count(), 6)
+        self.assertEqual(Issue.objects.count(), 8)
+        # Each project is assigned to its own contributors only.
+        self.assertFalse(Issue.objects.exclude(author__contributions__project=models.F("project")).exists())
+
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            call_command("bench_endpoints", requests=2, warmup=0, memory_requests=1, skip_writes=True,
+                         host="testserver", output=output, stdout=io.StringIO(), stderr=io.StringIO())
+            with open(output) as file:
+                report = json.load(file)
+        result = report["results"]["issue-list"]
+        self.assertEqual(result["method"], "GET")
+        self.assertGreater(result["queries"], 0)
+        self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        self.assertNotIn("issue-create", report["results"])
+
+
+class DatabaseProfileTests(APITestCase):
+
+    def get_pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_of_the_settings_are_applied(self):
+        defaults = {name: self.get_pragma(name) for name in ("cache_size", "busy_timeout")}
+        try:
+            with mock.patch.dict(connection.settings_dict, {"PRAGMAS": {"cache_size": -4096, "busy_timeout": 1234}}):
+                apply_sqlite_pragmas(connection)
+            self.assertEqual(self.get_pragma("cache_size"), -4096)
+            self.assertEqual(self.get_pragma("busy_timeout"), 1234)
+        finally:
+            # Restore the connection shared by the other tests.
+            with mock.patch.dict(connection.settings_dict, {"PRAGMAS": defaults}):
+                apply_sqlite_pragmas(connection)
+
+    def test_search_backend_depends_on_the_profile(self):
+        expected = {
+            "sqlite": "project_management_app.search.SQLiteFTS5SearchBackend",
+            "sqlite-wal": "project_management_app.search.SQLiteFTS5SearchBackend",
+            "postgres": "project_management_app.search.SimpleSearchBackend",
+        }
+        for profile, backend in expected.items():
+            with mock.patch.dict(os.environ, {"SOFTDESK_DB_PROFILE": profile}):
+                values = runpy.run_path(settings_module.__file__)
+            self.assertEqual(values["SEARCH_BACKEND"], backend, profile)
+
+    def test_transaction_mode_fallback_before_django_5_1(self):
+        with mock.patch.dict(os.environ, {"SOFTDESK_DB_PROFILE": "sqlite-wal"}):
+            wal = runpy.run_path(settings_module.__file__)["DATABASES"]["default"]
+            with mock.patch("django.VERSION", (5, 0, 9, "final", 0)):
+                wal_5_0 = runpy.run_path(settings_module.__file__)["DATABASES"]["default"]
+        self.assertEqual((wal["OPTIONS"]["transaction_mode"], wal.get("TRANSACTION_MODE")), ("IMMEDIATE", None))
+        self.assertEqual((wal_5_0["OPTIONS"], wal_5_0["TRANSACTION_MODE"]), ({"timeout": 20}, "IMMEDIATE"))
+
+
+# The requests of `stress_writes` are sent to localhost.
+@override_settings(ALLOWED_HOSTS=["localhost"])
+class ConcurrentWritesTests(APITransactionTestCase):
+    """
+    Clients writing at the same time to a file database with the sqlite-wal profile: a copy of the
+    test database, opened by the connections of the client threads only.
+    """
+    threads = 8
+    requests = 15
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        user = CustomUser.objects.create(username="writer", age=30)
+        project = Project.objects.create(name="Project", description="Description", type="backend", author=user)
+        Contributor.objects.create(user=user, project=project)
+        issue = Issue.objects.create(title="Issue", description="Description", tag="bug", project=project,
+                                     author=user)
+
+        descriptor, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(descriptor)
+        self.addCleanup(lambda: [os.remove(name) for name in (path, f"{path}-wal", f"{path}-shm")
+                                 if os.path.exists(name)])
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.close()
+        self.settings_dict = {**connection.settings_dict, **settings.DATABASE_PROFILES["sqlite-wal"], "NAME": path}
+        self.wrapper_class = connections["default"].__class__
+
+        self.command = StressWritesCommand()
+        self.command.token = str(AccessToken.for_user(user))
+        self.command.handler = WSGIHandler()
+        self.issues_path = f"/api/projects/{project.pk}/issues/"
+        self.comments_path = f"{self.issues_path}{issue.pk}/comments/"
+
+    def write(self, index, statuses):
+        # Connections are per thread: this thread uses the file database as its default one.
+        connections["default"] = self.wrapper_class(self.settings_dict, alias="default")
+        try:
+            for number in range(self.requests):
+                if number % 2:
+                    statuses.append(self.command.request("POST", self.comments_path,
+                                                         {"description": f"Comment {index}"}))
+                else:
+                    statuses.append(self.command.request("POST", self.issues_path,
+                                                         {"title": f"Issue {index}", "description": "Description",
+                                                          "tag": "bug"}))
+        finally:
+            connections["default"].close()
+
+    def test_concurrent_writers_are_not_locked_out(self):
+        errors = []
+
+        def record_exception(sender, request=None, **kwargs):
+            errors.append(sys.exc_info()[1])
+
+        statuses = []
+        got_request_exception.connect(record_exception)
+        try:
+            workers = [threading.Thread(target=self.write, args=(index, statuses)) for index in range(self.threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        finally:
+            got_request_exception.disconnect(record_exception)
+
+        self.assertEqual([error for error in errors if isinstance(error, OperationalError)], [])
+        self.assertEqual(Counter(statuses), {201: self.threads * self.requests})
+
+        database = sqlite3.connect(self.settings_dict["NAME"])
+        try:
+            self.assertEqual(database.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            issues = database.execute("SELECT COUNT(*) FROM project_management_app_issue").fetchone()[0]
+        finally:
+            database.close()
+        self.assertEqual(issues, 1 + self.threads * ((self.requests + 1) // 2))
+
+
+class ReplicaRoutingTests(APITransactionTestCase):
+    """
+    Uses a second SQLite file as the replica: `replicate` copies the primary into it, so the
+    rows written afterwards are only on the primary, like with a lagging replica.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        descriptor, cls.replica_path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(descriptor)
+        # Registered on the connection handler only, like a connection created at run time.
+        primary = connections["default"]
+        connections["replica1"] = primary.__class__({**primary.settings_dict, "NAME": cls.replica_path},
+                                                    alias="replica1")
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["replica1"].close()
+        del connections["replica1"]
+        os.remove(cls.replica_path)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.author = CustomUser.objects.create(username="author", age=30)
+        self.project = Project.objects.create(name="Replicated", description="Description",
+                                              type="backend", author=self.author)
+        Contributor.objects.create(user=self.author, project=self.project)
+        self.replicate()
+
+        settings_override = self.settings(DATABASE_REPLICAS=["replica1"])
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.author)}")
+
+    def replicate(self):
+        connections["default"].ensure_connection()
+        connections["replica1"].ensure_connection()
+        connections["default"].connection.backup(connections["replica1"].connection)
+
+    def project_names(self):
+        response = self.client.get("/api/projects/")
+        self.assertEqual(response.status_code, 200)
+        return {project["name"] for project in response.data["results"]}
+
+    def test_safe_requests_read_from_the_replica(self):
+        project = Project.objects.create(name="Not replicated", description="Description",
+                                         type="backend", author=self.author)
+        Contributor.objects.create(user=self.author, project=project)
+        self.assertEqual(self.project_names(), {"Replicated"})
+        self.assertEqual(self.client.head("/api/projects/").status_code, 200)
+
+        self.replicate()
+        self.assertEqual(self.project_names(), {"Replicated", "Not replicated"})
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        response = self.client.post("/api/projects/", {"name": "Created", "description": "Description",
+                                                       "type": "backend"})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("softdesk_primary", response.cookies)
+        self.assertEqual(self.project_names(), {"Replicated", "Created"})
+
+        # Without the cookie, the token of the client is still pinned.
+        self.client.cookies.clear()
+        self.assertEqual(self.project_names(), {"Replicated", "Created"})
+
+        # Once the pin has expired, the client reads from the replica again.
+        cache.clear()
+        self.assertEqual(self.project_names(), {"Replicated"})
+
+    async def test_asgi_requests_read_from_the_replica(self):
+        project = await Project.objects.acreate(name="Not replicated", description="Description",
+                                                type="backend", author=self.author)
+        await Contributor.objects.acreate(user=self.author, project=project)
+        token = AccessToken.for_user(self.author)
+        response = await self.async_client.get("/api/projects/", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({project["name"] for project in response.json()["results"]}, {"Replicated"})
+        # The replica does not outlive the request.
+        self.assertFalse(reading_from_replica())
+
+    def test_middleware_is_async_under_asgi(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertTrue(iscoroutinefunction(middleware.process_view))
+        middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse())
+        self.assertFalse(iscoroutinefunction(middleware))
+        self.assertFalse(iscoroutinefunction(middleware.process_view))
+
+    def test_writes_and_migrations_never_use_the_replica(self):
+        project = Project.objects.using("replica1").get(pk=self.project.pk)
+        self.assertEqual(router.db_for_write(Project, instance=project), "default")
+        self.assertFalse(router.allow_migrate("replica1", "project_management_app"))
+        self.assertEqual(router.db_for_read(Project), "default")
@@ -1,30 +1,266 @@
+import hashlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models import Prefetch
+from django.db.models import prefetch_related_objects
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.utils.http import quote_etag
+from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import ValidationError
 from rest_framework.viewsets import ModelViewSet
+from rest_framework.views import APIView
+from rest_framework.generics import RetrieveAPIView
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.response import Response
 from rest_framework import status
 
+from SoftDeskSupportAPI.pagination import KeysetPagination
+from SoftDeskSupportAPI.sparse_fields import SparseFieldsMixin
+from SoftDeskSupportAPI.transactions import AtomicWritesMixin
 from project_management_app.permissions import IsProjectAuthor
 from project_management_app.permissions import IsProjectContributor
 from project_management_app.permissions import HasProjectAccessPermission
 from project_management_app.permissions import IsIssueAuthor
 from project_management_app.permissions import IsContributorToProjectOfIssue
 from project_management_app.permissions import IsCommentAuthor
+from project_management_app.archive import wants_archive
+from project_management_app.changelog import get_changes
+from project_management_app.changelog import log_changes
+from project_management_app.deletion import request_project_deletion
+from project_management_app.export import EXPORT_FORMATS
+from project_management_app.export import iter_issues
+from project_management_app.filters import IssueFilterBackend
+from project_management_app.filters import IssueOrderingFilter
+from project_management_app.membership import get_project_membership
+from project_management_app.membership import get_issue_membership
+from project_management_app.response_cache import ResponseCacheMixin
+from project_management_app.response_cache import response_cache
+from project_management_app.search import get_search_backend
 from project_management_app.models import Project
 from project_management_app.models import Issue
 from project_management_app.models import Comment
+from project_management_app.models import DeletionJob
+from project_management_app.models import ArchivedIssue
+from project_management_app.models import ArchivedComment
 from project_management_app.serializers import ProjectListSerializer
 from project_management_app.serializers import ProjectDetailSerializer
 from project_management_app.serializers import IssueListSerializer
 from project_management_app.serializers import IssueDetailSerializer
+from project_management_app.serializers import IssueBulkItemSerializer
 from project_management_app.serializers import CommentListSerializer
 from project_management_app.serializers import CommentDetailSerializer
+from project_management_app.serializers import SearchQuerySerializer
+from project_management_app.serializers import ChangesQuerySerializer
+from project_management_app.serializers import DeletionJobSerializer
+from project_management_app.fast_serializers import ProjectListFastSerializer
+from project_management_app.fast_serializers import ProjectDetailFastSerializer
+from project_management_app.fast_serializers import IssueListFastSerializer
+from project_management_app.fast_serializers import IssueDetailFastSerializer
+from project_management_app.fast_serializers import CommentListFastSerializer
+from project_management_app.fast_serializers import CommentDetailFastSerializer
 from user_contrib_app.models import Contributor
+from user_contrib_app.models import CustomUser
 
 
-class BaseViewSet(ModelViewSet):
+class BaseViewSet(AtomicWritesMixin, SparseFieldsMixin, ModelViewSet):
     detail_serializer_class = None
+    # Queryset plan per action, e.g. {"list": {"select_related": [...], "prefetch_related": [...], "only": [...]}}.
+    # The plan lists the relations and columns needed by the serializer of the action, so the number
+    # of queries stays constant no matter how many rows are returned.
+    queryset_plans = {}
+
+    def apply_queryset_plan(self, queryset):
+        """
+        Applies the `queryset_plans` entry of the current action to `queryset`, without the
+        relations and columns only read by the fields left out by `?fields=` or `?omit=`.
+        """
+        plan = self.queryset_plans.get(self.action, {})
+        unread = self.get_unread_attributes()
+
+        def is_read(lookup):
+            return lookup.split("__")[0] not in unread
+
+        select_related = [lookup for lookup in plan.get("select_related", []) if is_read(lookup)]
+        prefetch_related = [lookup for lookup in plan.get("prefetch_related", [])
+                            if is_read(getattr(lookup, "prefetch_through", lookup))]
+        only = [lookup for lookup in plan.get("only", []) if is_read(lookup)]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if only:
+            if unread:
+                # The permissions and the keyset pagination read their columns whatever the fields.
+                only += [*self.permission_fields, *self.get_ordering_fields(queryset)]
+            queryset = queryset.only(*only)
+        return queryset
+
+    def get_ordering_fields(self, queryset):
+        """
+        Returns the columns the rows are ordered by, read by the keyset pagination: the ones of the
+        `?ordering=` parameter, or `keyset_ordering`.
+        """
+        for backend in self.filter_backends:
+            if hasattr(backend, "get_ordering"):
+                ordering = backend().get_ordering(self.request, queryset, self)
+                if ordering:
+                    return [field.lstrip("-") for field in ordering]
+        return list(getattr(self, "keyset_ordering", ()))
+
+    # Opt-in fast serializers per action, used when `FAST_SERIALIZATION` is enabled in the settings.
+    fast_serializer_classes = {}
+
+    def get_fast_serializer(self):
+        """
+        Returns the fast serializer of the current action, or None to use the DRF serializers.
+        """
+        if not getattr(settings, "FAST_SERIALIZATION", False):
+            return None
+        fast_serializer_class = self.fast_serializer_classes.get(self.action)
+        if fast_serializer_class is None:
+            return None
+        return fast_serializer_class(context=self.get_serializer_context())
+
+    # Columns whose latest value validates a retrieve response, e.g. the issue and its project.
+    detail_validator_fields = ("updated_time",)
+    # Columns needed to build a model instance for object permission checks.
+    permission_fields = ("id", "author_id")
+    # GET and HEAD requests read from a replica, see `SoftDeskSupportAPI.replicas`.
+    read_from_replica = True
+    # Read-only model of the archived rows, read by `list` and `retrieve` with `?archived=true`.
+    archived_model = None
+
+    def reads_archive(self):
+        """
+        Checks whether the current action reads the archive, see `project_management_app.archive`.
+        """
+        return (self.archived_model is not None and self.action in ("list", "retrieve")
+                and wants_archive(self.request.query_params))
+
+    def get_validator_queryset(self):
+        """
+        Returns the rows whose `updated_time` validates the response of the current action.
+        """
+        return self.filter_queryset(self.get_queryset())
+
+    def get_validators(self):
+        """
+        Returns the ETag and the last modification time of the response of the current action,
+        computed with one query, or `(None, None)` when the object of a retrieve does not exist.
+
+        A list only has an ETag, built from the number of rows and their latest `updated_time`:
+        the number of rows changes when one is deleted, the latest modification time does not.
+        The users shown in a response of a project are not in its rows: the ETag also includes the
+        version of the project in the response cache, bumped when their public fields change.
+        """
+        queryset = self.get_validator_queryset()
+        last_modified = None
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            try:
+                row = (queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+                       .values(*self.permission_fields, *self.detail_validator_fields).first())
+            except (DjangoValidationError, ValueError, TypeError):
+                row = None
+            if row is None:
+                # Let the regular path return the 404.
+                return None, None
+            # Nothing is returned, even a 304, to a user who cannot read the object.
+            instance = queryset.model(**{field: row[field] for field in self.permission_fields})
+            self.check_object_permissions(self.request, instance)
+            last_modified = max(row[field] for field in self.detail_validator_fields)
+            state = [row["id"], last_modified.isoformat()]
+        else:
+            aggregate = queryset.aggregate(count=Count("pk"), last_modified=Max("updated_time"))
+            latest = aggregate["last_modified"]
+            state = [aggregate["count"], latest.isoformat() if latest else ""]
+
+        # The response also depends on the query string, the renderer, and the user unless it is
+        # shared by the users of the project through the response cache.
+        user_pk = None if getattr(self, "shared_response", False) else self.request.user.pk
+        project_pk = self.get_cache_project_pk() if hasattr(self, "get_cache_project_pk") else None
+        if project_pk is not None:
+            state.append(response_cache.get_version(project_pk))
+        state += [queryset.model._meta.label, self.action, user_pk,
+                  self.request.get_full_path(), self.request.accepted_renderer.format]
+        etag = hashlib.md5(repr(state).encode(), usedforsecurity=False).hexdigest()
+        return quote_etag(etag), last_modified
+
+    def get_not_modified_response(self, request):
+        """
+        Returns a 304 (or 412) response when the conditional headers of the request match the
+        validators of the current action, before any object is loaded or serialized.
+        """
+        self.etag, self.last_modified = self.get_validators()
+        if self.etag is None:
+            return None
+        last_modified = int(self.last_modified.timestamp()) if self.last_modified else None
+        return get_conditional_response(request, etag=self.etag, last_modified=last_modified)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """
+        Adds the validators computed by `list` and `retrieve` to their response.
+        """
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, "etag", None)
+        if etag is not None and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response["ETag"] = etag
+            if self.last_modified is not None:
+                response["Last-Modified"] = http_date(self.last_modified.timestamp())
+            # The responses depend on the authenticated user.
+            patch_vary_headers(response, ["Authorization"])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """
+        Lists the objects, from `.values()` rows when a fast serializer is available.
+        """
+        not_modified = self.get_not_modified_response(request)
+        if not_modified is not None:
+            return not_modified
+
+        fast_serializer = self.get_fast_serializer()
+        if fast_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        # The keyset pagination reads its ordering columns from the rows.
+        queryset = self.get_queryset()
+        rows = fast_serializer.get_rows(self.filter_queryset(queryset), *self.get_ordering_fields(queryset))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast_serializer.serialize(page))
+        return Response(fast_serializer.serialize(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieves an object, from a `.values()` row when a fast serializer is available.
+        """
+        not_modified = self.get_not_modified_response(request)
+        if not_modified is not None:
+            return not_modified
+
+        fast_serializer = self.get_fast_serializer()
+        if fast_serializer is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        rows = fast_serializer.get_rows(self.filter_queryset(self.get_queryset()))
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(rows, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, fast_serializer.get_permission_object(row))
+        return Response(fast_serializer.serialize([row])[0])
 
     def get_serializer_class(self):
         """
@@ -37,7 +273,7 @@ class BaseViewSet(ModelViewSet):
             return super().get_serializer_class()
 
 
-class ProjectViewSet(BaseViewSet):
+class ProjectViewSet(ResponseCacheMixin, BaseViewSet):
     """
     Manages CRUD operations for projects in the application.
 
@@ -46,6 +282,28 @@ class ProjectViewSet(BaseViewSet):
     """
     serializer_class = ProjectListSerializer
     detail_serializer_class = ProjectDetailSerializer
+    # Number of issues read per query by the export.
+    export_chunk_size = 500
+    # The `issue_counts` field reads the issue counters of the project.
+    field_attributes = {"issue_counts": Project.counter_fields}
+    fast_serializer_classes = {
+        "list": ProjectListFastSerializer,
+        "retrieve": ProjectDetailFastSerializer,
+    }
+    queryset_plans = {
+        "list": {
+            # The issue counters are used by the `issue_counts` field.
+            "only": ["id", "name", "description", "type", *Project.counter_fields],
+        },
+        "retrieve": {
+            "select_related": ["author"],
+            "prefetch_related": [
+                Prefetch("issues", queryset=Issue.objects.only("id", "title", "project_id")),
+                Prefetch("contributors", queryset=CustomUser.objects.only("id", "username")),
+            ],
+            "only": ["id", "name", "description", "type", "created_time", "author__username"],
+        },
+    }
 
     def get_permissions(self):
         """
@@ -56,7 +314,7 @@ class ProjectViewSet(BaseViewSet):
         # Only the author of the project can update or delete
         if self.action in ['update', 'partial_update', 'destroy']:
             permission_classes.append(IsProjectAuthor)
-        if self.action in ['retrieve', 'list']:
+        if self.action in ['retrieve', 'list', 'export', 'changes']:
             permission_classes.append(IsProjectContributor)
         permission_instances = []
 
@@ -67,9 +325,37 @@ class ProjectViewSet(BaseViewSet):
 
     def get_queryset(self):
         """
-        Returns a queryset containing all projects.
+        Returns the projects visible to the user. Lists only contain the projects the user
+        authored or contributes to.
+        """
+        queryset = Project.objects.active()
+        if self.action == "list":
+            queryset = queryset.visible_to(self.request.user)
+        return self.apply_queryset_plan(queryset.order_by("id"))
+
+    def get_cache_project_pk(self):
+        """
+        Only caches the details of a project, once the membership of the user allows to read them:
+        a list contains several projects.
+        """
+        pk = str(self.kwargs.get("pk", ""))
+        if self.action != "retrieve" or not pk.isdigit():
+            return None
+        membership = get_project_membership(self.request, pk)
+        if not membership.has_access:
+            # Let the regular path return the 404 or the 403.
+            return None
+        return pk
+
+    def get_validator_queryset(self):
+        """
+        Returns the projects of the response without their issue counts: changes to the issues
+        and contributors of a project update its `updated_time`.
         """
-        return Project.objects.all()
+        queryset = Project.objects.active()
+        if self.action == "list":
+            queryset = queryset.visible_to(self.request.user)
+        return queryset
 
     def perform_create(self, serializer):
         """
@@ -83,20 +369,104 @@ class ProjectViewSet(BaseViewSet):
         # Return the data of the created project
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def destroy(self, request, *args, **kwargs):
+        """
+        Hides the project and returns the job deleting it in the background, see
+        `project_management_app.deletion`.
+        """
+        job = request_project_deletion(self.get_object(), request.user)
+        serializer = DeletionJobSerializer(job, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=["get"])
+    def export(self, request, *args, **kwargs):
+        """
+        Streams the issues of the project with their comments, as NDJSON (default) or CSV
+        depending on the `output` query parameter.
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({"output": [f"Choose one of: {', '.join(EXPORT_FORMATS)}."]})
+        project = self.get_object()
+
+        exporter, content_type = EXPORT_FORMATS[output]
+        response = StreamingHttpResponse(exporter(iter_issues(project, self.export_chunk_size)),
+                                         content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="project-{project.pk}-issues.{output}"'
+        return response
+
+    @action(detail=True, methods=["get"])
+    def changes(self, request, *args, **kwargs):
+        """
+        Returns the changes of the project after the `since` cursor, see `project_management_app.changelog`.
+        """
+        project = self.get_object()
+        serializer = ChangesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = get_changes(project, serializer.validated_data.get("since"), serializer.validated_data["limit"],
+                           request, self.get_serializer_context())
+        return Response(data)
+
 
-class IssueViewSet(BaseViewSet):
+class IssueViewSet(ResponseCacheMixin, BaseViewSet):
     """
     Manages CRUD operations for issues associated with projects in the application.
     """
     serializer_class = IssueListSerializer
     detail_serializer_class = IssueDetailSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ("created_time", "id")
+    filter_backends = [IssueFilterBackend, IssueOrderingFilter]
+    archived_model = ArchivedIssue
+    # Limits of the bulk endpoint: items per request and rows per INSERT/UPDATE statement.
+    bulk_max_items = 5000
+    bulk_batch_size = 500
+    # The detail includes the name of the project.
+    detail_validator_fields = ("updated_time", "project__updated_time")
+    fast_serializer_classes = {
+        "list": IssueListFastSerializer,
+        "retrieve": IssueDetailFastSerializer,
+    }
+    queryset_plans = {
+        "list": {
+            "select_related": ["assignee"],
+            "only": ["id", "title", "description", "status", "priority", "tag", "created_time",
+                     "comment_count", "assignee__username"],
+        },
+        "retrieve": {
+            "select_related": ["project", "assignee", "author"],
+            "only": ["id", "title", "description", "status", "priority", "tag", "comment_count",
+                     "project__name", "assignee__username", "author__username"],
+        },
+        "update": {
+            "select_related": ["assignee"],
+        },
+        "partial_update": {
+            "select_related": ["assignee"],
+        },
+    }
 
     def get_queryset(self):
         """
         Returns a queryset of issues for a specific project identified by `project_pk`.
         """
         project_pk = self.kwargs['project_pk']
-        return Issue.objects.filter(project_id=project_pk)
+        model = self.archived_model if self.reads_archive() else Issue
+        queryset = model.objects.filter(project_id=project_pk).order_by(*self.keyset_ordering)
+        if self.request.method not in SAFE_METHODS:
+            # The counters of the project move the issue from the status and priority read here: lock
+            # the row until the write commits, so that concurrent updates read the committed values.
+            queryset = queryset.select_for_update(of=("self",))
+        return self.apply_queryset_plan(queryset)
+
+    def get_project(self):
+        """
+        Returns the project from the URL, resolved once per request and shared with the permissions.
+        """
+        membership = get_project_membership(self.request, self.kwargs['project_pk'])
+        if not membership.exists:
+            raise NotFound("Project not found")
+        return membership.project
 
     def get_permissions(self):
         """
@@ -104,7 +474,7 @@ class IssueViewSet(BaseViewSet):
         """
         permissions_classes = [IsAuthenticated]
 
-        if self.action in ['list', 'retrieve', 'create']:
+        if self.action in ['list', 'retrieve', 'create', 'bulk_create', 'bulk_update']:
             permissions_classes.append(HasProjectAccessPermission)
         # Only the author of the issue can update or delete
         if self.action in ['destroy', 'update', 'partial_update']:
@@ -115,10 +485,11 @@ class IssueViewSet(BaseViewSet):
         """
         Creates a new issue for a project. Only authors or contributors of the project can create issues.
         """
-        project = get_object_or_404(Project, pk=self.kwargs['project_pk'])
+        # Reuse the project and membership already resolved by the permission checks
+        project = self.get_project()
 
         # Restrict issue creation to project's author or contributors
-        if request.user != project.author and request.user not in project.contributors.all():
+        if not get_project_membership(request, project.pk).has_access:
             raise PermissionDenied("Only the author or contributors can create issues.")
 
         # Validate and save the issue
@@ -134,7 +505,7 @@ class IssueViewSet(BaseViewSet):
         Updates an issue. Retrieves the associated project and the specific issue instance to be updated.
         """
         # Retrieve the associated project using the project ID from the URL
-        project = get_object_or_404(Project, pk=self.kwargs['project_pk'])
+        project = self.get_project()
         # Get the specific issue instance to be updated
         instance = self.get_object()
 
@@ -151,7 +522,7 @@ class IssueViewSet(BaseViewSet):
         """
 
         # Retrieve the associated project using the project ID from the URL
-        project = get_object_or_404(Project, pk=self.kwargs['project_pk'])
+        project = self.get_project()
         # Get the specific issue instance to be updated
         instance = self.get_object()
 
@@ -162,17 +533,164 @@ class IssueViewSet(BaseViewSet):
 
         return Response(serializer.data)
 
+    def validate_bulk_items(self, request, partial):
+        """
+        Validates a list of issues and resolves all their assignees with a single query.
+        Returns the validated items and a list of errors with one entry per item.
+        """
+        if not isinstance(request.data, list):
+            raise ValidationError({"non_field_errors": ["Expected a list of issues."]})
+        if len(request.data) > self.bulk_max_items:
+            raise ValidationError({"non_field_errors": [f"At most {self.bulk_max_items} issues can be "
+                                                        f"sent at once."]})
+
+        items = []
+        errors = []
+        for data in request.data:
+            serializer = IssueBulkItemSerializer(data=data, partial=partial)
+            if serializer.is_valid():
+                items.append(serializer.validated_data)
+                errors.append({})
+            else:
+                items.append(None)
+                errors.append(serializer.errors)
+
+        # Only the contributors of the project can be assigned to its issues.
+        usernames = {item["assignee"] for item in items if item and item.get("assignee")}
+        contributors = CustomUser.objects.filter(username__in=usernames,
+                                                 contributions__project_id=self.kwargs['project_pk'])
+        assignees = {user.username: user for user in contributors.only("id", "username")}
+        for item, item_errors in zip(items, errors):
+            if item and item.get("assignee"):
+                if item["assignee"] in assignees:
+                    item["assignee"] = assignees[item["assignee"]]
+                else:
+                    item_errors["assignee"] = ["The assigned user must be a contributor of the project."]
+        return items, errors
+
+    def bulk_create(self, request, *args, **kwargs):
+        """
+        Creates a list of issues in a single transaction. If any issue is invalid nothing is created
+        and the response lists the errors of each item.
+        """
+        project = self.get_project()
+        items, errors = self.validate_bulk_items(request, partial=False)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        issues = []
+        for item in items:
+            item.pop("id", None)
+            issues.append(Issue(project=project, author=request.user, **item))
+        with transaction.atomic():
+            issues = Issue.objects.bulk_create(issues, batch_size=self.bulk_batch_size)
+            # `bulk_create` does not send `post_save`: update the project with its issue counters
+            # and the search index here.
+            deltas = Counter()
+            for issue in issues:
+                deltas.update(issue.counters())
+                issue.remember_counted_values()
+            Project.objects.filter(pk=project.pk).update_counters(deltas)
+            get_search_backend().index_issues(issues)
+            log_changes(project.pk, "issue", [issue.pk for issue in issues], "created")
+            response_cache.invalidate(project.pk)
+
+        serializer = IssueListSerializer(issues, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class CommentViewSet(BaseViewSet):
+    def bulk_update(self, request, *args, **kwargs):
+        """
+        Partially updates a list of issues, identified by their `id`, in a single transaction.
+        Only the author of an issue can update it. If any item is invalid nothing is updated
+        and the response lists the errors of each item.
+        """
+        items, errors = self.validate_bulk_items(request, partial=True)
+        ids = [item["id"] for item in items if item and "id" in item]
+        # Locked until the counters are updated, see `get_queryset`.
+        issues = Issue.objects.select_for_update().filter(project_id=self.kwargs['project_pk'], pk__in=ids).in_bulk()
+
+        fields = set()
+        for item, item_errors in zip(items, errors):
+            if item is None:
+                continue
+            if "id" not in item:
+                item_errors["id"] = ["This field is required."]
+                continue
+            issue = issues.get(item.pop("id"))
+            if issue is None:
+                item_errors["id"] = ["Issue not found."]
+            elif issue.author_id != request.user.pk:
+                item_errors["id"] = ["Only the author can modify this issue."]
+            elif not item_errors:
+                for attr, value in item.items():
+                    setattr(issue, attr, value)
+                fields.update(item)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        updated = [issues[item_id] for item_id in ids]
+        if fields:
+            # `bulk_update` neither sets `auto_now` fields nor sends `post_save`.
+            now = timezone.now()
+            for issue in updated:
+                issue.updated_time = now
+            # Issues moved between the counters of the project by a new status or priority.
+            deltas = Counter()
+            for issue in updated:
+                deltas.subtract(issue.counters(stored=True))
+                deltas.update(issue.counters())
+                issue.remember_counted_values()
+            with transaction.atomic():
+                Issue.objects.bulk_update(updated, fields=sorted(fields | {"updated_time"}),
+                                          batch_size=self.bulk_batch_size)
+                Project.objects.filter(pk=self.kwargs['project_pk']).update_counters(deltas)
+                if fields & {"title", "description"}:
+                    get_search_backend().index_issues(updated)
+                log_changes(self.kwargs['project_pk'], "issue", ids, "updated")
+                response_cache.invalidate(self.kwargs['project_pk'])
+
+        # Load the assignees of the updated issues with a single query.
+        assignees = CustomUser.objects.only("id", "username")
+        prefetch_related_objects(updated, Prefetch("assignee", queryset=assignees))
+        serializer = IssueListSerializer(updated, many=True)
+        return Response(serializer.data)
+
+
+class CommentViewSet(ResponseCacheMixin, BaseViewSet):
     serializer_class = CommentListSerializer
     detail_serializer_class = CommentDetailSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ("created_time", "id")
+    archived_model = ArchivedComment
+    fast_serializer_classes = {
+        "list": CommentListFastSerializer,
+        "retrieve": CommentDetailFastSerializer,
+    }
+    queryset_plans = {
+        "list": {
+            "only": ["id", "description", "created_time"],
+        },
+        "retrieve": {
+            "select_related": ["author"],
+            "only": ["id", "description", "created_time", "author__username"],
+        },
+    }
+
+    def get_cache_project_pk(self):
+        """
+        Caches the comments under the version of the project of their issue, resolved by the permissions.
+        """
+        issue, _ = get_issue_membership(self.request, self.kwargs.get('issue_pk'), archived=self.reads_archive())
+        return issue.project_id if issue is not None else None
 
     def get_queryset(self):
         # Extract the issue ID from the URL parameters
         issue_pk = self.kwargs.get('issue_pk')
 
         # Filter the comments that belong to the specified issue
-        return Comment.objects.filter(issue=issue_pk)
+        model = self.archived_model if self.reads_archive() else Comment
+        queryset = model.objects.filter(issue=issue_pk).order_by(*self.keyset_ordering)
+        return self.apply_queryset_plan(queryset)
 
     def get_permissions(self):
         # Adds IsAuthenticated for all actions
@@ -188,7 +706,9 @@ class CommentViewSet(BaseViewSet):
     def create(self, request, *args, **kwargs):
         # Extract issue ID from URL and retrieve the corresponding issue object, raising 404 if not found
         issue_pk = self.kwargs.get('issue_pk')
-        issue = get_object_or_404(Issue, pk=issue_pk)
+        issue, _ = get_issue_membership(request, issue_pk)
+        if issue is None:
+            raise NotFound("Issue not found")
 
         # Initialize serializer with request data, validate it, and save the new comment with issue and author
         serializer = self.get_serializer(data=request.data)
@@ -197,3 +717,30 @@ class CommentViewSet(BaseViewSet):
 
         # Return a 201 Created response with the serialized comment data
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class DeletionJobView(RetrieveAPIView):
+    """
+    Returns the progress of a deletion to the user who requested it. The requester of a user deletion
+    can no longer authenticate: the response to their request is the last state they can read.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = DeletionJobSerializer
+
+    def get_queryset(self):
+        # The jobs of the other users are not found.
+        return DeletionJob.objects.filter(requested_by=self.request.user)
+
+
+class SearchView(APIView):
+    """
+    Searches the issues and comments of the projects the user authored or contributes to.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        serializer = SearchQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        results = get_search_backend().search(request.user, serializer.validated_data["q"],
+                                              serializer.validated_data["limit"])
+        return Response({"results": results})
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class UserContribAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "user_contrib_app"
+
+    def ready(self):
+        # Connect the signal receivers invalidating the cached users.
+        from user_contrib_app import signals  # noqa: F401
@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from SoftDeskSupportAPI.replicas import replica_cache_timeout
+from user_contrib_app.models import CustomUser
+
+
+class UserCache:
+    """
+    Bounded LRU cache of user rows with a time to live, local to the process.
+    It stores the column values rather than instances, so that each request gets its own user object.
+    Keys are user IDs as strings: tokens may carry the ID as a string and signals as an integer.
+    Saves and deletions of users invalidate their entry in this process, the time to live bounds
+    how long another process can use an outdated entry.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        return getattr(settings, "USER_CACHE_MAX_SIZE", 10000)
+
+    @property
+    def timeout(self):
+        return getattr(settings, "USER_CACHE_TIMEOUT", 60)
+
+    def get(self, user_id):
+        """
+        Returns a new `CustomUser` built from the cached row, or None on a miss.
+        """
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        field_names, values = entry[1]
+        return CustomUser.from_db(DEFAULT_DB_ALIAS, field_names, values)
+
+    def set(self, user_id, user):
+        fields = CustomUser._meta.concrete_fields
+        row = ([field.attname for field in fields], [getattr(user, field.attname) for field in fields])
+        key = str(user_id)
+        # Users read from a replica may be behind: they are kept no longer than the replica pin.
+        expires = time.monotonic() + replica_cache_timeout(self.timeout)
+        with self._lock:
+            self._entries[key] = (expires, row)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns the hit and miss counters and the number of entries of this process.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+user_cache = UserCache()
+
+
+def check_user(validated_token, user):
+    """
+    Applies the checks of `JWTAuthentication.get_user` to a user read from the cache.
+    """
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    if api_settings.CHECK_REVOKE_TOKEN:
+        if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    `JWTAuthentication` resolving the user of the token through `user_cache`, so that
+    authenticated requests do not load the user from the database every time.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        else:
+            check_user(validated_token, user)
+        return user
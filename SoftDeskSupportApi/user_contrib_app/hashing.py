@@ -0,0 +1,60 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingPoolFull(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many sign-ups in progress, please try again in a few seconds."
+    default_code = "hashing_pool_full"
+
+
+class PasswordHashingPool:
+    """
+    Bounded pool of threads computing password hashes.
+
+    At most `PASSWORD_HASHING_WORKERS` hashes are computed at once (PBKDF2 releases the GIL, so
+    they use that many cores) and at most `PASSWORD_HASHING_QUEUE_SIZE` more wait for a worker.
+    Beyond that `HashingPoolFull` is raised right away, so a burst of sign-ups is answered with
+    503 responses instead of occupying every worker of the server.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self.rejected = 0
+
+    def _get_executor(self):
+        # Created on first use, once the settings are loaded.
+        with self._lock:
+            if self._executor is None:
+                workers = getattr(settings, "PASSWORD_HASHING_WORKERS", 2)
+                queue_size = getattr(settings, "PASSWORD_HASHING_QUEUE_SIZE", 16)
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hashing")
+                self._slots = threading.BoundedSemaphore(workers + queue_size)
+            return self._executor
+
+    def make_password(self, password):
+        """
+        Returns the hash of `password`, computed by the pool, or raises `HashingPoolFull`.
+        """
+        executor = self._get_executor()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingPoolFull()
+        try:
+            future = executor.submit(make_password, password)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda future: self._slots.release())
+        return future.result()
+
+
+hashing_pool = PasswordHashingPool()
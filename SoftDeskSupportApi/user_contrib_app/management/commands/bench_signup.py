@@ -0,0 +1,100 @@
+import io
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from user_contrib_app.hashing import HashingPoolFull
+from user_contrib_app.models import CustomUser
+from user_contrib_app.serializers import CustomUserSerializer
+
+
+def legacy_sign_up(data):
+    """
+    The registration before the hashing pool: INSERT without password, hash on the request thread, UPDATE.
+    """
+    user = CustomUser.objects.create_user(username=data["username"], age=data["age"])
+    user.set_password(data["password"])
+    user.save()
+    return user
+
+
+def pooled_sign_up(data):
+    serializer = CustomUserSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.save()
+
+
+class Command(BaseCommand):
+    help = ("Measures sign-ups per second with the legacy registration and with the hashing pool, "
+            "and the latency of a profile request sent during the sign-ups. The created users are deleted.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--signups", type=int, default=64, help="Number of sign-ups per run.")
+        parser.add_argument("--concurrency", type=int, default=32, help="Number of concurrent sign-ups.")
+
+    def handle(self, *args, **options):
+        reader = CustomUser.objects.create(username="bench-signup-reader", age=30)
+        try:
+            for name, sign_up in [("legacy", legacy_sign_up), ("pooled", pooled_sign_up)]:
+                self.run(name, sign_up, reader, options["signups"], options["concurrency"])
+        finally:
+            CustomUser.objects.filter(username__startswith="bench-signup-").delete()
+
+    def run(self, name, sign_up, reader, signups, concurrency):
+        with CaptureQueriesContext(connection) as context:
+            sign_up({"username": f"bench-signup-{name}-sample", "password": "Bench-password-1", "age": 30})
+        writes = len([query for query in context.captured_queries
+                      if query["sql"].startswith(("INSERT", "UPDATE"))])
+
+        rejected = []
+        done = threading.Event()
+
+        def create(index):
+            try:
+                sign_up({"username": f"bench-signup-{name}-{index}", "password": "Bench-password-1", "age": 30})
+            except HashingPoolFull:
+                rejected.append(index)
+            finally:
+                connection.close()
+
+        read_latencies = []
+        reader_thread = threading.Thread(target=self.read_profile, args=[reader, done, read_latencies])
+        reader_thread.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(create, range(signups)))
+        duration = time.perf_counter() - start
+        done.set()
+        reader_thread.join()
+
+        created = signups - len(rejected)
+        self.stdout.write(
+            f"{name:<7} {created / duration:6.1f} sign-ups/s   {writes} writes per sign-up   "
+            f"{len(rejected)} rejected (503)   profile request during sign-ups: "
+            f"p50 {statistics.median(read_latencies) * 1000:.1f} ms, max {max(read_latencies) * 1000:.1f} ms")
+
+    def read_profile(self, user, done, latencies):
+        """
+        Requests the profile of `user` through the WSGI handler until `done` is set.
+        """
+        handler = WSGIHandler()
+        token = AccessToken.for_user(user)
+        while not done.is_set() or not latencies:
+            environ = {
+                "REQUEST_METHOD": "GET", "PATH_INFO": f"/api/users/{user.pk}/", "SERVER_NAME": "localhost",
+                "SERVER_PORT": "80", "HTTP_HOST": "localhost", "HTTP_AUTHORIZATION": f"Bearer {token}",
+                "wsgi.input": io.BytesIO(), "wsgi.url_scheme": "http", "wsgi.errors": io.StringIO(),
+            }
+            start = time.perf_counter()
+            response = handler(environ, lambda status, headers: None)
+            b"".join(response)
+            response.close()
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.01)
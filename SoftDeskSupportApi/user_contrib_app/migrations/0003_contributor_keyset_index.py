@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project_management_app", "0004_issue_comment_keyset_indexes"),
+        ("user_contrib_app", "0002_contributor"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="contributor",
+            index=models.Index(fields=["project", "id"], name="contributor_project_id_idx"),
+        ),
+    ]
@@ -13,6 +13,32 @@ class CustomUser(AbstractUser):
 
     REQUIRED_FIELDS = ['age']
 
+    # Fields of the user read by the responses of the projects they take part in: the username, and
+    # the data sharing preference checked by `AuthorSerializerMixin`.
+    public_fields = ("username", "can_data_be_shared")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_public_values()
+        return instance
+
+    def remember_public_values(self):
+        """
+        Remembers the stored public fields (when loaded), to tell whether a save changes them.
+        """
+        self._public_values = {name: self.__dict__[name] for name in self.public_fields if name in self.__dict__}
+
+    def public_fields_changed(self, update_fields=None):
+        """
+        Checks whether saving the user with `update_fields` changes a public field. Fields whose
+        stored value is unknown are considered changed.
+        """
+        stored = getattr(self, "_public_values", {})
+        return any(name not in stored or stored[name] != self.__dict__[name]
+                   for name in self.public_fields
+                   if name in self.__dict__ and (update_fields is None or name in update_fields))
+
 
 class Contributor(models.Model):
     user = models.ForeignKey(CustomUser,
@@ -24,3 +50,7 @@ class Contributor(models.Model):
 
     class Meta:
         unique_together = ("user", "project")
+        indexes = [
+            # Keyset pagination of the contributors of a project.
+            models.Index(fields=["project", "id"], name="contributor_project_id_idx"),
+        ]
@@ -4,7 +4,7 @@ from rest_framework.permissions import BasePermission
 from rest_framework.permissions import SAFE_METHODS
 from rest_framework.exceptions import PermissionDenied
 
-from project_management_app.models import Project
+from project_management_app.membership import get_project_membership
 
 
 class UserProfilePermission(BasePermission):
@@ -37,13 +37,13 @@ class IsProjectContributor(BasePermission):
     def has_permission(self, request, view):
         # Extract the project ID from the URL parameters.
         project_pk = view.kwargs.get("project_pk")
-        # Retrieve the project instance.
-        project = Project.objects.filter(pk=project_pk).first()
+        # Resolve the project and the user's membership, shared with the rest of the request.
+        membership = get_project_membership(request, project_pk)
 
-        if not project:
+        if not membership.exists:
             return False
 
-        if request.user not in project.contributors.all():
+        if not membership.is_contributor:
             # Custom error message if the user is not a contributor of the project
             raise PermissionDenied("Only project contributors can access this information.")
 
@@ -57,13 +57,13 @@ class IsProjectAuthor(BasePermission):
     def has_permission(self, request, view):
         # Extract the project ID from the URL parameters.
         project_pk = view.kwargs.get("project_pk")
-        # Retrieve the project instance.
-        project = Project.objects.filter(pk=project_pk).first()
+        # Resolve the project and the user's membership, shared with the rest of the request.
+        membership = get_project_membership(request, project_pk)
 
-        if not project:
+        if not membership.exists:
             return False
 
-        if project.author != request.user:
+        if not membership.is_author:
             if request.method == "POST":
                 # Custom error message for trying to add a contributor when not the author
                 raise PermissionDenied("Only the project's author can add a new contributor.")
@@ -3,7 +3,10 @@ from rest_framework.serializers import ModelSerializer
 from rest_framework.serializers import PrimaryKeyRelatedField
 from rest_framework.serializers import ValidationError
 from rest_framework.serializers import CharField
+from rest_framework.serializers import ListField
+from rest_framework.serializers import Serializer
 
+from user_contrib_app.hashing import hashing_pool
 from user_contrib_app.models import CustomUser
 from user_contrib_app.models import Contributor
 
@@ -28,14 +31,16 @@ class CustomUserSerializer(ModelSerializer):
         can_be_contacted = validated_data.get('can_be_contacted', False)
         can_data_be_shared = validated_data.get('can_data_be_shared', False)
 
-        user = CustomUser.objects.create_user(
-            username=validated_data['username'],
+        # Hash the password first, on the bounded hashing pool, so that the user is saved with a single INSERT.
+        password = hashing_pool.make_password(validated_data['password'])
+
+        user = CustomUser.objects.create(
+            username=CustomUser.normalize_username(validated_data['username']),
+            password=password,
             age=validated_data['age'],
             can_be_contacted=can_be_contacted,
             can_data_be_shared=can_data_be_shared
         )
-        user.set_password(validated_data['password'])
-        user.save()
         return user
 
     def update(self, instance, validated_data):
@@ -44,7 +49,7 @@ class CustomUserSerializer(ModelSerializer):
         """
         if 'password' in validated_data:
             password = validated_data.pop('password')
-            instance.set_password(password)
+            instance.password = hashing_pool.make_password(password)
 
         # Iterating over each field in the validated data.
         # This loop updates the user instance with the new values for each field provided in the request.
@@ -66,3 +71,10 @@ class ContributorSerializer(ModelSerializer):
     class Meta:
         model = Contributor
         fields = ["user", "project"]
+
+
+class ContributorBulkSerializer(Serializer):
+    """
+    Validates a list of usernames to add to or remove from a project.
+    """
+    usernames = ListField(child=CharField(), allow_empty=False, max_length=1000)
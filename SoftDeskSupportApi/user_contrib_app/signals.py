@@ -0,0 +1,66 @@
+from django.db.models.signals import post_save
+from django.db.models.signals import post_delete
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+
+from project_management_app.models import Project
+from project_management_app.models import Issue
+from project_management_app.models import Comment
+from project_management_app.models import ArchivedIssue
+from project_management_app.models import ArchivedComment
+from project_management_app.response_cache import response_cache
+from user_contrib_app.authentication import user_cache
+from user_contrib_app.models import Contributor
+from user_contrib_app.models import CustomUser
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Removes the user from the authentication cache when it is saved (profile update, password
+    change, deactivation) or deleted.
+    """
+    user_cache.invalidate(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+def get_user_project_pks(user_pk):
+    """
+    Returns the primary keys of the projects whose responses show the user: the projects they
+    author or contribute to, and the projects of their (archived) issues and comments, with one query.
+    """
+    return set(Contributor.objects.filter(user_id=user_pk).values_list("project_id").union(
+        Project.objects.filter(author_id=user_pk).values_list("pk"),
+        Issue.objects.filter(author_id=user_pk).values_list("project_id"),
+        Issue.objects.filter(assignee_id=user_pk).values_list("project_id"),
+        Comment.objects.filter(author_id=user_pk).values_list("issue__project_id"),
+        ArchivedIssue.objects.filter(author_id=user_pk).values_list("project_id"),
+        ArchivedIssue.objects.filter(assignee_id=user_pk).values_list("project_id"),
+        ArchivedComment.objects.filter(author_id=user_pk).values_list("issue__project_id"),
+    ).values_list("project_id", flat=True))
+
+
+def invalidate_user_projects(user_pk):
+    for project_pk in get_user_project_pks(user_pk):
+        response_cache.invalidate(project_pk)
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_cached_responses(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Invalidates the cached responses of the projects showing the user when their public fields,
+    e.g. the username or the data sharing preference read by `AuthorSerializerMixin`, change.
+    Logins and password changes keep them.
+    """
+    if not created and instance.public_fields_changed(update_fields):
+        invalidate_user_projects(instance.pk)
+    instance.remember_public_values()
+
+
+@receiver(pre_delete, sender=CustomUser)
+def invalidate_deleted_user_responses(sender, instance, **kwargs):
+    """
+    Invalidates the cached responses of the projects showing the user, looked up before the deletion.
+    """
+    invalidate_user_projects(instance.pk)
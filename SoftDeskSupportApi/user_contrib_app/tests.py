@@ -1,3 +1,197 @@
-from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from project_management_app.models import Project
+from user_contrib_app.authentication import CachedJWTAuthentication
+from user_contrib_app.authentication import user_cache
+from user_contrib_app.hashing import HashingPoolFull
+from user_contrib_app.hashing import PasswordHashingPool
+from user_contrib_app.hashing import hashing_pool
+from user_contrib_app.models import CustomUser
+from user_contrib_app.models import Contributor
+
+
+class ContributorTestCase(APITestCase):
+    """
+    Base test case creating a project with its author as the only contributor.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+        self.author = CustomUser.objects.create(username="author", age=30)
+        self.other = CustomUser.objects.create(username="other", age=30)
+
+        self.project = Project.objects.create(name="Project", description="Description",
+                                              type="backend", author=self.author)
+        Contributor.objects.create(user=self.author, project=self.project)
+        self.url = f"/api/projects/{self.project.pk}/contributors/"
+
+
+class ContributorViewsetTests(ContributorTestCase):
+
+    def test_author_adds_and_removes_contributor(self):
+        self.client.force_authenticate(self.author)
+
+        response = self.client.post(self.url, {"user": "other"})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Contributor.objects.filter(user=self.other, project=self.project).exists())
+
+        response = self.client.delete(self.url, {"username": "other"})
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Contributor.objects.filter(user=self.other, project=self.project).exists())
+
+    def test_non_contributor_cannot_list(self):
+        self.client.force_authenticate(self.other)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_contributor_cannot_add_contributors(self):
+        Contributor.objects.create(user=self.other, project=self.project)
+        newcomer = CustomUser.objects.create(username="newcomer", age=30)
+        self.client.force_authenticate(self.other)
+        response = self.client.post(self.url, {"user": newcomer.username})
+        self.assertEqual(response.status_code, 403)
+
+    def test_contributors_sparse_fields(self):
+        self.client.force_authenticate(self.author)
+        response = self.client.get(f"{self.url}?omit=user")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], [{"project": self.project.pk}])
+
+    def test_contributors_keyset_pagination(self):
+        users = CustomUser.objects.bulk_create([CustomUser(username=f"user{index}", age=30) for index in range(4)])
+        Contributor.objects.bulk_create([Contributor(user=user, project=self.project) for user in users])
+        self.client.force_authenticate(self.author)
+
+        response = self.client.get(f"{self.url}?cursor=&limit=3")
+        usernames = [contributor["user"] for contributor in response.data["results"]]
+        response = self.client.get(response.data["next"])
+        usernames += [contributor["user"] for contributor in response.data["results"]]
+        self.assertEqual(usernames, ["author", "user0", "user1", "user2", "user3"])
+        self.assertIsNone(response.data["next"])
+
+
+class ContributorBulkTests(ContributorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.bulk_url = f"{self.url}bulk/"
+        self.users = CustomUser.objects.bulk_create(
+            [CustomUser(username=f"user{index}", age=30) for index in range(20)])
+        self.usernames = [user.username for user in self.users]
+        self.client.force_authenticate(self.author)
+
+    def test_bulk_add_and_remove(self):
+        Contributor.objects.create(user=self.users[0], project=self.project)
+
+        response = self.client.post(self.bulk_url, {"usernames": self.usernames}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Contributor.objects.filter(project=self.project).count(), 21)
+
+        # Membership (invalidated by the additions), users, contributors for the signals, one DELETE,
+        # one project update and one change log insert.
+        with self.assertNumQueries(6):
+            response = self.client.delete(self.bulk_url, {"usernames": self.usernames[:15]}, format="json")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Contributor.objects.filter(project=self.project).count(), 6)
+
+    def test_added_users_can_access_project(self):
+        self.client.post(self.bulk_url, {"usernames": ["other"]}, format="json")
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_unknown_usernames_are_rejected(self):
+        response = self.client.post(self.bulk_url, {"usernames": ["user1", "nobody"]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Contributor.objects.filter(user=self.users[1]).exists())
+
+    def test_only_author_can_add(self):
+        Contributor.objects.create(user=self.other, project=self.project)
+        self.client.force_authenticate(self.other)
+        response = self.client.post(self.bulk_url, {"usernames": ["user1"]}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = CustomUser.objects.create(username="user", age=30)
+        self.url = f"/api/users/{self.user.pk}/"
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def authenticate(self):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        return CachedJWTAuthentication().authenticate(request)[0]
+
+    def test_cached_user_needs_no_query(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual(user.username, "user")
+        self.assertIsNot(user, self.authenticate())
+
+    def test_profile_update_invalidates_user(self):
+        self.authenticate()
+        response = self.client.patch(self.url, {"username": "renamed"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.authenticate().username, "renamed")
+
+    def test_deleted_user_is_not_authenticated(self):
+        self.authenticate()
+        self.assertEqual(self.client.delete(self.url).status_code, 202)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_cache_is_bounded(self):
+        users = CustomUser.objects.bulk_create([CustomUser(username=f"user{index}", age=30) for index in range(3)])
+        with self.settings(USER_CACHE_MAX_SIZE=2):
+            for user in users:
+                user_cache.set(user.pk, user)
+            self.assertIsNone(user_cache.get(users[0].pk))
+            self.assertEqual(user_cache.get(users[2].pk).username, "user2")
+
+
+class RegistrationTests(APITestCase):
+
+    def test_sign_up_is_a_single_insert(self):
+        data = {"username": "new-user", "password": "S3cure-password", "age": 20}
+        with self.assertNumQueries(2) as context:
+            response = self.client.post("/api/users/", data)
+        self.assertEqual(response.status_code, 201)
+        # The uniqueness check of the username, then the INSERT.
+        self.assertTrue(context.captured_queries[1]["sql"].startswith("INSERT"))
+        self.assertTrue(CustomUser.objects.get(username="new-user").check_password("S3cure-password"))
+
+    def test_full_hashing_pool_returns_503(self):
+        with mock.patch.object(hashing_pool, "make_password", side_effect=HashingPoolFull()):
+            response = self.client.post("/api/users/", {"username": "new-user", "password": "pw", "age": 20})
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(CustomUser.objects.filter(username="new-user").exists())
+
+    def test_pool_rejects_beyond_queue_size(self):
+        pool = PasswordHashingPool()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_hash(password):
+            started.set()
+            release.wait()
+
+        with self.settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE_SIZE=0):
+            with mock.patch("user_contrib_app.hashing.make_password", side_effect=slow_hash):
+                thread = threading.Thread(target=pool.make_password, args=["first"])
+                thread.start()
+                started.wait()
+                with self.assertRaises(HashingPoolFull):
+                    pool.make_password("second")
+                release.set()
+                thread.join()
+        self.assertEqual(pool.rejected, 1)
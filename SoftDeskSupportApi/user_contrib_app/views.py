@@ -4,8 +4,12 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.permissions import AllowAny
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
 
+from SoftDeskSupportAPI.pagination import KeysetPagination
+from SoftDeskSupportAPI.sparse_fields import SparseFieldsMixin
+from SoftDeskSupportAPI.transactions import AtomicWritesMixin
 from user_contrib_app.permissions import UserProfilePermission
 from user_contrib_app.permissions import IsProjectContributor
 from user_contrib_app.permissions import IsProjectAuthor
@@ -13,16 +17,27 @@ from user_contrib_app.models import CustomUser
 from user_contrib_app.models import Contributor
 from user_contrib_app.serializers import CustomUserSerializer
 from user_contrib_app.serializers import ContributorSerializer
+from user_contrib_app.serializers import ContributorBulkSerializer
+from project_management_app.changelog import log_changes
+from project_management_app.deletion import request_user_deletion
+from project_management_app.membership import get_project_membership
+from project_management_app.membership import membership_cache
 from project_management_app.models import Project
+from project_management_app.response_cache import ResponseCacheMixin
+from project_management_app.response_cache import response_cache
+from project_management_app.serializers import DeletionJobSerializer
+from project_management_app.signals import deferred_project_touches
 
 
-class CustomUsersViewset(ModelViewSet):
+class CustomUsersViewset(SparseFieldsMixin, ModelViewSet):
     serializer_class = CustomUserSerializer
 
     def get_queryset(self):
         if self.action == 'list':
-            # Filter users based on their preference to share data
-            return CustomUser.objects.filter(can_data_be_shared=True)
+            # Filter users based on their preference to share data, reading only the serialized columns
+            queryset = CustomUser.objects.filter(can_data_be_shared=True, is_active=True)
+            queryset = queryset.only("id", "username", "age", "can_be_contacted", "can_data_be_shared")
+            return self.defer_unread(queryset)
         return CustomUser.objects.none()
 
     def get_object(self):
@@ -61,34 +76,49 @@ class CustomUsersViewset(ModelViewSet):
 
     def destroy(self, request, pk=None, *args, **kwargs):
         """
-        Allows a user to delete their own account.
+        Allows a user to delete their own account. The account is deactivated at once and deleted
+        in the background with its projects, issues and comments, see `project_management_app.deletion`.
         """
         user = get_object_or_404(CustomUser, pk=pk)
         # Check permissions for the user
         self.check_object_permissions(request, user)
 
-        user.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        job = request_user_deletion(user)
+        serializer = DeletionJobSerializer(job, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
 
-class ContributorViewset(ModelViewSet):
+class ContributorViewset(AtomicWritesMixin, ResponseCacheMixin, SparseFieldsMixin, ModelViewSet):
     serializer_class = ContributorSerializer
+    pagination_class = KeysetPagination
+    # Contributors have no creation time: the auto-incremented ID gives the order they were added in.
+    keyset_ordering = ("id",)
+    # GET and HEAD requests read from a replica, see `SoftDeskSupportAPI.replicas`.
+    read_from_replica = True
 
     def get_permissions(self):
         permissions_classes = [IsAuthenticated, IsProjectContributor]
 
-        if self.action in ["create", "destroy"]:
+        if self.action in ["create", "destroy", "bulk_create", "bulk_destroy"]:
             permissions_classes.append(IsProjectAuthor)
         return [permission() for permission in permissions_classes]
 
     def get_queryset(self):
         project_pk = self.kwargs.get("project_pk")
-        return Contributor.objects.filter(project_id=project_pk)
+        queryset = Contributor.objects.filter(project_id=project_pk)
+        # The usernames are not read when `?fields=` or `?omit=` leaves the user out.
+        if "user" not in self.get_unread_attributes():
+            queryset = queryset.select_related("user")
+        return queryset.order_by(*self.keyset_ordering)
 
     def create(self, request, *args, **kwargs):
         # Extract the project ID from the URL
         project_pk = self.kwargs.get("project_pk")
-        project = get_object_or_404(Project, pk=project_pk)
+        # Reuse the project already resolved by the permission checks
+        membership = get_project_membership(request, project_pk)
+        if not membership.exists:
+            raise Http404
+        project = membership.project
 
         # Create a new instance of Contributor with the provided data
         serializer = self.get_serializer(data=request.data)
@@ -104,12 +134,56 @@ class ContributorViewset(ModelViewSet):
 
         username = request.data.get("username")
 
-        # Get instances of Project and CustomUser
-        project = get_object_or_404(Project, pk=project_pk)
-        user = get_object_or_404(CustomUser, username=username)
-
-        # Find and delete the contributor
-        contributor = get_object_or_404(Contributor, user=user, project=project)
+        # Find and delete the contributor, looking up the user and the project in the same query
+        contributor = get_object_or_404(Contributor, user__username=username, project_id=project_pk)
         contributor.delete()
 
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def get_bulk_users(self, request):
+        """
+        Validates the usernames of a bulk request and returns their users, loaded with one `IN` query.
+        """
+        serializer = ContributorBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        usernames = set(serializer.validated_data["usernames"])
+
+        users = list(CustomUser.objects.filter(username__in=usernames).only("id", "username"))
+        unknown = usernames - {user.username for user in users}
+        if unknown:
+            raise ValidationError({"usernames": [f"Unknown users: {', '.join(sorted(unknown))}."]})
+        return users
+
+    def bulk_create(self, request, *args, **kwargs):
+        """
+        Adds several users to the project. Users who already contribute to it are ignored.
+        """
+        project_pk = self.kwargs.get("project_pk")
+        users = self.get_bulk_users(request)
+
+        # The unique constraint on (user, project) skips the existing contributors.
+        existing = set(Contributor.objects.filter(project_id=project_pk, user__in=users)
+                       .values_list("user_id", flat=True))
+        contributors = [Contributor(user=user, project_id=project_pk) for user in users]
+        Contributor.objects.bulk_create(contributors, ignore_conflicts=True)
+        # `bulk_create` does not send `post_save`: invalidate the cached memberships and responses,
+        # and update the project and its change log here, with the added contributors only.
+        log_changes(project_pk, "contributor", [user.pk for user in users if user.pk not in existing], "created")
+        membership_cache.invalidate(project_pk)
+        response_cache.invalidate(project_pk)
+        Project.objects.filter(pk=project_pk).touch()
+
+        serializer = self.get_serializer(contributors, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_destroy(self, request, *args, **kwargs):
+        """
+        Removes several users from the project with a single `DELETE` statement.
+        """
+        project_pk = self.kwargs.get("project_pk")
+        users = self.get_bulk_users(request)
+
+        # `delete()` sends `post_delete` for each contributor: update the project only once.
+        with deferred_project_touches():
+            Contributor.objects.filter(project_id=project_pk, user__in=users).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)